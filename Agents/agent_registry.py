@@ -0,0 +1,70 @@
+# agents/agent_registry.py
+import sys
+import threading
+import importlib
+from logger.logger_config import logging
+from exception.custom_exception import CustomException
+
+
+def _lazy_factory(module_name, class_name, method_name):
+    """
+    Import the agent module (and with it taskflowai) only when the agent is first built.
+    """
+    def factory():
+        module = importlib.import_module(module_name)
+        return getattr(getattr(module, class_name), method_name)()
+    return factory
+
+
+class AgentRegistry:
+    """
+    Process-wide registry of agents.
+    Agents are built lazily on first use and then shared by every session and thread,
+    so Streamlit reruns do not rebuild them.
+    """
+    _factories = {
+        "reporter_agent": _lazy_factory("Agents.travel_report_agent", "TravelReportAgent", "initialize_travel_report_agent"),
+        "travel_agent": _lazy_factory("Agents.travel_agent", "TravelAgent", "initialize_travel_agent"),
+        "web_research_agent": _lazy_factory("Agents.web_research_agent", "WebResearchAgent", "initialize_web_research_agent"),
+    }
+    _agents = {}
+    _lock = threading.Lock()
+
+    @classmethod
+    def get(cls, name):
+        """
+        Returns the shared agent registered under `name`, building it on first use.
+        """
+        agent = cls._agents.get(name)
+        if agent is not None:
+            return agent
+        with cls._lock:
+            agent = cls._agents.get(name)
+            if agent is None:
+                if name not in cls._factories:
+                    raise ValueError(f"Unknown agent: {name}")
+                agent = cls._factories[name]()
+                cls._agents[name] = agent
+            return agent
+
+    @classmethod
+    def warm_up(cls, names=None):
+        """
+        Builds the given agents (all registered agents by default) ahead of the first request.
+        """
+        try:
+            for name in names or cls._factories:
+                cls.get(name)
+            logging.info("Agent registry warmed up.")
+        except Exception as e:
+            logging.info("Failed to warm up the agent registry")
+            raise CustomException(e, sys)
+
+    @classmethod
+    def register(cls, name, factory):
+        """
+        Registers (or replaces) an agent factory. Any cached instance is dropped.
+        """
+        with cls._lock:
+            cls._factories[name] = factory
+            cls._agents.pop(name, None)
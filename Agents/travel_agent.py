@@ -1,9 +1,7 @@
 # agents/travel_agent.py
 import sys
-import os
-sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 from taskflowai import Agent  # type: ignore
-from utils.main_utils import LoadModel
+from utils.model_registry import ModelRegistry
 from logger.logger_config import logging
 from exception.custom_exception import CustomException
 from tools.search_flights import SearchFlights
@@ -23,7 +21,7 @@ class TravelAgent:
                 role="وكيل السفر",  # Arabic for "Travel Agent"
                 goal="مساعدة المسافرين في استفساراتهم",  # Arabic for "Assist travelers with their queries"
                 attributes="ودود، مجتهد، ومفصل في تقديم التقارير للمستخدمين",  # Arabic for "friendly, hardworking, and detailed in reporting back to users"
-                llm=LoadModel.load_groq_model("meta-llama/llama-4-scout-17b-16e-instruct"),
+                llm=ModelRegistry.model_for("travel_agent"),
                 tools=[
                     SearchFlights.search_flights_tool(),
                     GetWeatherData.fetch_weather_data()
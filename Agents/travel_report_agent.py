@@ -1,9 +1,7 @@
 # agents/travel_report_agent.py
 import sys
-import os
-sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 from taskflowai import Agent # type: ignore
-from utils.main_utils import LoadModel
+from utils.model_registry import ModelRegistry
 from logger.logger_config import logging
 from exception.custom_exception import CustomException
 import sys
@@ -21,7 +19,7 @@ class TravelReportAgent:
                 role="وكيل تقارير السفر",  # Arabic for "Travel Report Agent"
                 goal="كتابة تقارير سفر شاملة مع عناصر مرئية",  # Arabic for "Write comprehensive travel reports with visual elements"
                 attributes="ودود، مجتهد، يركز على العناصر المرئية، ومفصل في إعداد التقارير",  # Arabic for "friendly, hardworking, visual-oriented, and detailed in reporting"
-                llm=LoadModel.load_groq_model("meta-llama/llama-4-maverick-17b-128e-instruct")
+                llm=ModelRegistry.model_for("reporter_agent")
             )
 
             logging.info("Travel Report Agent initialized successfully.")
@@ -1,14 +1,13 @@
 # agents/web_research_agent.py
 import sys
-import os
-sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 from taskflowai import Agent # type: ignore
-from utils.main_utils import LoadModel
+from utils.model_registry import ModelRegistry
 from logger.logger_config import logging
 from exception.custom_exception import CustomException
 from tools.serper_search import SerperSearch
 from tools.search_articles import WikiArticles
 from tools.search_images import PexelsImages
+from utils.tool_reducer import reduced
 
 
 class WebResearchAgent:
@@ -24,7 +23,7 @@ class WebResearchAgent:
                 role="وكيل البحث على الويب",  # Arabic for "Web Research Agent"
                 goal="البحث عن الوجهات والعثور على الصور ذات الصلة",  # Arabic for "Research destinations and find relevant images"
                 attributes="مجتهد، شامل، دقيق، يركز على الصور",  # Arabic for "diligent, thorough, comprehensive, visual-focused"
-                llm=LoadModel.load_groq_model("meta-llama/llama-4-scout-17b-16e-instruct"),
+                llm=ModelRegistry.model_for("web_research_agent"),
                 tools=[SerperSearch.search_web(), 
                        WikiArticles.fetch_articles(), 
                        search_pexels_images
@@ -37,6 +36,7 @@ class WebResearchAgent:
             logging.info("Error initializing Web Research Agent")
             raise CustomException(sys, e)
     
+@reduced("pexels")
 def search_pexels_images(query: str):
     """Searches for relevant images on Pexels for a given query."""
     return PexelsImages.search_images(query)    
\ No newline at end of file
@@ -1,19 +1,19 @@
 import streamlit as st  # type: ignore
-from taskflowai import Task, set_verbosity  # type: ignore
-import base64
-import re
-import os
-import requests
-from PIL import Image
-from io import BytesIO
-from Agents.travel_report_agent import TravelReportAgent
-from Agents.travel_agent import TravelAgent
-from Agents.web_research_agent import WebResearchAgent
-from logger.logger_config import logging
-from exception.custom_exception import CustomException
-import markdown2
-from weasyprint import HTML
-import tempfile
+from utils.bootstrap import init_environment, init_taskflowai
+
+# Load .env before the modules below read their settings
+init_environment()
+
+from Agents.agent_registry import AgentRegistry
+from utils.result_cache import result_cache
+from utils.pdf_utils import PDFRenderer
+from utils.image_pipeline import ImagePipeline, IMAGE_PATTERN, normalize_image_url, has_image_extension
+from utils.streaming import stable_markdown
+from utils.metrics import MetricsRegistry, traced
+from utils.report_assembler import REPORT_SECTIONS
+from utils.plan_store import plan_store
+from utils.scheduler import scheduler
+from core.planner import TravelPlanner, generate_pdf, leg_section_key, MAX_TRIP_LEGS
 
 headers = {
     "authorization_groq": st.secrets["GROQ_API_KEY"],
@@ -31,8 +31,9 @@ st.set_page_config(
     initial_sidebar_state="collapsed"
 )
 
-# Set verbosity for debugging purposes
-set_verbosity(True)
+# Configure taskflowai (verbosity) before the agents are built
+init_taskflowai()
+
 
 
 # First, simplify the CSS by removing the white backgrounds and fixing contrast
@@ -108,72 +109,157 @@ st.markdown("""
     </style>
     """, unsafe_allow_html=True)
 
-# Define agents
-reporter_agent = TravelReportAgent.initialize_travel_report_agent()
-travel_agent = TravelAgent.initialize_travel_agent()
-web_research_agent = WebResearchAgent.initialize_web_research_agent()
+# Build the shared agents once per process; later reruns reuse them from the registry
+AgentRegistry.warm_up()
+
+
+@st.fragment
+def pdf_download_section(markdown_text, filename, plan_id=None):
+    """
+    Render the PDF only when the user asks for it.
+    Runs as a fragment so clicking the button does not rerun the whole plan.
+    PDFs of stored plans are kept in the plan store and served from there.
+    """
+    pdf_key = f"pdf_ready_{PDFRenderer.content_hash(markdown_text)}"
+    stored_pdf = plan_store.load_pdf(plan_id) if plan_id else None
+    if stored_pdf is None and st.button("📄 تجهيز ملف PDF", key=f"{pdf_key}_prepare", use_container_width=True):
+        with st.spinner("جاري إنشاء ملف PDF..."):
+            stored_pdf = generate_pdf(markdown_text, filename)
+        if plan_id:
+            plan_store.save_pdf(plan_id, stored_pdf)
+        st.session_state[pdf_key] = True
+
+    if stored_pdf is not None or st.session_state.get(pdf_key):
+        st.download_button(
+            label="📥 تحميل خطة السفر الكاملة (PDF)",
+            data=stored_pdf if stored_pdf is not None else generate_pdf(markdown_text, filename),
+            file_name=filename,
+            mime="application/pdf",
+            use_container_width=True
+        )
+
+
+def pdf_filename(destination):
+    return f"خطة_السفر_{destination.lower().replace(' ', '_')}.pdf"
+
+
+def make_event_renderer(placeholders):
+    """
+    Return render_event(key, status, payload), which fills the placeholder of a section.
+    """
+    def render_event(key, status, payload):
+        if key == "queue" and "queue" in placeholders:
+            # Calls wait for a rate-limited provider instead of failing; show the queue position
+            if payload:
+                placeholders["queue"].info(f"⏳ في قائمة الانتظار، الترتيب {payload['position']} ({payload['provider']})")
+            else:
+                placeholders["queue"].empty()
+            return
+        if key not in placeholders:
+            return
+        if status == "partial":
+            # Render what has streamed so far; incomplete image tags wait for the next update
+            placeholders[key].markdown(stable_markdown(payload), unsafe_allow_html=True)
+            return
+
+        with placeholders[key].container():
+            if status == "error":
+                st.error(f"خطأ في تحميل المحتوى: {str(payload)}")
+                return
+            try:
+                display_image_or_markdown(payload)
+            except Exception as e:
+                st.error(f"خطأ في عرض المحتوى: {str(e)}")
+                st.markdown(payload)
+
+    return render_event
+
+
+def add_final_placeholder(tab, placeholders):
+    with tab:
+        st.markdown("<div class='section-header'><h3>📋 خطة السفر الكاملة</h3></div>", unsafe_allow_html=True)
+        placeholders["final"] = st.empty()
+        placeholders["final"].info("سيتم إنشاء التقرير النهائي بعد اكتمال الأقسام...")
 
 
-def generate_pdf(markdown_text, filename="trip_plan.pdf"):
+def create_plan_tabs():
     """
-    Convert Markdown travel plan to a downloadable RTL PDF.
+    Create one tab per section plus the final plan tab.
+    Returns (tabs, placeholders, render_event) where render_event(key, status, payload)
+    fills a section's placeholder.
     """
-    try:
-        # Convert markdown to HTML
-        html_content = markdown2.markdown(markdown_text)
-
-        # Wrap HTML in a styled RTL container
-        rtl_html = f"""
-        <html lang="ar" dir="rtl">
-        <head>
-            <meta charset="utf-8">
-            <style>
-                body {{
-                    direction: rtl;
-                    text-align: right;
-                    font-family: 'Amiri', 'Cairo', 'Tahoma', sans-serif;
-                    font-size: 14px;
-                    line-height: 1.6;
-                    margin: 2rem;
-                }}
-                h1, h2, h3, h4 {{
-                    color: #1e3a8a;
-                }}
-                img {{
-                    max-width: 100%;
-                    height: auto;
-                    display: block;
-                    margin: 1rem auto;
-                }}
-            </style>
-        </head>
-        <body>
-            {html_content}
-        </body>
-        </html>
-        """
-
-        # Save PDF to a temporary file
-        with tempfile.NamedTemporaryFile(delete=False, suffix=".pdf") as tmp_file:
-            HTML(string=rtl_html).write_pdf(tmp_file.name)
-            tmp_file.seek(0)
-            pdf_data = tmp_file.read()
-
-        return pdf_data
-
-    except Exception as e:
-        logging.error(f"❌ Failed to generate PDF: {e}")
-        raise CustomException("حدث خطأ أثناء إنشاء ملف PDF")
+    tab_titles = [title for _, title in REPORT_SECTIONS] + ["📋 خطة السفر الكاملة"]
+    placeholders = {"queue": st.empty()}
+    tabs = st.tabs(tab_titles)
+
+    # Prepare every tab up front so results can be filled in as they arrive
+    for i, (key, title) in enumerate(REPORT_SECTIONS):
+        with tabs[i]:
+            st.markdown(f"<div class='section-header'><h3>{title}</h3></div>", unsafe_allow_html=True)
+            placeholders[key] = st.empty()
+            placeholders[key].info(f"جاري تحميل {title.lower()}...")
+
+    add_final_placeholder(tabs[-1], placeholders)
+    return tabs, placeholders, make_event_renderer(placeholders)
+
+
+def create_trip_tabs(legs):
+    """
+    Tabs for a multi-city trip: one per stop (its destination, events and weather sections),
+    the flights of all legs, and the final plan.
+    """
+    leg_sections = [(key, title) for key, title in REPORT_SECTIONS if key != "flights"]
+    flights_title = dict(REPORT_SECTIONS)["flights"]
+    tab_titles = [f"📍 {leg['destination']}" for leg in legs] + [flights_title, "📋 خطة السفر الكاملة"]
+    placeholders = {"queue": st.empty()}
+    tabs = st.tabs(tab_titles)
+
+    for number, leg in enumerate(legs, start=1):
+        with tabs[number - 1]:
+            for key, title in leg_sections:
+                st.markdown(f"<div class='section-header'><h3>{title}</h3></div>", unsafe_allow_html=True)
+                section_key = leg_section_key(number, key)
+                placeholders[section_key] = st.empty()
+                placeholders[section_key].info(f"جاري تحميل {title.lower()}...")
+
+    with tabs[len(legs)]:
+        st.markdown(f"<div class='section-header'><h3>{flights_title}</h3></div>", unsafe_allow_html=True)
+        placeholders["flights"] = st.empty()
+        placeholders["flights"].info(f"جاري تحميل {flights_title.lower()}...")
+
+    add_final_placeholder(tabs[-1], placeholders)
+    return tabs, placeholders, make_event_renderer(placeholders)
+
+
+def render_stored_plan(plan):
+    """
+    Draw a plan loaded from the plan store without running any task.
+    """
+    legs = plan["request"].get("legs")
+    tabs, placeholders, render_event = create_trip_tabs(legs) if legs else create_plan_tabs()
+    for key in placeholders:
+        if key in ("final", "queue"):
+            continue
+        if key in plan["errors"]:
+            render_event(key, "error", plan["errors"][key])
+        else:
+            render_event(key, "done", plan["sections"].get(key, ""))
+    if plan["final_report"]:
+        render_event("final", "done", plan["final_report"])
+        with tabs[-1]:
+            pdf_download_section(plan["final_report"], pdf_filename(plan["request"]["destination"]), plan["plan_id"])
 
 
 # Function to display images or markdown content
+@traced("render.display")
 def display_image_or_markdown(markdown_text):
     """
     Parses markdown for images and displays them safely.
     Falls back to st.image() if the markdown fails or URL is suspicious.
+    Images that need st.image() are fetched up front, concurrently, from the thumbnail cache.
     """
-    image_pattern = r'!\[(.*?)\]\((.*?)\)'
-    parts = re.split(image_pattern, markdown_text)
+    thumbnails = ImagePipeline.thumbnails_for(markdown_text)
+    parts = IMAGE_PATTERN.split(markdown_text)
 
     for i in range(0, len(parts), 3):
         try:
@@ -183,153 +269,55 @@ def display_image_or_markdown(markdown_text):
             # If there's an image match
             if i + 2 < len(parts):
                 alt_text = parts[i + 1]
-                url = parts[i + 2].strip()
-
-                if not url.startswith(("http://", "https://")):
-                    if url.startswith("//"):
-                        url = "https:" + url
-                    else:
-                        url = "https://" + url
+                url = normalize_image_url(parts[i + 2])
 
                 # Try to display using st.image() if suspicious
-                if not any(url.lower().endswith(ext) for ext in ['.jpg', '.jpeg', '.png', '.gif', '.bmp', '.webp']):
+                if not has_image_extension(url):
                     st.markdown(f"**{alt_text}**")
-                    try:
-                        response = requests.get(url, timeout=5)
-                        image = Image.open(BytesIO(response.content))
-                        new_image = image.resize((100, 50))
-                        st.image(new_image)
-                    except Exception as e:
+                    thumbnail = thumbnails.get(url)
+                    if thumbnail is not None:
+                        st.image(thumbnail)
+                    else:
                         st.warning(f"⚠️ تعذر تحميل الصورة: {alt_text}")
                 else:
                     st.markdown(f"![{alt_text}]({url})", unsafe_allow_html=True)
         except Exception as e:
             st.warning(f"⚠️ حدث خطأ أثناء عرض جزء من المحتوى: {str(e)}")
 
-def research_destination(destination, interests):
-    """Research destination with enhanced image handling"""
-    instruction = (
-        f"Research and generate a comprehensive travel report about {destination}.\n"
-        f"- Use Wikipedia tools to find 4-5 high-quality images of major landmarks\n"
-        f"- Make sure that the query to the image tool is in english even if the user type it in arabic\n"
-        f"- Ensure image links start with http:// or https://\n"
-        f"- Format images as: ![Description](https://full-image-url)\n"
-        f"- Add a short caption below each image\n"
-        f"- Research attractions and activities related to: {interests}\n"
-        f"- Organize the report with clear sections and headings\n"
-        f"- Place images naturally in the content where relevant\n"
-        f"- Include practical visitor information\n"
-        f"- Format the entire response in clean Markdown\n"
-        f"- **Important**: Write the final response entirely in Arabic."
-    )
-    try:
-        task = Task.create(
-            agent=web_research_agent,
-            context=f"User Destination: {destination}\nUser Interests: {interests}",
-            instruction=instruction
-        )
-        logging.info("Successfully created destination research task.")
-        return task
-    except Exception as e:
-        logging.info(f"Failed to create destination research task: {str(e)}")
-        raise CustomException(f"Error creating destination research task: {str(e)}")
-
-def research_events(destination, dates, interests):
-    """Research events with enhanced image handling"""
-    instruction = (
-        f"Search for events happening in {destination} during {dates} that match the following interests: {interests}.\n\n"
-        f"For each event, include:\n"
-        f"- Event name\n"
-        f"- Date and time\n"
-        f"- Venue/location\n"
-        f"- Ticket information (if available)\n"
-        f"- A short description of the event\n"
-        f"- Make sure that the query to the image tool is in english even if the user type it in arabic\n"
-        f"- Ensure image links start with http:// or https://\n"
-        f"- Format event images as: ![Event Name](https://full-image-url)\n"
-        f"- Format images as: ![Description](https://full-image-url)\n"
-        f"- Ensure the information is accurate and up-to-date\n"
-        f"- Place images naturally throughout the content where relevant\n"
-        f"- Format the entire response in clean Markdown\n"
-        f"- **Important**: Write the entire response in Arabic."
-    )
-    try:
-        task = Task.create(
-            agent=web_research_agent,
-            context=f"Destination: {destination}\nDates: {dates}\nInterests: {interests}",
-            instruction=instruction
-        )
-        logging.info("Successfully created events research task.")
-        return task
-    except Exception as e:
-        logging.info(f"Failed to create events research task: {str(e)}")
-        raise CustomException(f"Error creating events research task: {str(e)}")
-
-def research_weather(destination, dates):
-    """Research weather information"""
-    try:
-        task = Task.create(
-            agent=travel_agent,
-            context=f"Destination: {destination}\nDates: {dates}",
-            instruction=(
-                "Provide detailed weather information for the given destination and dates, including:\n"
-                "1. Temperature ranges\n"
-                "2. Precipitation chances\n"
-                "3. General weather patterns\n"
-                "4. Recommended clothing and gear\n"
-                "\nRespond entirely in Arabic."
-            )
-        )
-        logging.info("Successfully created weather research task.")
-        logging.info(f"Weather task details: {task}")
-        return task
-    except Exception as e:
-        logging.info(f"Failed to create weather research task: {str(e)}")
-        raise CustomException(f"Error creating weather research task: {str(e)}")
-
-def search_flights(current_location, destination, dates):
-    """Search flight options"""
-    try:
-        task = Task.create(
-            agent=travel_agent,
-            context=f"Flights from {current_location} to {destination} on {dates}",
-            instruction=(
-                "Find the top 3 affordable and convenient flight options.\n"
-                "Provide concise bullet-point information for each.\n"
-                "Include airline, departure and arrival times, duration, and price if available.\n"
-                "Respond entirely in Arabic."
-            )
-        )
-        logging.info("Successfully created flight search task.")
-        return task
-    except Exception as e:
-        logging.info(f"Failed to create flight search task: {str(e)}")
-        raise CustomException(f"Error creating flight search task: {str(e)}")
-
-def write_travel_report(destination_report, events_report, weather_report, flight_report):
-    """Create final travel report"""
-    try:
-        task = Task.create(
-            agent=reporter_agent,
-            context=f"Flight Report: {flight_report}"
-                    f"Weather Report: {weather_report}\n\n"
-                    f"Destination Report: {destination_report}\n\n"
-                    f"Events Report: {events_report}",
-            instruction=(
-                "Create a comprehensive travel report that includes the following:\n"
-                "1. Retain all images from the destination and events reports.\n"
-                "2. Organize the information clearly and logically.\n"
-                "3. Maintain all markdown formatting.\n"
-                "4. Ensure images are displayed correctly with captions.\n"
-                "5. Include all essential details from each section.\n\n"
-                "Respond entirely in Arabic."
-            )
-        )
-        logging.info("Successfully created travel report.")
-        return task
-    except Exception as e:
-        logging.info(f"Failed to create travel report: {str(e)}")
-        raise CustomException(f"Error creating travel report: {str(e)}")
+def trip_form():
+    """
+    Inputs of a multi-city trip. Returns (current_location, stops, interests).
+    """
+    current_location = st.text_input("مدينة المغادرة", placeholder="أدخل نقطة البداية", key="trip_origin")
+    stop_count = st.number_input("عدد المدن", min_value=2, max_value=MAX_TRIP_LEGS, value=2, step=1)
+    stops = []
+    for number in range(1, int(stop_count) + 1):
+        col1, col2 = st.columns(2)
+        with col1:
+            destination = st.text_input(f"المدينة {number}", placeholder="أدخل المدينة", key=f"trip_stop_{number}")
+        with col2:
+            dates = st.date_input(f"📅 تواريخ الإقامة في المدينة {number}:", [], key=f"trip_dates_{number}")
+        stops.append({"destination": destination, "dates": [d.strftime("%Y-%m-%d") for d in dates]})
+    interests = st.text_input("اهتماماتك", placeholder="المتاحف، الطعام، المشي...", key="trip_interests")
+    return current_location, stops, interests
+
+
+def plan_trip(current_location, stops, interests):
+    """
+    Plan a multi-city trip, filling the tabs as sections finish.
+    """
+    st.success("🎈 جاري بدء تخطيط رحلتك!")
+    legs = [{"destination": stop["destination"]} for stop in stops]
+    tabs, _, render_event = create_trip_tabs(legs)
+
+    with st.spinner("جاري تخطيط رحلتك..."):
+        plan = TravelPlanner.plan_trip(current_location, stops, interests, on_event=render_event)
+
+    st.query_params["plan"] = plan["plan_id"]
+    if plan["final_report"]:
+        with tabs[-1]:
+            pdf_download_section(plan["final_report"], pdf_filename(plan["request"]["destination"]), plan["plan_id"])
+
 
 def main():
     st.markdown("""
@@ -340,87 +328,71 @@ def main():
     
     with st.container():
         st.subheader("📝 تفاصيل الرحلة")
-        
-        col1, col2 = st.columns(2)
-        
-        with col1:
-            current_location = st.text_input("مدينة المغادرة", placeholder="أدخل نقطة البداية")
-            destination = st.text_input("مدينة الوجهة", placeholder="أدخل وجهتك")
-            
-        with col2:
-            dates = st.date_input("📅 اختر تواريخ السفر:", [])
-            dates = [d.strftime("%Y-%m-%d") for d in dates]
-            interests = st.text_input("اهتماماتك", placeholder="المتاحف، الطعام، المشي...")
+        multi_city = st.toggle("🗺️ رحلة متعددة المدن")
+
+        if multi_city:
+            current_location, stops, interests = trip_form()
+        else:
+            col1, col2 = st.columns(2)
+
+            with col1:
+                current_location = st.text_input("مدينة المغادرة", placeholder="أدخل نقطة البداية")
+                destination = st.text_input("مدينة الوجهة", placeholder="أدخل وجهتك")
+
+            with col2:
+                dates = st.date_input("📅 اختر تواريخ السفر:", [])
+                dates = [d.strftime("%Y-%m-%d") for d in dates]
+                interests = st.text_input("اهتماماتك", placeholder="المتاحف، الطعام، المشي...")
 
     plan_button = st.button("🚀 خطط رحلتي", type="primary", use_container_width=True)
 
-    if plan_button:
+    if plan_button and multi_city:
+        if current_location and all(stop["destination"] and stop["dates"] for stop in stops):
+            try:
+                plan_trip(current_location, stops, interests)
+            except Exception as e:
+                st.error(f"🚨 حدث خطأ: {str(e)}")
+                print(f"تفاصيل الخطأ: {str(e)}")
+        else:
+            st.warning("🔔 يرجى ملء جميع الحقول المطلوبة")
+    elif plan_button:
         if current_location and destination and dates:
             try:
                 st.success("🎈 جاري بدء تخطيط رحلتك!")
+                tabs, _, render_event = create_plan_tabs()
+
+                # The planning core runs all sections at once and reports progress through render_event
+                with st.spinner("جاري تخطيط رحلتك..."):
+                    plan = TravelPlanner.plan(current_location, destination, dates, interests, on_event=render_event)
+
+                # Keep the plan ID in the URL so reloads and shared links reopen the stored plan
+                st.query_params["plan"] = plan["plan_id"]
 
-                # Create tabs for each section
-                tab_titles = ["📍 معلومات الوجهة", "🎯 الفعاليات والأنشطة", "☀️ توقعات الطقس", "✈️ خيارات الرحلات الجوية", "📋 خطة السفر الكاملة"]
-                tabs = st.tabs(tab_titles)
-
-                sections = {
-                    "destination": ("📍 معلومات الوجهة", research_destination),
-                    "events": ("🎯 الفعاليات والأنشطة", research_events),
-                    "weather": ("☀️ توقعات الطقس", research_weather),
-                    "flights": ("✈️ خيارات الرحلات الجوية", search_flights)
-                }
-
-                reports = {}
-
-                # Populate each tab with its respective content
-                for i, (key, (title, func)) in enumerate(sections.items()):
-                    with tabs[i]:
-                        st.markdown(f"<div class='section-header'><h3>{title}</h3></div>", unsafe_allow_html=True)
-                        with st.spinner(f"جاري تحميل {title.lower()}..."):
-                            if key == "destination":
-                                reports[key] = func(destination, interests)
-                            elif key == "events":
-                                reports[key] = func(destination, dates, interests)
-                            elif key == "weather":
-                                reports[key] = func(destination, dates)
-                            else:  # flights
-                                reports[key] = func(current_location, destination, dates)
-
-                            try:
-                                display_image_or_markdown(reports[key])
-                            except Exception as e:
-                                st.error(f"خطأ في عرض المحتوى: {str(e)}")
-                                st.markdown(reports[key])
-
-                # Final travel plan tab
-                with tabs[-1]:
-                    st.markdown("<div class='section-header'><h3>📋 خطة السفر الكاملة</h3></div>", unsafe_allow_html=True)
-                    with st.spinner("جاري إنشاء التقرير النهائي..."):
-                        final_report = write_travel_report(
-                            reports["flights"],
-                            reports["weather"],
-                            reports["destination"],
-                            reports["events"]    
-                        )
-                        try:
-                            display_image_or_markdown(final_report)
-                        except Exception as e:
-                            st.error(f"خطأ في عرض التقرير النهائي: {str(e)}")
-                            st.markdown(final_report)
-
-                    st.download_button(
-                        label="📥 تحميل خطة السفر الكاملة (PDF)",
-                        data=generate_pdf(final_report, f"خطة_السفر_{destination.lower().replace(' ', '_')}.pdf"),
-                        file_name=f"خطة_السفر_{destination.lower().replace(' ', '_')}.pdf",
-                        mime="application/pdf",
-                        use_container_width=True
-                    )
+                final_report = plan["final_report"]
+                if final_report:
+                    with tabs[-1]:
+                        pdf_download_section(final_report, pdf_filename(destination), plan["plan_id"])
 
             except Exception as e:
                 st.error(f"🚨 حدث خطأ: {str(e)}")
                 print(f"تفاصيل الخطأ: {str(e)}")
         else:
             st.warning("🔔 يرجى ملء جميع الحقول المطلوبة")
+    elif st.query_params.get("plan"):
+        stored_plan = TravelPlanner.load(st.query_params.get("plan"))
+        if stored_plan is not None:
+            render_stored_plan(stored_plan)
+        else:
+            st.warning("🔔 لم يتم العثور على هذه الخطة أو انتهت صلاحيتها، يرجى التخطيط من جديد.")
+
+    with st.sidebar.expander("📊 إحصائيات الذاكرة المؤقتة"):
+        st.json(result_cache.stats())
+
+    with st.sidebar.expander("⏱️ زمن المراحل"):
+        st.json(MetricsRegistry.snapshot())
+
+    with st.sidebar.expander("🚦 قوائم انتظار مزودي الخدمة"):
+        st.json(scheduler.stats())
 
     st.markdown("""
         <p style='text-align: center; color: #666666; margin-top: 2rem;'>
@@ -0,0 +1,145 @@
+# benchmarks/import_time.py
+"""
+Import-time benchmark that guards cold-start time.
+
+    python -m benchmarks.import_time                       # compare with the baseline
+    python -m benchmarks.import_time --update-baseline     # store results as the new baseline
+    python -m benchmarks.import_time --modules core.planner --top 15
+
+Each module is imported in a fresh interpreter with `python -X importtime`, several
+times; the median cumulative import time is compared with
+benchmarks/import_baselines.json (same --tolerance and --min-delta rule as
+run_benchmarks). The run also fails when a module pulls in a
+library that must stay lazy (PDF, imaging and agent libraries).
+"""
+import sys
+import os
+import re
+import json
+import argparse
+import statistics
+import subprocess
+
+BENCHMARK_DIR = os.path.dirname(os.path.abspath(__file__))
+REPO_DIR = os.path.dirname(BENCHMARK_DIR)
+DEFAULT_BASELINE = os.path.join(BENCHMARK_DIR, "import_baselines.json")
+
+# Modules on the startup path of the app, the HTTP API and the batch CLI
+DEFAULT_MODULES = [
+    "core.planner",
+    "core.http_api",
+    "Agents.agent_registry",
+    "utils.pdf_utils",
+    "utils.image_pipeline",
+]
+
+# Libraries that are only needed once a PDF is rendered, an image is resized or an agent is built
+LAZY_PACKAGES = ["weasyprint", "markdown2", "PIL", "taskflowai"]
+
+IMPORTTIME_LINE = re.compile(r"^import time:\s+(\d+)\s+\|\s+(\d+)\s+\|(\s*)(\S+)\s*$")
+
+
+def parse_importtime(stderr):
+    """
+    Return [(module, self_us, cumulative_us, depth)] from `-X importtime` output.
+    """
+    entries = []
+    for line in stderr.splitlines():
+        match = IMPORTTIME_LINE.match(line)
+        if match:
+            self_us, cumulative_us, indent, module = match.groups()
+            entries.append((module, int(self_us), int(cumulative_us), (len(indent) - 1) // 2))
+    return entries
+
+
+def measure_module(module, env):
+    """
+    Import `module` in a fresh interpreter; return (cumulative seconds, parsed entries).
+    """
+    completed = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=REPO_DIR, env=env, capture_output=True, text=True
+    )
+    if completed.returncode != 0:
+        errors = [line for line in completed.stderr.splitlines() if not line.startswith("import time:")]
+        raise RuntimeError(f"Importing {module} failed:\n" + "\n".join(errors[-10:]))
+    entries = parse_importtime(completed.stderr)
+    total = next((cumulative for name, _, cumulative, _ in entries if name == module), 0)
+    return total / 1e6, entries
+
+
+def lazy_violations(entries):
+    loaded = {name.split(".")[0] for name, _, _, _ in entries}
+    return sorted(package for package in LAZY_PACKAGES if package in loaded)
+
+
+def run(modules, iterations, top):
+    env = dict(os.environ)
+    env.setdefault("GROQ_API_KEY", "import-benchmark")
+    results, violations = {}, {}
+    for module in modules:
+        durations, entries = [], []
+        for _ in range(iterations):
+            seconds, entries = measure_module(module, env)
+            durations.append(seconds)
+        results[module] = {
+            "min": round(min(durations), 4),
+            "median": round(statistics.median(durations), 4),
+            "max": round(max(durations), 4),
+            "iterations": iterations,
+        }
+        violations[module] = lazy_violations(entries)
+        print(f"{module:<32} median {results[module]['median']:>8.3f}s")
+        slowest = sorted(entries, key=lambda entry: entry[1], reverse=True)[:top]
+        for name, self_us, cumulative_us, _ in slowest:
+            print(f"    {name:<40} self {self_us / 1000:>8.1f} ms  cumulative {cumulative_us / 1000:>8.1f} ms")
+    return results, violations
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Measure module import time with -X importtime.")
+    parser.add_argument("--modules", default=",".join(DEFAULT_MODULES), help="Comma-separated modules to import")
+    parser.add_argument("--iterations", type=int, default=5)
+    parser.add_argument("--top", type=int, default=5, help="Slowest imports to list per module")
+    parser.add_argument("--baseline", default=DEFAULT_BASELINE)
+    parser.add_argument("--tolerance", type=float, default=0.25, help="Allowed median slowdown (0.25 = 25%%)")
+    parser.add_argument("--min-delta", type=float, default=0.02,
+                        help="Slowdowns below this many seconds are never regressions")
+    parser.add_argument("--update-baseline", action="store_true")
+    parser.add_argument("--output", help="Write the results as JSON to this file")
+    args = parser.parse_args(argv)
+
+    modules = [m.strip() for m in args.modules.split(",") if m.strip()]
+    results, violations = run(modules, args.iterations, args.top)
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+
+    failed = False
+    for module, packages in violations.items():
+        if packages:
+            failed = True
+            print(f"EAGER IMPORT {module}: loads {', '.join(packages)} at import time")
+
+    if args.update_baseline:
+        with open(args.baseline, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2, sort_keys=True)
+        print(f"Baseline written to {args.baseline}")
+        return 1 if failed else 0
+
+    if os.path.exists(args.baseline):
+        from benchmarks.run_benchmarks import compare
+
+        with open(args.baseline, encoding="utf-8") as f:
+            baseline = json.load(f)
+        for name, before, after in compare(results, baseline, args.tolerance, args.min_delta):
+            failed = True
+            print(f"REGRESSION {name}: {before:.3f}s -> {after:.3f}s")
+    else:
+        print("No baseline found; run with --update-baseline to create one.")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
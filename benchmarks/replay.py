@@ -0,0 +1,280 @@
+# benchmarks/replay.py
+"""
+Record/replay layer for every external call the app makes: Groq (through taskflowai
+and the streaming path) and HTTP calls made with `requests` (Serper, Amadeus,
+WeatherAPI, Wikipedia, Pexels and image CDNs).
+
+Modes:
+    record  - perform real calls and store the responses in a JSON cassette
+    replay  - serve calls from the cassette; misses go to the local stand-in server
+              (HTTP) or a deterministic synthetic LLM, so no network is needed
+
+Latency can be injected per provider ("groq", "serper", "amadeus", "weather",
+"wikipedia", "pexels", "images") to model slow upstreams.
+"""
+import os
+import re
+import json
+import time
+import base64
+import hashlib
+import threading
+from urllib.parse import urlparse
+
+from utils.http_client import PROVIDER_HOSTS
+
+# Providers whose stand-in path differs from the name utils.http_client uses for them
+STANDIN_PROVIDERS = {"pexels_images": "images"}
+
+# Default parameters the synthetic LLM uses when it "calls" a known tool
+SYNTHETIC_TOOL_PARAMS = {
+    "search_pexels_images": {"query": "Paris landmarks"},
+    "serper_search": {"query": "Paris events", "num_results": 8},
+    "search_articles": {"query": "Paris"},
+    "get_weather_data": {"location": "Paris", "forecast_days": 3},
+    "search_flights": {"origin": "CAI", "destination": "CDG", "departure_date": "2030-01-01"},
+}
+
+
+def provider_for(url):
+    """
+    Map a URL to a provider name, or None for hosts that are not replayed (e.g. the stand-in server).
+    """
+    host = urlparse(url).hostname or ""
+    if host in PROVIDER_HOSTS:
+        return STANDIN_PROVIDERS.get(PROVIDER_HOSTS[host], PROVIDER_HOSTS[host])
+    if host in ("127.0.0.1", "localhost"):
+        return None
+    if re.search(r"\.(jpe?g|png|gif|webp|bmp)(\?|$)", url, re.IGNORECASE):
+        return "images"
+    return None
+
+
+def parse_latency(spec):
+    """
+    Parse "groq=1.5,serper=0.2" into {"groq": 1.5, "serper": 0.2}.
+    """
+    latency = {}
+    for item in (spec or "").split(","):
+        if "=" in item:
+            provider, seconds = item.split("=", 1)
+            latency[provider.strip()] = float(seconds)
+    return latency
+
+
+class Cassette:
+    """
+    JSON file of recorded responses keyed by a hash of the request.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.entries = {}
+        self._lock = threading.Lock()
+        if path and os.path.exists(path):
+            with open(path, encoding="utf-8") as f:
+                self.entries = json.load(f)
+
+    @staticmethod
+    def key(*parts):
+        payload = json.dumps(parts, sort_keys=True, ensure_ascii=False, default=str)
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def get(self, key):
+        with self._lock:
+            return self.entries.get(key)
+
+    def put(self, key, entry):
+        with self._lock:
+            self.entries[key] = entry
+
+    def save(self):
+        if not self.path:
+            return
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        with self._lock, open(self.path, "w", encoding="utf-8") as f:
+            json.dump(self.entries, f, ensure_ascii=False, indent=1, sort_keys=True)
+
+
+class SyntheticLLM:
+    """
+    Deterministic stand-in for Groq used on replay misses.
+    Tool-loop (JSON) calls request every known tool once, then end tool usage;
+    free-text calls return an Arabic Markdown report with images.
+    """
+
+    def __init__(self, image_base_url=None, paragraphs=6):
+        self.image_base_url = image_base_url or "https://images.pexels.com/photos"
+        self.paragraphs = paragraphs
+
+    def respond(self, system_prompt, user_prompt, require_json_output):
+        if require_json_output:
+            if "Tool Usage History" in user_prompt or "You just used the tool" in user_prompt:
+                return json.dumps({"status": "END_TOOL_USAGE"})
+            tools = re.findall(r"^- (\w+):", user_prompt, re.MULTILINE)
+            calls = [{"tool": name, "params": SYNTHETIC_TOOL_PARAMS[name]}
+                     for name in tools if name in SYNTHETIC_TOOL_PARAMS]
+            return json.dumps({"tool_calls": calls} if calls else {"status": "END_TOOL_USAGE"})
+
+        seed = int(hashlib.sha256(user_prompt.encode("utf-8")).hexdigest()[:6], 16)
+        sections = ["# تقرير تجريبي"]
+        for i in range(self.paragraphs):
+            sections.append(f"## القسم {i + 1}")
+            sections.append("هذا نص تجريبي يحاكي استجابة النموذج اللغوي لقياس الأداء. " * 8)
+            if i % 2 == 0:
+                sections.append(f"![معلم {i + 1}]({self.image_base_url}/landmark_{seed}_{i}.png)")
+                sections.append("*وصف قصير للصورة.*")
+        return "\n\n".join(sections)
+
+
+class ReplaySession:
+    """
+    Installs the record/replay hooks for the duration of a benchmark run.
+    """
+
+    def __init__(self, mode="replay", cassette_path=None, standin=None, latency=None):
+        if mode not in ("record", "replay"):
+            raise ValueError(f"Unknown mode: {mode}")
+        self.mode = mode
+        self.cassette = Cassette(cassette_path)
+        self.standin = standin
+        self.latency = dict(latency or {})
+        self.synthetic = SyntheticLLM(f"{standin.base_url}/images" if standin else None)
+        self.stats = {"hits": 0, "misses": 0, "recorded": 0}
+        self._stats_lock = threading.Lock()
+        self._originals = {}
+
+    def _count(self, name):
+        with self._stats_lock:
+            self.stats[name] += 1
+
+    def _delay(self, provider):
+        seconds = self.latency.get(provider, 0.0)
+        if seconds:
+            time.sleep(seconds)
+
+    # --- HTTP -----------------------------------------------------------
+
+    def _http_request(self, session, method, url, params=None, data=None, json=None, **kwargs):
+        import requests
+
+        original = self._originals["http"]
+        provider = provider_for(url)
+        if provider is None:
+            return original(session, method, url, params=params, data=data, json=json, **kwargs)
+
+        prepared_url = requests.Request(method, url, params=params).prepare().url
+        body = json if json is not None else data
+        key = Cassette.key("http", method.upper(), prepared_url, body)
+
+        if self.mode == "record":
+            response = original(session, method, url, params=params, data=data, json=json, **kwargs)
+            self.cassette.put(key, {
+                "status": response.status_code,
+                "headers": {k: v for k, v in response.headers.items() if k.lower() in ("content-type",)},
+                "body": base64.b64encode(response.content).decode("ascii"),
+                "url": prepared_url,
+            })
+            self._count("recorded")
+            return response
+
+        entry = self.cassette.get(key)
+        if entry is not None:
+            self._count("hits")
+            self._delay(provider)
+            response = requests.models.Response()
+            response.status_code = entry["status"]
+            response._content = base64.b64decode(entry["body"])
+            response.headers = requests.structures.CaseInsensitiveDict(entry["headers"])
+            response.url = prepared_url
+            response.encoding = "utf-8"
+            response.request = requests.Request(method, prepared_url).prepare()
+            return response
+
+        self._count("misses")
+        if self.standin is None:
+            raise ConnectionError(f"Replay miss with no stand-in server: {method} {prepared_url}")
+        parsed = urlparse(url)
+        standin_url = f"{self.standin.base_url}/{provider}{parsed.path}"
+        if parsed.query:
+            standin_url += f"?{parsed.query}"
+        return original(session, method, standin_url, params=params, data=data, json=json, **kwargs)
+
+    # --- LLM ------------------------------------------------------------
+
+    def _llm_text(self, model, system_prompt, user_prompt, require_json_output, call_real):
+        key = Cassette.key("llm", model, system_prompt, user_prompt, bool(require_json_output))
+        if self.mode == "record":
+            text, error = call_real()
+            if error is None:
+                self.cassette.put(key, {"text": text})
+                self._count("recorded")
+            return text, error
+
+        entry = self.cassette.get(key)
+        self._count("hits" if entry is not None else "misses")
+        self._delay("groq")
+        if entry is not None:
+            return entry["text"], None
+        return self.synthetic.respond(system_prompt, user_prompt, require_json_output), None
+
+    def _call_groq(self, system_prompt, user_prompt, model, image_data=None, temperature=0.7,
+                   max_tokens=4000, require_json_output=False):
+        original = self._originals["groq"]
+        return self._llm_text(
+            model, system_prompt, user_prompt, require_json_output,
+            lambda: original(system_prompt, user_prompt, model, image_data, temperature, max_tokens, require_json_output)
+        )
+
+    def _stream_groq(self, model_name, system_prompt, user_prompt, temperature, max_tokens, sink):
+        original = self._originals["stream"]
+        if self.mode == "record":
+            text, error = original(model_name, system_prompt, user_prompt, temperature, max_tokens, sink)
+            if error is None:
+                self.cassette.put(Cassette.key("llm", model_name, system_prompt, user_prompt, False), {"text": text})
+                self._count("recorded")
+            return text, error
+
+        text, error = self._llm_text(model_name, system_prompt, user_prompt, False, None)
+        # Emit the replayed text in small chunks so the UI streaming path is exercised
+        for start in range(0, len(text), 64):
+            sink.write(text[start:start + 64])
+        return text, error
+
+    # --- install --------------------------------------------------------
+
+    def install(self):
+        import requests
+        from taskflowai.llm import GroqModels  # type: ignore
+        import utils.streaming as streaming
+
+        self._originals["http"] = requests.sessions.Session.request
+        self._originals["groq"] = GroqModels.call_groq
+        self._originals["stream"] = streaming._stream_groq_completion
+
+        replay = self
+
+        def request(session, method, url, *args, **kwargs):
+            return replay._http_request(session, method, url, *args, **kwargs)
+
+        requests.sessions.Session.request = request
+        GroqModels.call_groq = staticmethod(self._call_groq)
+        streaming._stream_groq_completion = self._stream_groq
+        return self
+
+    def uninstall(self):
+        import requests
+        from taskflowai.llm import GroqModels  # type: ignore
+        import utils.streaming as streaming
+
+        requests.sessions.Session.request = self._originals["http"]
+        GroqModels.call_groq = staticmethod(self._originals["groq"])
+        streaming._stream_groq_completion = self._originals["stream"]
+        if self.mode == "record":
+            self.cassette.save()
+
+    def __enter__(self):
+        return self.install()
+
+    def __exit__(self, *exc):
+        self.uninstall()
@@ -0,0 +1,236 @@
+# benchmarks/run_benchmarks.py
+"""
+Offline benchmark suite for the planning pipeline.
+
+    python -m benchmarks.run_benchmarks                       # replay against stand-ins
+    python -m benchmarks.run_benchmarks --latency groq=1.0,pexels=0.2 --iterations 5
+    python -m benchmarks.run_benchmarks --update-baseline     # store results as the new baseline
+    python -m benchmarks.run_benchmarks --mode record --cassette benchmarks/cassettes/live.json
+
+Each benchmark reports min/median/max wall time and peak traced memory. Results are
+compared with benchmarks/baselines.json; the run exits with status 1 when a median
+regresses by more than --tolerance (25%) and by more than --min-delta (0.02s).
+The committed baseline was generated in replay mode with --skip-ui --skip-pdf.
+"""
+import sys
+import os
+import json
+import time
+import argparse
+import tempfile
+import statistics
+import tracemalloc
+from collections import defaultdict
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+BENCHMARK_DIR = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_BASELINE = os.path.join(BENCHMARK_DIR, "baselines.json")
+DEFAULT_CASSETTE = os.path.join(BENCHMARK_DIR, "cassettes", "default.json")
+
+# Providers throttled by utils.scheduler; the stand-ins have no quota to protect
+SCHEDULED_PROVIDERS = ["GROQ", "SERPER", "AMADEUS", "WEATHER", "PEXELS"]
+
+API_KEYS = ["GROQ_API_KEY", "SERPER_API_KEY", "AMADEUS_API_KEY", "AMADEUS_API_SECRET",
+            "WEATHER_API_KEY", "PEXELS_API_KEY"]
+
+SAMPLE_TRIP = {
+    "current_location": "Cairo",
+    "destination": "Paris",
+    "dates": ["2030-01-01", "2030-01-02", "2030-01-03"],
+    "interests": "المتاحف، الطعام",
+}
+
+# Multi-city trip; the last stop repeats the first so shared results are exercised
+SAMPLE_ITINERARY = {
+    "current_location": "Cairo",
+    "stops": [
+        {"destination": "Istanbul", "dates": ["2030-01-01", "2030-01-03"]},
+        {"destination": "Paris", "dates": ["2030-01-04", "2030-01-06"]},
+        {"destination": "اسطنبول", "dates": ["2030-01-07", "2030-01-08"]},
+    ],
+    "interests": "المتاحف، الطعام",
+}
+
+
+def prepare_environment(args):
+    """
+    Must run before any project module is imported: most settings are read at import time.
+    """
+    workdir = tempfile.mkdtemp(prefix="travel-bench-")
+    if args.mode == "replay":
+        for key in API_KEYS:
+            os.environ.setdefault(key, "replay")
+        for provider in SCHEDULED_PROVIDERS:
+            # 0 requests disables the limit, so timings do not include quota waits
+            os.environ[f"RATE_LIMIT_{provider}"] = "0"
+    os.environ["RESULT_CACHE_PATH"] = os.path.join(workdir, "results.sqlite3")
+    for section in ("DESTINATION", "EVENTS", "WEATHER", "FLIGHTS", "REPORT"):
+        # Expire immediately so every iteration measures a real run
+        os.environ[f"RESULT_CACHE_TTL_{section}"] = "0"
+    os.environ["THUMBNAIL_CACHE_DIR"] = os.path.join(workdir, "thumbnails")
+    os.environ["PRINT_IMAGE_CACHE_DIR"] = os.path.join(workdir, "print_images")
+    os.environ["PLAN_STORE_PATH"] = os.path.join(workdir, "plans.sqlite3")
+    os.environ["LOG_DIR"] = os.path.join(workdir, "log")
+    os.environ["STREAM_SECTIONS"] = "1" if args.streaming else "0"
+    return workdir
+
+
+def reset_caches():
+    """
+    Empty the in-process and on-disk caches that sit below the result cache,
+    so repeated iterations do not measure cache hits.
+    """
+    from tools.search_images import PexelsImages
+    from tools.get_weather_data import WeatherForecast
+    from tools.search_flights import AmadeusFlightSearch
+    from utils.image_pipeline import ImagePipeline
+    from utils.pdf_utils import PDFRenderer
+
+    for cache in (PexelsImages._search_cache, PexelsImages._validity_cache, WeatherForecast._day_cache,
+                  AmadeusFlightSearch._offers_cache, AmadeusFlightSearch._location_cache, PDFRenderer._cache):
+        cache.clear()
+    ImagePipeline._cache.clear()
+    ImagePipeline._print_cache.clear()
+
+
+def measure(name, func, iterations, results):
+    durations, peaks = [], []
+    value = None
+    for _ in range(iterations):
+        reset_caches()
+        tracemalloc.reset_peak()
+        start = time.perf_counter()
+        value = func()
+        durations.append(time.perf_counter() - start)
+        peaks.append(tracemalloc.get_traced_memory()[1] / (1024 * 1024))
+    results[name] = {
+        "min": round(min(durations), 4),
+        "median": round(statistics.median(durations), 4),
+        "max": round(max(durations), 4),
+        "peak_mb": round(max(peaks), 2),
+        "iterations": iterations,
+    }
+    print(f"{name:<32} median {results[name]['median']:>8.3f}s  peak {results[name]['peak_mb']:>8.2f} MB")
+    return value
+
+
+def import_streamlit_app():
+    """
+    Import app.py outside `streamlit run`; secrets are replaced by the replay keys.
+    """
+    import streamlit as st  # type: ignore
+
+    st.secrets = defaultdict(lambda: "replay", {key: os.environ.get(key, "replay") for key in API_KEYS})
+    import app
+    return app
+
+
+def run_suite(args):
+    from benchmarks.standins import StandInServer
+    from benchmarks.replay import ReplaySession, parse_latency
+
+    latency = parse_latency(args.latency)
+    results = {}
+    with StandInServer(latency=latency) as standin, \
+            ReplaySession(args.mode, args.cassette, standin=standin, latency=latency) as replay:
+        from core import planner
+
+        trip = SAMPLE_TRIP
+        tracemalloc.start()
+        reports = {}
+        reports["destination"] = measure("section.research_destination", lambda: planner.research_destination(
+            trip["destination"], trip["interests"]), args.iterations, results)
+        reports["events"] = measure("section.research_events", lambda: planner.research_events(
+            trip["destination"], trip["dates"], trip["interests"]), args.iterations, results)
+        reports["weather"] = measure("section.research_weather", lambda: planner.research_weather(
+            trip["destination"], trip["dates"]), args.iterations, results)
+        reports["flights"] = measure("section.search_flights", lambda: planner.search_flights(
+            trip["current_location"], trip["destination"], trip["dates"]), args.iterations, results)
+        reports = {key: value if isinstance(value, str) else "" for key, value in reports.items()}
+
+        final_report = measure("write_travel_report", lambda: planner.write_travel_report(
+            reports["destination"], reports["events"], reports["weather"], reports["flights"]),
+            args.iterations, results)
+        final_report = final_report if isinstance(final_report, str) else ""
+
+        measure("pipeline.plan", lambda: planner.TravelPlanner.plan(
+            trip["current_location"], trip["destination"], trip["dates"], trip["interests"]),
+            args.iterations, results)
+
+        itinerary = SAMPLE_ITINERARY
+        measure("pipeline.plan_trip", lambda: planner.TravelPlanner.plan_trip(
+            itinerary["current_location"], itinerary["stops"], itinerary["interests"]),
+            args.iterations, results)
+
+        if not args.skip_pdf:
+            measure("generate_pdf", lambda: planner.generate_pdf(final_report), args.iterations, results)
+
+        if not args.skip_ui:
+            app = import_streamlit_app()
+            measure("display_image_or_markdown", lambda: app.display_image_or_markdown(final_report),
+                    args.iterations, results)
+        tracemalloc.stop()
+        print(f"replay stats: {replay.stats}  stand-in requests: {standin.requests}")
+    return results
+
+
+def compare(results, baseline, tolerance, min_delta=0.0):
+    """
+    Return the benchmarks whose median regressed by more than `tolerance` versus the baseline
+    and by more than `min_delta` seconds, so millisecond-scale stages do not fail on noise.
+    """
+    regressions = []
+    for name, current in results.items():
+        previous = baseline.get(name)
+        if not previous:
+            continue
+        limit = max(previous["median"] * (1 + tolerance), previous["median"] + min_delta)
+        if current["median"] > limit:
+            regressions.append((name, previous["median"], current["median"]))
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the planning pipeline offline.")
+    parser.add_argument("--mode", choices=["replay", "record"], default="replay")
+    parser.add_argument("--cassette", default=DEFAULT_CASSETTE)
+    parser.add_argument("--latency", default="", help='Injected latency per provider, e.g. "groq=1.0,pexels=0.2"')
+    parser.add_argument("--iterations", type=int, default=3)
+    parser.add_argument("--streaming", action="store_true", help="Benchmark with STREAM_SECTIONS=1")
+    parser.add_argument("--skip-ui", action="store_true", help="Skip the Streamlit rendering benchmark")
+    parser.add_argument("--skip-pdf", action="store_true", help="Skip the PDF benchmark (needs Pango for weasyprint)")
+    parser.add_argument("--baseline", default=DEFAULT_BASELINE)
+    parser.add_argument("--tolerance", type=float, default=0.25, help="Allowed median slowdown (0.25 = 25%%)")
+    parser.add_argument("--min-delta", type=float, default=0.02,
+                        help="Slowdowns below this many seconds are never regressions")
+    parser.add_argument("--update-baseline", action="store_true")
+    parser.add_argument("--output", help="Write the results as JSON to this file")
+    args = parser.parse_args(argv)
+
+    prepare_environment(args)
+    results = run_suite(args)
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+
+    if args.update_baseline:
+        with open(args.baseline, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2, sort_keys=True)
+        print(f"Baseline written to {args.baseline}")
+        return 0
+
+    if not os.path.exists(args.baseline):
+        print("No baseline found; run with --update-baseline to create one.")
+        return 0
+
+    with open(args.baseline, encoding="utf-8") as f:
+        baseline = json.load(f)
+    regressions = compare(results, baseline, args.tolerance, args.min_delta)
+    for name, before, after in regressions:
+        print(f"REGRESSION {name}: {before:.3f}s -> {after:.3f}s")
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,181 @@
+# benchmarks/standins.py
+"""
+Local stand-in server for the external providers (Serper, Amadeus, WeatherAPI,
+Wikipedia, Pexels and image CDNs) with configurable per-provider latency.
+
+The replay transport rewrites provider URLs to this server when a request is not
+found in the cassette, so benchmarks never need network access.
+"""
+import json
+import time
+import threading
+from io import BytesIO
+from urllib.parse import urlparse, parse_qs
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+
+PROVIDERS = ("serper", "amadeus", "weather", "wikipedia", "pexels", "images")
+
+
+def _png_bytes(width=1200, height=800, color=(30, 90, 160)):
+    """
+    A real (large-ish) PNG so image decoding, thumbnailing and PDF embedding do real work.
+    """
+    from PIL import Image
+
+    buffer = BytesIO()
+    Image.new("RGB", (width, height), color).save(buffer, format="PNG")
+    return buffer.getvalue()
+
+
+def _serper_payload(query):
+    return {
+        "organic": [
+            {"title": f"{query} guide {i}", "link": f"https://example.com/{i}",
+             "snippet": f"Things to do in {query}: landmark {i}, museum {i} and food market {i}."}
+            for i in range(1, 9)
+        ]
+    }
+
+
+def _weather_payload(location, days):
+    return {
+        "location": {"name": location, "country": "Stand-in"},
+        "current": {"temp_c": 21.0, "condition": {"text": "Sunny"}, "humidity": 40, "wind_kph": 12.0},
+        "forecast": {"forecastday": [
+            {"date": f"2030-01-{d + 1:02d}",
+             "day": {"maxtemp_c": 24.0 + d, "mintemp_c": 14.0 + d, "avgtemp_c": 19.0 + d,
+                     "daily_chance_of_rain": 10 * d, "totalprecip_mm": 0.5 * d,
+                     "maxwind_kph": 20.0, "avghumidity": 50, "uv": 5,
+                     "condition": {"text": "Partly cloudy"}}}
+            for d in range(days)
+        ]},
+        "alerts": {"alert": []},
+    }
+
+
+def _amadeus_offers(origin, destination, date):
+    offers = []
+    for i in range(5):
+        offers.append({
+            "id": str(i + 1),
+            "itineraries": [{
+                "duration": f"PT{4 + i}H{15 * i % 60:02d}M",
+                "segments": [{
+                    "departure": {"iataCode": origin, "at": f"{date}T0{6 + i}:00:00"},
+                    "arrival": {"iataCode": destination, "at": f"{date}T{10 + 2 * i}:15:00"},
+                    "carrierCode": ["MS", "TK", "AF", "EK", "QR"][i],
+                    "number": str(100 + i),
+                }],
+            }],
+            "price": {"currency": "USD", "total": f"{250 + 35 * i}.00", "grandTotal": f"{250 + 35 * i}.00"},
+        })
+    return {"data": offers, "dictionaries": {"carriers": {
+        "MS": "EGYPTAIR", "TK": "TURKISH AIRLINES", "AF": "AIR FRANCE", "EK": "EMIRATES", "QR": "QATAR AIRWAYS"}}}
+
+
+def _wikipedia_payload(params):
+    if params.get("list") == ["search"]:
+        query = params.get("srsearch", ["city"])[0]
+        return {"query": {"search": [
+            {"title": f"{query} {i}", "snippet": f"{query} is known for landmark {i}.", "pageid": i}
+            for i in range(1, 6)
+        ]}}
+    page_id = params.get("pageids", ["1"])[0]
+    return {"query": {"pages": {page_id: {"title": "Stand-in", "fullurl": "https://en.wikipedia.org/wiki/Stand-in",
+                                          "extract": "Stand-in article text. " * 200}}}}
+
+
+def _pexels_payload(base_url, query, per_page):
+    photos = []
+    for i in range(per_page):
+        src = {size: f"{base_url}/images/{query.replace(' ', '_')}_{i}_{size}.png"
+               for size in ("original", "large2x", "large", "medium", "small")}
+        photos.append({"id": i, "alt": f"{query} {i}", "src": src})
+    return {"photos": photos}
+
+
+class StandInServer:
+    """
+    Threaded HTTP server that answers as any supported provider.
+    Paths are "/<provider>/<original path>"; `latency` maps provider -> seconds.
+    """
+
+    def __init__(self, latency=None, host="127.0.0.1", port=0):
+        self.latency = dict(latency or {})
+        self.requests = {provider: 0 for provider in PROVIDERS}
+        self._image = None
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def _reply(self, body, content_type="application/json"):
+                if not isinstance(body, bytes):
+                    body = json.dumps(body).encode("utf-8")
+                self.send_response(200)
+                self.send_header("Content-Type", content_type)
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                if self.command != "HEAD":
+                    self.wfile.write(body)
+
+            def _handle(self):
+                parsed = urlparse(self.path)
+                provider, _, rest = parsed.path.lstrip("/").partition("/")
+                params = parse_qs(parsed.query)
+                server.requests[provider] = server.requests.get(provider, 0) + 1
+                time.sleep(server.latency.get(provider, 0.0))
+                if provider == "serper":
+                    length = int(self.headers.get("Content-Length") or 0)
+                    body = json.loads(self.rfile.read(length) or b"{}") if length else {}
+                    self._reply(_serper_payload(body.get("q", "city")))
+                elif provider == "weather":
+                    days = int(params.get("days", params.get("forecast_days", ["3"]))[0])
+                    self._reply(_weather_payload(params.get("q", ["City"])[0], days))
+                elif provider == "amadeus":
+                    if rest.endswith("oauth2/token"):
+                        self._reply({"access_token": "stand-in-token", "expires_in": 1799})
+                    elif "locations" in rest:
+                        keyword = params.get("keyword", ["XXX"])[0]
+                        self._reply({"data": [{"iataCode": keyword[:3].upper(), "subType": "CITY"}]})
+                    else:
+                        self._reply(_amadeus_offers(params.get("originLocationCode", ["CAI"])[0],
+                                                    params.get("destinationLocationCode", ["CDG"])[0],
+                                                    params.get("departureDate", ["2030-01-01"])[0]))
+                elif provider == "wikipedia":
+                    self._reply(_wikipedia_payload(params))
+                elif provider == "pexels":
+                    self._reply(_pexels_payload(server.base_url, params.get("query", ["city"])[0],
+                                                int(params.get("per_page", ["6"])[0])))
+                elif provider == "images":
+                    self._reply(server.image_bytes(), content_type="image/png")
+                else:
+                    self.send_error(404)
+
+            do_GET = _handle
+            do_POST = _handle
+            do_HEAD = _handle
+
+            def log_message(self, format, *args):
+                pass
+
+        self._httpd = ThreadingHTTPServer((host, port), Handler)
+        self.base_url = f"http://{host}:{self._httpd.server_address[1]}"
+        self._thread = threading.Thread(target=self._httpd.serve_forever, daemon=True)
+
+    def image_bytes(self):
+        if self._image is None:
+            self._image = _png_bytes()
+        return self._image
+
+    def start(self):
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._httpd.shutdown()
+        self._httpd.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
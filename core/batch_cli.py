@@ -0,0 +1,119 @@
+# core/batch_cli.py
+"""
+Batch planner: runs the planning core over a file of trips and writes Markdown/PDF outputs.
+
+    python -m core.batch_cli trips.csv --output-dir plans --workers 4 --executor process
+
+The input is a CSV (header: origin,destination,dates,interests) or JSONL file with the same
+fields. Dates are separated by semicolons or spaces, e.g. "2025-07-01;2025-07-05".
+JSONL rows with a "stops" list ([{"destination", "dates"}, ...]) are planned as multi-city trips.
+With --executor process, the provider rate limits are split evenly between the worker processes.
+"""
+import sys
+import os
+import re
+import csv
+import json
+import time
+import argparse
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor, as_completed
+from utils.bootstrap import init_environment
+
+# Load .env before the modules below read their settings
+init_environment()
+
+from logger.logger_config import logging
+from utils.scheduler import PROCESSES_ENV, scheduling
+from core.planner import TravelPlanner, generate_pdf
+from core.http_api import validate_plan_request, validate_trip_request
+
+
+def read_jobs(path):
+    """
+    Read trip rows from a CSV or JSONL file.
+    """
+    with open(path, encoding="utf-8") as f:
+        if path.lower().endswith((".jsonl", ".ndjson")):
+            return [json.loads(line) for line in f if line.strip()]
+        return [dict(row) for row in csv.DictReader(f)]
+
+
+def output_stem(index, destination):
+    slug = re.sub(r"[^\w]+", "_", destination.lower(), flags=re.UNICODE).strip("_") or "trip"
+    return f"{index:04d}_{slug}"
+
+
+def run_job(index, row, output_dir, write_pdf=True):
+    """
+    Plan one trip and write its outputs. Returns a manifest entry.
+    Module-level so it can run in a worker process.
+    """
+    start = time.perf_counter()
+    entry = {"index": index, "input": row}
+    try:
+        # Batch jobs give way to interactive plans at every rate-limited provider
+        with scheduling(priority="batch"):
+            if row.get("stops"):
+                plan = TravelPlanner.plan_trip(*validate_trip_request(row))
+            else:
+                plan = TravelPlanner.plan(*validate_plan_request(row))
+        stem = os.path.join(output_dir, output_stem(index, plan["request"]["destination"]))
+
+        with open(f"{stem}.md", "w", encoding="utf-8") as f:
+            f.write(plan["final_report"] or "")
+        entry["markdown"] = f"{stem}.md"
+
+        if write_pdf and plan["final_report"]:
+            with open(f"{stem}.pdf", "wb") as f:
+                f.write(generate_pdf(plan["final_report"]))
+            entry["pdf"] = f"{stem}.pdf"
+
+        entry["status"] = "ok"
+        entry["errors"] = plan["errors"]
+    except Exception as e:
+        logging.error(f"Batch job {index} failed: {e}")
+        entry["status"] = "error"
+        entry["error"] = str(e)
+    entry["seconds"] = round(time.perf_counter() - start, 3)
+    return entry
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Plan a batch of trips without the Streamlit UI.")
+    parser.add_argument("input", help="CSV or JSONL file with origin, destination, dates, interests")
+    parser.add_argument("--output-dir", default="plans")
+    parser.add_argument("--workers", type=int, default=2)
+    parser.add_argument("--executor", choices=["thread", "process"], default="thread")
+    parser.add_argument("--no-pdf", action="store_true", help="Only write Markdown outputs")
+    args = parser.parse_args(argv)
+
+    os.makedirs(args.output_dir, exist_ok=True)
+    jobs = read_jobs(args.input)
+    executor_class = ProcessPoolExecutor if args.executor == "process" else ThreadPoolExecutor
+    if args.executor == "process":
+        # Every worker process has its own rate-limit buckets: give each its share of the quotas
+        os.environ[PROCESSES_ENV] = str(max(1, args.workers))
+
+    start = time.perf_counter()
+    manifest = []
+    with executor_class(max_workers=max(1, args.workers)) as executor:
+        futures = [
+            executor.submit(run_job, index, row, args.output_dir, not args.no_pdf)
+            for index, row in enumerate(jobs, start=1)
+        ]
+        for future in as_completed(futures):
+            entry = future.result()
+            manifest.append(entry)
+            print(f"[{entry['status']}] #{entry['index']} in {entry['seconds']}s")
+
+    manifest.sort(key=lambda entry: entry["index"])
+    with open(os.path.join(args.output_dir, "manifest.json"), "w", encoding="utf-8") as f:
+        json.dump(manifest, f, ensure_ascii=False, indent=2)
+
+    failed = sum(1 for entry in manifest if entry["status"] != "ok")
+    print(f"Planned {len(manifest) - failed}/{len(manifest)} trips in {time.perf_counter() - start:.1f}s")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,177 @@
+# core/http_api.py
+"""
+Local HTTP API for the planning core.
+
+    python -m core.http_api --host 127.0.0.1 --port 8600
+
+Endpoints:
+    GET  /health  -> {"status": "ok"}
+    GET  /stats   -> result cache hit/miss statistics
+    GET  /circuits -> circuit breaker state per external provider
+    GET  /queues  -> rate-limit queue depth, wait time and remaining budget per provider
+    GET  /metrics -> per-stage latency (p50/p95/p99) and token counts, Prometheus text format
+    GET  /metrics.json -> the same metrics as JSON
+    GET  /plan/<plan_id> -> a previously generated plan from the plan store
+    POST /plan    -> {"current_location", "destination", "dates", "interests"} -> plan JSON
+    POST /trip    -> {"current_location", "stops": [{"destination", "dates"}, ...], "interests"} -> plan JSON
+    POST /pdf     -> {"markdown"} -> application/pdf
+"""
+import os
+import json
+import uuid
+import argparse
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from utils.bootstrap import init_environment
+
+# Load .env before the modules below read their settings
+init_environment()
+
+from Agents.agent_registry import AgentRegistry
+from logger.logger_config import logging, log_context
+from utils.result_cache import result_cache
+from utils.metrics import MetricsRegistry
+from utils.http_client import http_client
+from utils.scheduler import scheduler, scheduling, PRIORITIES
+from core.planner import TravelPlanner, generate_pdf
+
+MAX_BODY_BYTES = 1024 * 1024
+
+
+def parse_dates(value):
+    """
+    Accept a list of dates or a string separated by commas, semicolons or spaces.
+    """
+    if isinstance(value, str):
+        value = value.replace(",", " ").replace(";", " ").split()
+    return [str(d).strip() for d in value or [] if str(d).strip()]
+
+
+def validate_plan_request(payload):
+    """
+    Return the planner arguments from a request payload, or raise ValueError.
+    """
+    if not isinstance(payload, dict):
+        raise ValueError("Request body must be a JSON object")
+    current_location = str(payload.get("current_location") or payload.get("origin") or "").strip()
+    destination = str(payload.get("destination") or "").strip()
+    dates = parse_dates(payload.get("dates"))
+    interests = str(payload.get("interests") or "").strip()
+    missing = [name for name, value in (("current_location", current_location), ("destination", destination), ("dates", dates)) if not value]
+    if missing:
+        raise ValueError("Missing required fields: " + ", ".join(missing))
+    return current_location, destination, dates, interests
+
+
+def validate_trip_request(payload):
+    """
+    Return the multi-city planner arguments from a request payload, or raise ValueError.
+    """
+    if not isinstance(payload, dict):
+        raise ValueError("Request body must be a JSON object")
+    current_location = str(payload.get("current_location") or payload.get("origin") or "").strip()
+    stops = payload.get("stops")
+    if not current_location:
+        raise ValueError("Missing required fields: current_location")
+    if not isinstance(stops, list) or not stops or not all(isinstance(stop, dict) for stop in stops):
+        raise ValueError("Field 'stops' must be a non-empty list of {destination, dates} objects")
+    stops = [{"destination": str(stop.get("destination") or "").strip(), "dates": parse_dates(stop.get("dates"))}
+             for stop in stops]
+    interests = str(payload.get("interests") or "").strip()
+    return current_location, stops, interests
+
+
+class PlanningRequestHandler(BaseHTTPRequestHandler):
+    server_version = "ArabicTravelGuide/1.0"
+
+    def _send(self, status, body, content_type="application/json; charset=utf-8"):
+        if not isinstance(body, bytes):
+            body = json.dumps(body, ensure_ascii=False).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _read_json(self):
+        length = int(self.headers.get("Content-Length") or 0)
+        if length > MAX_BODY_BYTES:
+            raise ValueError("Request body too large")
+        raw = self.rfile.read(length) if length else b"{}"
+        return json.loads(raw.decode("utf-8"))
+
+    def do_GET(self):
+        if self.path == "/health":
+            self._send(200, {"status": "ok"})
+        elif self.path == "/stats":
+            self._send(200, result_cache.stats())
+        elif self.path == "/circuits":
+            self._send(200, http_client.stats())
+        elif self.path == "/queues":
+            self._send(200, scheduler.stats())
+        elif self.path == "/metrics":
+            self._send(200, MetricsRegistry.export_prometheus().encode("utf-8"),
+                       content_type="text/plain; version=0.0.4; charset=utf-8")
+        elif self.path == "/metrics.json":
+            self._send(200, MetricsRegistry.snapshot())
+        elif self.path.startswith("/plan/"):
+            plan = TravelPlanner.load(self.path[len("/plan/"):])
+            if plan is None:
+                self._send(404, {"error": "Plan not found"})
+            else:
+                self._send(200, plan)
+        else:
+            self._send(404, {"error": "Not found"})
+
+    def do_POST(self):
+        # Callers running bulk jobs can send "X-Priority: batch" to queue behind interactive plans
+        priority = self.headers.get("X-Priority")
+        with log_context(request_id=self.headers.get("X-Request-ID") or uuid.uuid4().hex[:12]), \
+                scheduling(priority=priority if priority in PRIORITIES else None):
+            self._handle_post()
+
+    def _handle_post(self):
+        try:
+            payload = self._read_json()
+            if self.path == "/plan":
+                plan = TravelPlanner.plan(*validate_plan_request(payload))
+                self._send(200, plan)
+            elif self.path == "/trip":
+                plan = TravelPlanner.plan_trip(*validate_trip_request(payload))
+                self._send(200, plan)
+            elif self.path == "/pdf":
+                markdown_text = payload.get("markdown") if isinstance(payload, dict) else None
+                if not markdown_text:
+                    raise ValueError("Missing required field: markdown")
+                self._send(200, generate_pdf(markdown_text), content_type="application/pdf")
+            else:
+                self._send(404, {"error": "Not found"})
+        except (ValueError, json.JSONDecodeError) as e:
+            self._send(400, {"error": str(e)})
+        except Exception as e:
+            logging.error(f"Planning API request to {self.path} failed: {e}")
+            self._send(500, {"error": str(e)})
+
+    def log_message(self, format, *args):
+        logging.info("Planning API: " + format % args)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Serve the travel planning core over HTTP.")
+    parser.add_argument("--host", default=os.getenv("PLANNER_API_HOST", "127.0.0.1"))
+    parser.add_argument("--port", type=int, default=int(os.getenv("PLANNER_API_PORT", "8600")))
+    args = parser.parse_args(argv)
+
+    AgentRegistry.warm_up()
+    server = ThreadingHTTPServer((args.host, args.port), PlanningRequestHandler)
+    logging.info(f"Planning API listening on http://{args.host}:{args.port}")
+    print(f"Planning API listening on http://{args.host}:{args.port}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()
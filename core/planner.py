@@ -0,0 +1,625 @@
+# core/planner.py
+import sys
+import os
+import json
+import time
+import uuid
+import contextvars
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from Agents.agent_registry import AgentRegistry
+from logger.logger_config import logging, log_context
+from exception.custom_exception import CustomException
+from utils.result_cache import result_cache
+from utils.pdf_utils import PDFRenderer
+from utils.plan_store import plan_store
+from utils.report_assembler import ReportAssembler, REPORT_SECTIONS
+from utils.streaming import StreamSink, stream_to, STREAMING_ENABLED
+from utils.metrics import span, traced
+from utils.model_registry import model_task
+from utils.tool_reducer import relevance_context
+from utils.scheduler import scheduler, scheduling, current_owner
+from tools.search_flights import AmadeusFlightSearch, render_flights_markdown
+from tools.get_weather_data import WeatherForecast, render_weather_markdown
+from utils.gazetteer import Gazetteer
+
+# Maximum number of research sections that run at the same time (1 = sequential)
+SECTION_CONCURRENCY = max(1, int(os.getenv("SECTION_CONCURRENCY", "4")))
+# Same limit for multi-city trips, whose stops all run their sections at once
+TRIP_SECTION_CONCURRENCY = max(1, int(os.getenv("TRIP_SECTION_CONCURRENCY", "8")))
+# Maximum number of stops in one multi-city trip
+MAX_TRIP_LEGS = int(os.getenv("MAX_TRIP_LEGS", "6"))
+
+# "template" stitches the sections together without an LLM rewrite; "llm" regenerates the whole plan
+REPORT_ASSEMBLY_MODE = os.getenv("REPORT_ASSEMBLY_MODE", "template")
+# In template mode, ask the reporter agent for a short introduction only
+REPORT_SUMMARY_LLM = os.getenv("REPORT_SUMMARY_LLM", "1") == "1"
+SUMMARY_EXCERPT_CHARS = 1500
+
+# "structured" renders the weather tab from the forecast API; "agent" asks the travel agent
+WEATHER_MODE = os.getenv("WEATHER_MODE", "structured")
+
+# "structured" searches Amadeus directly and renders the flights tab from the ranked offers;
+# "agent" lets the travel agent call the flight tool and write the section
+FLIGHT_SEARCH_MODE = os.getenv("FLIGHT_SEARCH_MODE", "structured")
+# In structured mode, ask the travel agent for a one-sentence Arabic introduction
+FLIGHT_SUMMARY_LLM = os.getenv("FLIGHT_SUMMARY_LLM", "0") == "1"
+
+
+def run_task(stage, **task_args):
+    """
+    Run Task.create inside a timing span named after the pipeline stage.
+    The stage also selects the model route (see utils/model_registry.py).
+    """
+    from taskflowai import Task  # type: ignore
+
+    with span(f"task.{stage}"), model_task(stage):
+        return Task.create(**task_args)
+
+
+def image_query_instruction(destination):
+    """
+    Tell the agent which English name to use in image queries; only places missing
+    from the gazetteer still need the LLM to translate the name.
+    """
+    places = Gazetteer.candidates(destination)
+    if len(places) == 1:
+        return f"- Use the English name \"{places[0].name}\" in every query to the image tool\n"
+    if places:
+        options = " or ".join(f"\"{place.name}\"" for place in places)
+        return f"- \"{destination}\" may mean {options}; use the English name of the place the user means in every query to the image tool\n"
+    return "- Make sure that the query to the image tool is in english even if the user type it in arabic\n"
+
+
+@result_cache.cached("destination")
+def research_destination(destination, interests):
+    """Research destination with enhanced image handling"""
+    instruction = (
+        f"Research and generate a comprehensive travel report about {destination}.\n"
+        f"- Use Wikipedia tools to find 4-5 high-quality images of major landmarks\n"
+        + image_query_instruction(destination) +
+        f"- Ensure image links start with http:// or https://\n"
+        f"- Format images as: ![Description](https://full-image-url)\n"
+        f"- Add a short caption below each image\n"
+        f"- Research attractions and activities related to: {interests}\n"
+        f"- Organize the report with clear sections and headings\n"
+        f"- Place images naturally in the content where relevant\n"
+        f"- Include practical visitor information\n"
+        f"- Format the entire response in clean Markdown\n"
+        f"- **Important**: Write the final response entirely in Arabic."
+    )
+    try:
+        # Tool output is ranked by relevance to the destination and interests before the LLM sees it
+        with relevance_context(Gazetteer.canonical_name(destination), interests):
+            task = run_task(
+                "destination",
+                agent=AgentRegistry.get("web_research_agent"),
+                context=f"User Destination: {destination}\nUser Interests: {interests}",
+                instruction=instruction
+            )
+        logging.info("Successfully created destination research task.")
+        return task
+    except Exception as e:
+        logging.info(f"Failed to create destination research task: {str(e)}")
+        raise CustomException(f"Error creating destination research task: {str(e)}", sys)
+
+@result_cache.cached("events")
+def research_events(destination, dates, interests):
+    """Research events with enhanced image handling"""
+    instruction = (
+        f"Search for events happening in {destination} during {dates} that match the following interests: {interests}.\n\n"
+        f"For each event, include:\n"
+        f"- Event name\n"
+        f"- Date and time\n"
+        f"- Venue/location\n"
+        f"- Ticket information (if available)\n"
+        f"- A short description of the event\n"
+        + image_query_instruction(destination) +
+        "- Ensure image links start with http:// or https://\n"
+        "- Format event images as: ![Event Name](https://full-image-url)\n"
+        "- Format images as: ![Description](https://full-image-url)\n"
+        "- Ensure the information is accurate and up-to-date\n"
+        "- Place images naturally throughout the content where relevant\n"
+        "- Format the entire response in clean Markdown\n"
+        "- **Important**: Write the entire response in Arabic."
+    )
+    try:
+        with relevance_context(Gazetteer.canonical_name(destination), interests):
+            task = run_task(
+                "events",
+                agent=AgentRegistry.get("web_research_agent"),
+                context=f"Destination: {destination}\nDates: {dates}\nInterests: {interests}",
+                instruction=instruction
+            )
+        logging.info("Successfully created events research task.")
+        return task
+    except Exception as e:
+        logging.info(f"Failed to create events research task: {str(e)}")
+        raise CustomException(f"Error creating events research task: {str(e)}", sys)
+
+def research_weather_structured(destination, dates):
+    """Render the weather section from the forecast without an LLM turn"""
+    days, location_name, missing = WeatherForecast.forecast(destination, dates)
+    if not days:
+        raise ValueError(f"No forecast available for {destination} on {dates}")
+    return render_weather_markdown(location_name, days, missing)
+
+@result_cache.cached("weather")
+def research_weather(destination, dates):
+    """Research weather information"""
+    if WEATHER_MODE == "structured" and WeatherForecast.available():
+        try:
+            return research_weather_structured(destination, dates)
+        except Exception as e:
+            logging.info(f"Falling back to the travel agent for weather: {str(e)}")
+    try:
+        task = run_task(
+            "weather",
+            agent=AgentRegistry.get("travel_agent"),
+            context=f"Destination: {destination}\nDates: {dates}",
+            instruction=(
+                "Provide detailed weather information for the given destination and dates, including:\n"
+                "1. Temperature ranges\n"
+                "2. Precipitation chances\n"
+                "3. General weather patterns\n"
+                "4. Recommended clothing and gear\n"
+                "\nRespond entirely in Arabic."
+            )
+        )
+        logging.info("Successfully created weather research task.")
+        logging.info(f"Weather task details: {task}")
+        return task
+    except Exception as e:
+        logging.info(f"Failed to create weather research task: {str(e)}")
+        raise CustomException(f"Error creating weather research task: {str(e)}", sys)
+
+def write_flight_intro(result):
+    """Write a one-sentence Arabic introduction for the structured flight options"""
+    try:
+        task = run_task(
+            "flights_intro",
+            agent=AgentRegistry.get("travel_agent"),
+            context=json.dumps(result, ensure_ascii=False),
+            instruction=(
+                "Write one short sentence that introduces these flight options to the traveler.\n"
+                "Do not list the flights and do not use headings.\n"
+                "Respond entirely in Arabic."
+            ),
+            max_tokens=120
+        )
+        if isinstance(task, Exception):
+            raise task
+        return task
+    except Exception as e:
+        logging.info(f"Failed to create flight introduction: {str(e)}")
+        return None
+
+def search_flights_structured(current_location, destination, dates):
+    """Search flights directly and render the ranked options without the tool loop"""
+    result = AmadeusFlightSearch.search(current_location, destination, dates)
+    intro = write_flight_intro(result) if FLIGHT_SUMMARY_LLM and result["offers"] else None
+    return render_flights_markdown(result, intro=intro)
+
+@result_cache.cached("flights")
+def search_flights(current_location, destination, dates):
+    """Search flight options"""
+    if FLIGHT_SEARCH_MODE == "structured" and AmadeusFlightSearch.available():
+        try:
+            return search_flights_structured(current_location, destination, dates)
+        except Exception as e:
+            logging.info(f"Falling back to the travel agent for flights: {str(e)}")
+    return search_flights_agent(current_location, destination, dates)
+
+def search_flights_agent(current_location, destination, dates):
+    """Let the travel agent search and describe the flight options"""
+    try:
+        task = run_task(
+            "flights",
+            agent=AgentRegistry.get("travel_agent"),
+            context=f"Flights from {current_location} to {destination} on {dates}",
+            instruction=(
+                "Find the top 3 affordable and convenient flight options.\n"
+                "Provide concise bullet-point information for each.\n"
+                "Include airline, departure and arrival times, duration, and price if available.\n"
+                "Respond entirely in Arabic."
+            )
+        )
+        logging.info("Successfully created flight search task.")
+        return task
+    except Exception as e:
+        logging.info(f"Failed to create flight search task: {str(e)}")
+        raise CustomException(f"Error creating flight search task: {str(e)}", sys)
+
+def search_trip_flights(legs):
+    """
+    Search the flights of every leg of a multi-city trip in one batch and render
+    them as a single section. Legs the structured search cannot answer are handed
+    to the travel agent, concurrently.
+    """
+    routes = [(leg["origin"], leg["destination"], leg["dates"][:1]) for leg in legs]
+    results = [None] * len(routes)
+    if FLIGHT_SEARCH_MODE == "structured" and AmadeusFlightSearch.available():
+        try:
+            results = AmadeusFlightSearch.search_many(routes)
+        except Exception as e:
+            logging.info(f"Falling back to the travel agent for trip flights: {str(e)}")
+
+    def render(index):
+        result = results[index]
+        if isinstance(result, dict):
+            return render_flights_markdown(result)
+        report = search_flights_agent(*routes[index])
+        return report if isinstance(report, str) else str(report)
+
+    with ThreadPoolExecutor(max_workers=min(SECTION_CONCURRENCY, len(routes)), thread_name_prefix="flights") as executor:
+        futures = [executor.submit(contextvars.copy_context().run, render, index) for index in range(len(routes))]
+        sections = []
+        for number, (leg, future) in enumerate(zip(legs, futures), start=1):
+            try:
+                content = future.result()
+            except Exception as e:
+                logging.info(f"Flight search for leg {number} failed: {str(e)}")
+                content = "تعذر العثور على رحلات لهذا الجزء من الرحلة."
+            sections.append(f"### {number}. {leg['origin']} ← {leg['destination']}\n\n{content}")
+    return "\n\n".join(sections)
+
+def write_travel_summary(destination_report, events_report, weather_report, flight_report):
+    """Write only a short Arabic introduction for the assembled plan"""
+    excerpt = SUMMARY_EXCERPT_CHARS
+    try:
+        task = run_task(
+            "summary",
+            agent=AgentRegistry.get("reporter_agent"),
+            context=f"Destination Report: {destination_report[:excerpt]}\n\n"
+                    f"Events Report: {events_report[:excerpt]}\n\n"
+                    f"Weather Report: {weather_report[:excerpt]}\n\n"
+                    f"Flight Report: {flight_report[:excerpt]}",
+            instruction=(
+                "Write a short introduction (3-4 sentences) that summarizes this trip plan.\n"
+                "Do not repeat the detailed content, do not use headings and do not include images.\n"
+                "Respond entirely in Arabic."
+            ),
+            max_tokens=300
+        )
+        if isinstance(task, Exception):
+            raise task
+        logging.info("Successfully created travel summary.")
+        return task
+    except Exception as e:
+        logging.info(f"Failed to create travel summary: {str(e)}")
+        return None
+
+@result_cache.cached("report")
+def write_travel_report(destination_report, events_report, weather_report, flight_report):
+    """Create final travel report"""
+    if REPORT_ASSEMBLY_MODE == "template":
+        summary = None
+        if REPORT_SUMMARY_LLM:
+            summary = write_travel_summary(destination_report, events_report, weather_report, flight_report)
+        logging.info("Assembling travel report from section templates.")
+        return ReportAssembler.assemble(
+            {
+                "destination": destination_report,
+                "events": events_report,
+                "weather": weather_report,
+                "flights": flight_report,
+            },
+            summary=summary
+        )
+
+    try:
+        task = run_task(
+            "report",
+            agent=AgentRegistry.get("reporter_agent"),
+            context=f"Flight Report: {flight_report}\n\n"
+                    f"Weather Report: {weather_report}\n\n"
+                    f"Destination Report: {destination_report}\n\n"
+                    f"Events Report: {events_report}",
+            instruction=(
+                "Create a comprehensive travel report that includes the following:\n"
+                "1. Retain all images from the destination and events reports.\n"
+                "2. Organize the information clearly and logically.\n"
+                "3. Maintain all markdown formatting.\n"
+                "4. Ensure images are displayed correctly with captions.\n"
+                "5. Include all essential details from each section.\n\n"
+                "Respond entirely in Arabic."
+            )
+        )
+        logging.info("Successfully created travel report.")
+        return task
+    except Exception as e:
+        logging.info(f"Failed to create travel report: {str(e)}")
+        raise CustomException(f"Error creating travel report: {str(e)}", sys)
+
+def _run_streamed(func, args, sink):
+    with stream_to(sink):
+        return func(*args)
+
+
+def run_sections_concurrently(section_calls, max_workers=SECTION_CONCURRENCY, poll_interval=0.25):
+    """
+    Run independent section tasks in a thread pool.
+    Yields (key, status, payload) tuples so callers can render sections as they progress:
+    - ("partial", text) while a task is still streaming its Markdown (when streaming is enabled)
+    - ("done", report) or ("error", exception) once the task finishes
+    Inside `scheduling(owner=...)`, ("queue", "queued", {"provider", "position"}) is yielded
+    while a call of the owner waits for a rate-limited provider, and a None payload once none does.
+    """
+    sinks = {key: StreamSink() for key in section_calls} if STREAMING_ENABLED else {}
+    seen_versions = {}
+    owner = current_owner()
+    queue_status = None
+    with ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="section") as executor:
+        futures = {}
+        for key, (func, args) in section_calls.items():
+            # Copy the caller's context so worker logs keep the plan ID
+            context = contextvars.copy_context()
+            if key in sinks:
+                futures[executor.submit(context.run, _run_streamed, func, args, sinks[key])] = key
+            else:
+                futures[executor.submit(context.run, func, *args)] = key
+
+        pending = set(futures)
+        while pending:
+            done, pending = wait(pending, timeout=poll_interval, return_when=FIRST_COMPLETED)
+
+            status = scheduler.queue_status(owner) if pending else None
+            if status != queue_status:
+                queue_status = status
+                yield "queue", "queued", status
+
+            for future in pending:
+                key = futures[future]
+                if key not in sinks:
+                    continue
+                version, text = sinks[key].snapshot()
+                if text and seen_versions.get(key) != version:
+                    seen_versions[key] = version
+                    yield key, "partial", text
+
+            for future in done:
+                key = futures[future]
+                try:
+                    yield key, "done", future.result()
+                except Exception as e:
+                    logging.info(f"Section task '{key}' failed: {str(e)}")
+                    yield key, "error", e
+
+@traced("render.pdf")
+def generate_pdf(markdown_text, filename="trip_plan.pdf"):
+    """
+    Convert Markdown travel plan to a downloadable RTL PDF.
+    Rendering happens in memory and identical reports are served from cache.
+    """
+    return PDFRenderer.render(markdown_text)
+
+
+def build_section_calls(current_location, destination, dates, interests):
+    """
+    Map each section key to its task function and arguments.
+    """
+    return {
+        "destination": (research_destination, (destination, interests)),
+        "events": (research_events, (destination, dates, interests)),
+        "weather": (research_weather, (destination, dates)),
+        "flights": (search_flights, (current_location, destination, dates)),
+    }
+
+
+
+def normalize_legs(current_location, stops):
+    """
+    Validate an ordered list of stops ({"destination", "dates"}) and chain them into legs:
+    every leg departs from the previous stop, the first one from `current_location`.
+    Raises ValueError for an empty, too long or incomplete itinerary.
+    """
+    if not stops:
+        raise ValueError("A trip needs at least one stop")
+    if len(stops) > MAX_TRIP_LEGS:
+        raise ValueError(f"A trip can have at most {MAX_TRIP_LEGS} stops")
+    legs, origin = [], current_location
+    for number, stop in enumerate(stops, start=1):
+        destination = str(stop.get("destination") or "").strip()
+        dates = [str(d).strip() for d in stop.get("dates") or [] if str(d).strip()]
+        if not destination or not dates:
+            raise ValueError(f"Stop {number} needs a destination and dates")
+        legs.append({"origin": origin, "destination": destination, "dates": dates})
+        origin = destination
+    return legs
+
+
+def leg_section_key(number, key):
+    return f"leg{number}.{key}"
+
+
+def build_trip_section_calls(legs, interests):
+    """
+    Map every stop's research sections ("leg1.destination", ...) plus the batched
+    "flights" section to task calls. Stops with identical inputs (the same place,
+    spelled any way) share one call.
+    Returns (section_calls, aliases) where aliases maps a skipped key to the key it reuses.
+    """
+    section_calls, aliases, owners = {}, {}, {}
+    for number, leg in enumerate(legs, start=1):
+        calls = build_section_calls(leg["origin"], leg["destination"], leg["dates"], interests)
+        for key, _ in REPORT_SECTIONS:
+            if key == "flights":
+                continue
+            func, args = calls[key]
+            section_key = leg_section_key(number, key)
+            identity = func.cache_key(*args)
+            if identity in owners:
+                aliases[section_key] = owners[identity]
+                continue
+            owners[identity] = section_key
+            section_calls[section_key] = (func, args)
+    section_calls["flights"] = (search_trip_flights, (legs,))
+    return section_calls, aliases
+
+
+def write_trip_report(legs, reports):
+    """
+    Assemble the multi-city plan: one chapter per stop and the batched flights section.
+    Always uses the section templates; a single LLM call writes the introduction.
+    """
+    summary = None
+    if REPORT_SUMMARY_LLM:
+        def joined(key):
+            return "\n\n".join(
+                f"{leg['destination']}: {reports.get(leg_section_key(number, key), '')[:SUMMARY_EXCERPT_CHARS // len(legs)]}"
+                for number, leg in enumerate(legs, start=1)
+            )
+        summary = write_travel_summary(joined("destination"), joined("events"), joined("weather"), reports.get("flights", ""))
+    chapters = [
+        (
+            f"📍 {number}. {leg['destination']}",
+            {key: reports.get(leg_section_key(number, key), "") for key, _ in REPORT_SECTIONS if key != "flights"},
+        )
+        for number, leg in enumerate(legs, start=1)
+    ]
+    logging.info(f"Assembling trip report for {len(legs)} stop(s).")
+    return ReportAssembler.assemble_trip(chapters, flights=reports.get("flights"), summary=summary)
+
+class TravelPlanner:
+    """
+    Runs the whole planning pipeline without any UI:
+    the four research sections concurrently, then the final report.
+    """
+
+    @classmethod
+    def plan(cls, current_location, destination, dates, interests, on_event=None, plan_id=None, store=True):
+        """
+        Plan a trip and return a dict with the section reports, errors, the final report and timings.
+        `on_event(key, status, payload)` is called for every partial/done/error event, if given,
+        and with ("queue", "queued", ...) while calls wait for a rate-limited provider.
+        With `store`, the plan is saved in the plan store so it can be reopened by its plan ID.
+        """
+        plan_id = plan_id or uuid.uuid4().hex[:12]
+        with log_context(plan_id=plan_id), scheduling(owner=plan_id):
+            logging.info(f"Planning trip from {current_location} to {destination}.")
+            plan = cls._plan(current_location, destination, dates, interests, on_event)
+            plan["plan_id"] = plan_id
+            if store:
+                try:
+                    plan_store.save(plan)
+                except Exception as e:
+                    logging.warning(f"Failed to store plan {plan_id}: {e}")
+        return plan
+
+    @classmethod
+    def plan_trip(cls, current_location, stops, interests, on_event=None, plan_id=None, store=True):
+        """
+        Plan a multi-city trip through an ordered list of stops ({"destination", "dates"}).
+        The sections of every stop run in parallel, stops with identical inputs share results
+        and the flights of all legs are searched in one batch. Returns the same shape as `plan`,
+        with section keys such as "leg1.destination" and a combined "flights" section.
+        """
+        legs = normalize_legs(current_location, stops)
+        plan_id = plan_id or uuid.uuid4().hex[:12]
+        with log_context(plan_id=plan_id), scheduling(owner=plan_id):
+            logging.info(f"Planning multi-city trip from {current_location} through {len(legs)} stop(s).")
+            plan = cls._plan_trip(current_location, legs, interests, on_event)
+            plan["plan_id"] = plan_id
+            if store:
+                try:
+                    plan_store.save(plan)
+                except Exception as e:
+                    logging.warning(f"Failed to store plan {plan_id}: {e}")
+        return plan
+
+    @classmethod
+    def load(cls, plan_id):
+        """
+        Return a previously stored plan, or None if the ID is unknown or was garbage-collected.
+        """
+        return plan_store.load(plan_id)
+
+    @classmethod
+    def _plan(cls, current_location, destination, dates, interests, on_event):
+        try:
+            start = time.perf_counter()
+            reports, errors = {}, {}
+            section_calls = build_section_calls(current_location, destination, dates, interests)
+            for key, status, payload in run_sections_concurrently(section_calls):
+                if on_event:
+                    on_event(key, status, payload)
+                if status == "done":
+                    reports[key] = payload if isinstance(payload, str) else str(payload)
+                elif status == "error":
+                    reports[key] = ""
+                    errors[key] = str(payload)
+            sections_elapsed = time.perf_counter() - start
+
+            final_report = None
+            final_args = (reports["destination"], reports["events"], reports["weather"], reports["flights"])
+            for key, status, payload in run_sections_concurrently({"final": (write_travel_report, final_args)}):
+                if on_event:
+                    on_event(key, status, payload)
+                if status == "error":
+                    raise payload
+                if status == "done":
+                    final_report = payload if isinstance(payload, str) else str(payload)
+
+            return {
+                "request": {
+                    "current_location": current_location,
+                    "destination": destination,
+                    "dates": list(dates),
+                    "interests": interests,
+                },
+                "sections": reports,
+                "errors": errors,
+                "final_report": final_report,
+                "timings": {
+                    "sections_seconds": round(sections_elapsed, 3),
+                    "total_seconds": round(time.perf_counter() - start, 3),
+                },
+            }
+        except Exception as e:
+            logging.info(f"Failed to plan trip to {destination}: {str(e)}")
+            raise CustomException(e, sys)
+
+    @classmethod
+    def _plan_trip(cls, current_location, legs, interests, on_event):
+        try:
+            start = time.perf_counter()
+            reports, errors = {}, {}
+            section_calls, aliases = build_trip_section_calls(legs, interests)
+            for key, status, payload in run_sections_concurrently(section_calls, max_workers=TRIP_SECTION_CONCURRENCY):
+                shared_keys = [key] + [alias for alias, owner in aliases.items() if owner == key]
+                for section_key in shared_keys:
+                    if on_event:
+                        on_event(section_key, status, payload)
+                    if status == "done":
+                        reports[section_key] = payload if isinstance(payload, str) else str(payload)
+                    elif status == "error":
+                        reports[section_key] = ""
+                        errors[section_key] = str(payload)
+            sections_elapsed = time.perf_counter() - start
+
+            final_report = None
+            for key, status, payload in run_sections_concurrently({"final": (write_trip_report, (legs, reports))}):
+                if on_event:
+                    on_event(key, status, payload)
+                if status == "error":
+                    raise payload
+                if status == "done":
+                    final_report = payload
+
+            return {
+                "request": {
+                    "current_location": current_location,
+                    "destination": " - ".join(leg["destination"] for leg in legs),
+                    "legs": legs,
+                    "interests": interests,
+                },
+                "sections": reports,
+                "errors": errors,
+                "final_report": final_report,
+                "timings": {
+                    "sections_seconds": round(sections_elapsed, 3),
+                    "total_seconds": round(time.perf_counter() - start, 3),
+                },
+            }
+        except Exception as e:
+            logging.info(f"Failed to plan multi-city trip: {str(e)}")
+            raise CustomException(e, sys)
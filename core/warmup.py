@@ -0,0 +1,179 @@
+# core/warmup.py
+"""
+Cache warm-up job: pre-generates destination and events sections for popular destinations
+so interactive requests are served from the result cache.
+
+    python -m core.warmup --config warmup.json
+    python -m core.warmup --destinations "Paris,Istanbul,Dubai" --interests "المتاحف، الطعام"
+
+The JSON config may contain:
+    {
+        "destinations": ["Paris", "Istanbul"],
+        "interests": ["المتاحف، الطعام"],
+        "window_days": 7,          # length of each events date window ([start, end] like the date picker)
+        "windows": 2,              # how many upcoming windows to warm
+        "start_offset_days": 7,    # first window starts this many days from today
+        "requests_per_minute": 20  # LLM task rate limit for the job
+    }
+Run it from cron (or any scheduler) to keep the cache warm; fresh entries are skipped.
+"""
+import sys
+import json
+import time
+import argparse
+import threading
+from datetime import date, timedelta
+from utils.bootstrap import init_environment
+
+# Load .env before the modules below read their settings
+init_environment()
+
+from Agents.agent_registry import AgentRegistry
+from logger.logger_config import logging
+from exception.custom_exception import CustomException
+from utils.result_cache import result_cache
+from utils.scheduler import scheduling
+from core.planner import research_destination, research_events
+
+DEFAULT_CONFIG = {
+    "destinations": [],
+    "interests": [""],
+    "window_days": 7,
+    "windows": 2,
+    "start_offset_days": 7,
+    "requests_per_minute": 20,
+}
+
+
+class RateLimiter:
+    """
+    Spaces out calls so no more than `per_minute` start in any minute.
+    """
+
+    def __init__(self, per_minute):
+        self.interval = 60.0 / per_minute if per_minute else 0.0
+        self._next_slot = 0.0
+        self._lock = threading.Lock()
+
+    def wait(self):
+        with self._lock:
+            now = time.monotonic()
+            delay = max(0.0, self._next_slot - now)
+            self._next_slot = max(now, self._next_slot) + self.interval
+        if delay:
+            time.sleep(delay)
+        return delay
+
+
+def date_windows(window_days, windows, start_offset_days, today=None):
+    """
+    Return `windows` consecutive [start, end] ISO date pairs, each covering `window_days` days.
+    This is the shape the date picker and TravelPlanner pass to research_events, so warmed
+    entries share their result-cache keys.
+    """
+    start = (today or date.today()) + timedelta(days=start_offset_days)
+    result = []
+    for w in range(windows):
+        window_start = start + timedelta(days=w * window_days)
+        window_end = window_start + timedelta(days=max(window_days, 1) - 1)
+        result.append([window_start.isoformat(), window_end.isoformat()])
+    return result
+
+
+def build_jobs(config):
+    """
+    Expand the config into (section, func, args) warm-up jobs.
+    """
+    jobs = []
+    windows = date_windows(config["window_days"], config["windows"], config["start_offset_days"])
+    for destination in config["destinations"]:
+        for interests in config["interests"]:
+            jobs.append(("destination", research_destination, (destination, interests)))
+            for dates in windows:
+                jobs.append(("events", research_events, (destination, dates, interests)))
+    return jobs
+
+
+def run_warmup(config):
+    """
+    Run the warm-up jobs sequentially under the rate limit and return a coverage/timing report.
+    """
+    try:
+        AgentRegistry.warm_up(["web_research_agent"])
+        limiter = RateLimiter(config["requests_per_minute"])
+        jobs = build_jobs(config)
+        report = {"total": len(jobs), "skipped_fresh": 0, "generated": 0, "failed": 0,
+                  "waited_seconds": 0.0, "jobs": []}
+        start = time.perf_counter()
+
+        for section, func, args in jobs:
+            entry = {"section": section, "args": list(args)}
+            job_start = time.perf_counter()
+            try:
+                if result_cache.is_fresh(func.cache_key(*args)):
+                    report["skipped_fresh"] += 1
+                    entry["status"] = "fresh"
+                    report["jobs"].append(entry)
+                    continue
+
+                report["waited_seconds"] += limiter.wait()
+                job_start = time.perf_counter()
+                # Provider calls of the warm-up queue behind interactive plans
+                with scheduling(priority="background"):
+                    result = func(*args)
+            except Exception as e:
+                # One failing job (queue timeout, cache error, ...) must not end the whole run
+                logging.error(f"Warm-up {section} {args} failed: {e}")
+                result = e
+            entry["seconds"] = round(time.perf_counter() - job_start, 3)
+            if isinstance(result, str) and result.strip():
+                report["generated"] += 1
+                entry["status"] = "generated"
+            else:
+                report["failed"] += 1
+                entry["status"] = "failed"
+                entry["error"] = str(result)
+            report["jobs"].append(entry)
+            logging.info(f"Warm-up {section} {args}: {entry['status']} in {entry['seconds']}s")
+
+        report["elapsed_seconds"] = round(time.perf_counter() - start, 3)
+        report["waited_seconds"] = round(report["waited_seconds"], 3)
+        warm = report["skipped_fresh"] + report["generated"]
+        report["coverage"] = round(warm / report["total"], 3) if report["total"] else 1.0
+        return report
+    except Exception as e:
+        logging.error(f"Cache warm-up failed: {e}")
+        raise CustomException(e, sys)
+
+
+def load_config(path=None, destinations=None, interests=None):
+    config = dict(DEFAULT_CONFIG)
+    if path:
+        with open(path, encoding="utf-8") as f:
+            config.update(json.load(f))
+    if destinations:
+        config["destinations"] = [d.strip() for d in destinations.split(",") if d.strip()]
+    if interests is not None:
+        config["interests"] = [interests]
+    return config
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Pre-generate cached sections for popular destinations.")
+    parser.add_argument("--config", help="JSON config file (see module docstring)")
+    parser.add_argument("--destinations", help="Comma-separated destinations (overrides the config)")
+    parser.add_argument("--interests", help="Interests string to warm (overrides the config)")
+    args = parser.parse_args(argv)
+
+    config = load_config(args.config, args.destinations, args.interests)
+    if not config["destinations"]:
+        parser.error("No destinations configured")
+
+    report = run_warmup(config)
+    summary = {k: v for k, v in report.items() if k != "jobs"}
+    print(json.dumps(summary, ensure_ascii=False, indent=2))
+    return 1 if report["failed"] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,16 +1,190 @@
 import logging
+import logging.handlers
 import os
-from datetime import datetime
+import json
+import queue
+import atexit
+import random
+import threading
+import contextvars
+from contextlib import contextmanager
+from datetime import datetime, timezone
 
-LOG_FILE = f"{datetime.now().strftime('%m_%d_%Y_%H_%M_%S')}.log"
-
-log_path = os.path.join(os.path.dirname(__file__), 'log')
-os.makedirs(log_path, exist_ok=True)
+# Log settings, all overridable through the environment:
+#   LOG_DIR               directory of the log file (default: logger/log)
+#   LOG_FILE              log file name (default: app.log)
+#   LOG_LEVEL             root level (default: INFO)
+#   LOG_FORMAT            "json" (default) or "text"
+#   LOG_ROTATION          "size" (default) or "time"
+#   LOG_MAX_BYTES         size-based rotation threshold (default: 10 MB)
+#   LOG_ROTATE_WHEN       time-based rotation interval, TimedRotatingFileHandler syntax (default: midnight)
+#   LOG_BACKUP_COUNT      rotated files to keep (default: 5)
+#   LOG_MODULE_LEVELS     per-module minimum levels, e.g. "tools.search_images=WARNING,utils=DEBUG"
+#   LOG_SAMPLE_RATES      per-module sampling of records below WARNING, e.g. "tools.search_images=0.1"
+log_path = os.getenv("LOG_DIR", os.path.join(os.path.dirname(__file__), 'log'))
 
+LOG_FILE = os.getenv("LOG_FILE", "app.log")
 lOG_FILE_PATH = os.path.join(log_path, LOG_FILE)
 
-logging.basicConfig(
-    filename=lOG_FILE_PATH,
-    format= "[ %(asctime)s ] %(name)s - %(levelname)s - %(message)s",
-    level= logging.INFO
-)
\ No newline at end of file
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+_plan_id = contextvars.ContextVar("plan_id", default=None)
+_request_id = contextvars.ContextVar("request_id", default=None)
+
+
+@contextmanager
+def log_context(plan_id=None, request_id=None):
+    """
+    Attach a plan/request ID to every record logged in this context.
+    """
+    tokens = []
+    if plan_id is not None:
+        tokens.append((_plan_id, _plan_id.set(plan_id)))
+    if request_id is not None:
+        tokens.append((_request_id, _request_id.set(request_id)))
+    try:
+        yield
+    finally:
+        for var, token in reversed(tokens):
+            var.reset(token)
+
+
+def _parse_mapping(value, convert):
+    mapping = {}
+    for item in (value or "").split(","):
+        if "=" in item:
+            key, raw = item.split("=", 1)
+            mapping[key.strip()] = convert(raw.strip())
+    return mapping
+
+
+def _module_name(record):
+    """
+    Dotted module path of the code that logged the record (e.g. tools.search_images).
+    Most of the code base logs through the root logger, so the source file is used.
+    """
+    if record.name != "root":
+        return record.name
+    path = os.path.abspath(record.pathname)
+    if path.startswith(PROJECT_ROOT):
+        path = os.path.relpath(path, PROJECT_ROOT)
+    return os.path.splitext(path)[0].replace(os.sep, ".").lstrip(".")
+
+
+def _lookup(mapping, module):
+    # Longest matching prefix wins: "tools.search_images" before "tools"
+    while module:
+        if module in mapping:
+            return mapping[module]
+        module = module.rpartition(".")[0]
+    return None
+
+
+class ContextFilter(logging.Filter):
+    """
+    Runs in the caller's thread before the record is queued: applies per-module
+    levels and sampling and stamps the record with its module and plan/request IDs.
+    """
+
+    def __init__(self, module_levels=None, sample_rates=None):
+        super().__init__()
+        self.module_levels = module_levels or {}
+        self.sample_rates = sample_rates or {}
+
+    def filter(self, record):
+        module = _module_name(record)
+        min_level = _lookup(self.module_levels, module)
+        if min_level is not None and record.levelno < min_level:
+            return False
+        rate = _lookup(self.sample_rates, module)
+        if rate is not None and record.levelno < logging.WARNING and random.random() >= rate:
+            return False
+        record.module_path = module
+        record.plan_id = _plan_id.get()
+        record.request_id = _request_id.get()
+        return True
+
+
+class JsonFormatter(logging.Formatter):
+    def format(self, record):
+        entry = {
+            "ts": datetime.fromtimestamp(record.created, tz=timezone.utc).isoformat(),
+            "level": record.levelname,
+            "module": getattr(record, "module_path", record.module),
+            "line": record.lineno,
+            "thread": record.threadName,
+            "message": record.getMessage(),
+        }
+        for key in ("plan_id", "request_id"):
+            value = getattr(record, key, None)
+            if value:
+                entry[key] = value
+        if record.exc_info:
+            entry["exc_info"] = self.formatException(record.exc_info)
+        return json.dumps(entry, ensure_ascii=False)
+
+
+def _file_handler():
+    backup_count = int(os.getenv("LOG_BACKUP_COUNT", "5"))
+    if os.getenv("LOG_ROTATION", "size") == "time":
+        handler = logging.handlers.TimedRotatingFileHandler(
+            lOG_FILE_PATH, when=os.getenv("LOG_ROTATE_WHEN", "midnight"),
+            backupCount=backup_count, encoding="utf-8", delay=True
+        )
+    else:
+        handler = logging.handlers.RotatingFileHandler(
+            lOG_FILE_PATH, maxBytes=int(os.getenv("LOG_MAX_BYTES", str(10 * 1024 * 1024))),
+            backupCount=backup_count, encoding="utf-8", delay=True
+        )
+    if os.getenv("LOG_FORMAT", "json") == "json":
+        handler.setFormatter(JsonFormatter())
+    else:
+        handler.setFormatter(logging.Formatter(
+            "[ %(asctime)s ] %(module_path)s - %(levelname)s - plan=%(plan_id)s - %(message)s"
+        ))
+    return handler
+
+
+class LazyQueueHandler(logging.handlers.QueueHandler):
+    """
+    Queue handler that creates the log directory and starts the listener thread
+    on the first record, so importing the logger has no side effects on disk.
+    """
+
+    def __init__(self, log_queue):
+        super().__init__(log_queue)
+        self.listener = None
+        self._start_lock = threading.Lock()
+
+    def _start_listener(self):
+        with self._start_lock:
+            if self.listener is None:
+                os.makedirs(log_path, exist_ok=True)
+                listener = logging.handlers.QueueListener(self.queue, _file_handler(), respect_handler_level=True)
+                listener.start()
+                atexit.register(listener.stop)
+                self.listener = listener
+
+    def emit(self, record):
+        if self.listener is None:
+            self._start_listener()
+        super().emit(record)
+
+
+def _configure():
+    root = logging.getLogger()
+    if any(isinstance(h, logging.handlers.QueueHandler) for h in root.handlers):
+        return None
+
+    # Callers only enqueue records; the file is written by a background listener thread
+    queue_handler = LazyQueueHandler(queue.SimpleQueue())
+    queue_handler.addFilter(ContextFilter(
+        module_levels=_parse_mapping(os.getenv("LOG_MODULE_LEVELS"), logging.getLevelName),
+        sample_rates=_parse_mapping(os.getenv("LOG_SAMPLE_RATES"), float),
+    ))
+    root.addHandler(queue_handler)
+    root.setLevel(os.getenv("LOG_LEVEL", "INFO").upper())
+    return queue_handler
+
+
+_handler = _configure()
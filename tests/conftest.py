@@ -0,0 +1,14 @@
+import os
+import sys
+import tempfile
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+# Keep caches, stores and logs of the test run out of the working tree
+_workdir = tempfile.mkdtemp(prefix="travel-tests-")
+os.environ.setdefault("GROQ_API_KEY", "test")
+os.environ.setdefault("LOG_DIR", os.path.join(_workdir, "log"))
+os.environ.setdefault("RESULT_CACHE_PATH", os.path.join(_workdir, "results.sqlite3"))
+os.environ.setdefault("PLAN_STORE_PATH", os.path.join(_workdir, "plans.sqlite3"))
+os.environ.setdefault("THUMBNAIL_CACHE_DIR", os.path.join(_workdir, "thumbnails"))
@@ -0,0 +1,14 @@
+from datetime import date
+from utils.dates import expand_dates
+
+
+def test_range_is_expanded_and_capped():
+    dates = expand_dates(["2030-01-03", "2030-01-01"], max_dates=2, today=date(2029, 12, 1))
+
+    assert dates == ["2030-01-01", "2030-01-02"]
+
+
+def test_past_dates_are_skipped():
+    assert expand_dates(["2030-01-01", "2030-01-03"], today=date(2030, 1, 2)) == ["2030-01-02", "2030-01-03"]
+    assert expand_dates(["2030-01-01"], today=date(2030, 1, 2)) == []
+    assert expand_dates([]) == []
@@ -0,0 +1,66 @@
+import json
+import pytest
+from utils.gazetteer import Gazetteer, normalize_name
+from tools.search_flights import AmadeusFlightSearch
+
+
+@pytest.fixture(autouse=True)
+def fresh_index(monkeypatch):
+    monkeypatch.delenv("GAZETTEER_PATH", raising=False)
+    Gazetteer.reload()
+    yield
+    Gazetteer.reload()
+
+
+def test_normalize_name_folds_arabic_spellings():
+    assert normalize_name("الإسكندريّة") == normalize_name("الاسكندرية")
+    assert normalize_name("  Zürich ") == "zurich"
+
+
+@pytest.mark.parametrize("text, name", [
+    ("القاهرة", "Cairo"),
+    ("مدينة القاهرة", "Cairo"),
+    ("الى باريس", "Paris"),
+    ("Munchen", "Munich"),
+    ("MAD", "Madrid"),
+])
+def test_lookup_resolves_spellings_and_codes(text, name):
+    assert Gazetteer.lookup(text).name == name
+
+
+@pytest.mark.parametrize("text", ["mad", "par", "sin", "Par"])
+def test_codes_only_match_in_upper_case(text):
+    assert Gazetteer.lookup(text) is None
+
+
+def test_countries_are_marked():
+    for text, name in [("البحرين", "Bahrain"), ("الكويت", "Kuwait"), ("المالديف", "Maldives")]:
+        place = Gazetteer.lookup(text)
+        assert (place.name, place.kind) == (name, "country")
+    assert Gazetteer.lookup("مدينة الكويت").kind == "city"
+
+
+def test_ambiguous_names_return_candidates():
+    names = {place.name for place in Gazetteer.candidates("عمّان")}
+
+    assert names == {"Amman", "Oman"}
+    assert Gazetteer.lookup("عمان") is None
+    assert Gazetteer.canonical_key("عمان") == normalize_name("عمان")
+    assert Gazetteer.lookup("سلطنة عمان").name == "Oman"
+
+
+def test_flight_search_refuses_to_guess_an_ambiguous_place():
+    with pytest.raises(ValueError, match="Amman"):
+        AmadeusFlightSearch.resolve_location("عمان")
+    assert AmadeusFlightSearch.resolve_location("الكويت") == "KWI"
+
+
+def test_user_file_replaces_builtin_entries(tmp_path, monkeypatch):
+    path = tmp_path / "places.json"
+    path.write_text(json.dumps([{"name": "Paris", "iata": "CDG", "country": "France", "aliases": ["باري"]}]),
+                    encoding="utf-8")
+    monkeypatch.setenv("GAZETTEER_PATH", str(path))
+    Gazetteer.reload()
+
+    assert Gazetteer.candidates("باريس") == Gazetteer.candidates("باري")
+    assert Gazetteer.lookup("باريس").iata == "CDG"
@@ -0,0 +1,132 @@
+import pytest
+import requests
+import utils.http_client as http_client_module
+from utils.http_client import HttpClient, CircuitBreaker, CircuitOpenError
+
+URL = "http://provider.test/resource"
+
+
+class FakeResponse:
+    def __init__(self, status_code=200):
+        self.status_code = status_code
+        self.headers = {}
+
+    def close(self):
+        pass
+
+
+def make_client(outcomes):
+    """
+    Client whose session returns (or raises) `outcomes` in order; the breaker of
+    "provider.test" opens after one failure and allows a trial call right away.
+    """
+    client = HttpClient(retries=0)
+    client._breakers["provider.test"] = CircuitBreaker("provider.test", failure_threshold=1, reset_timeout=0)
+    outcomes = list(outcomes)
+
+    def request(method, url, **kwargs):
+        outcome = outcomes.pop(0)
+        if isinstance(outcome, BaseException):
+            raise outcome
+        return outcome
+
+    client.session.request = request
+    return client
+
+
+def test_breaker_opens_after_threshold():
+    breaker = CircuitBreaker("p", failure_threshold=2, reset_timeout=60)
+    breaker.record_failure()
+    assert breaker.state == "closed"
+    breaker.record_failure()
+    assert breaker.state == "open"
+    with pytest.raises(CircuitOpenError):
+        breaker.before_call()
+
+
+def test_half_open_allows_a_single_trial():
+    breaker = CircuitBreaker("p", failure_threshold=1, reset_timeout=0)
+    breaker.record_failure()
+    breaker.before_call()
+    with pytest.raises(CircuitOpenError):
+        breaker.before_call()
+    breaker.record_success()
+    assert breaker.state == "closed"
+
+
+@pytest.mark.parametrize("error", [
+    requests.TooManyRedirects("loop"),
+    requests.exceptions.InvalidURL("bad"),
+    requests.exceptions.ChunkedEncodingError("cut"),
+    ValueError("unexpected"),
+])
+def test_non_timeout_error_during_trial_does_not_wedge_breaker(error):
+    client = make_client([requests.ConnectionError("down"), error, FakeResponse(200)])
+    breaker = client.breaker("provider.test")
+
+    with pytest.raises(requests.ConnectionError):
+        client.get(URL)
+    assert breaker.state == "half_open"
+
+    # The trial fails with an error that is not a connection error or timeout
+    with pytest.raises(type(error)):
+        client.get(URL)
+    assert breaker.stats()["failures"] == 2
+
+    # The next trial is still let through and closes the circuit
+    assert client.get(URL).status_code == 200
+    assert breaker.state == "closed"
+
+
+def test_guarded_recovers_after_unexpected_error():
+    client = HttpClient()
+    client._breakers["tool.test"] = CircuitBreaker("tool.test", failure_threshold=1, reset_timeout=0)
+    calls = []
+
+    @client.guarded("tool.test")
+    def tool():
+        calls.append(1)
+        if len(calls) < 3:
+            raise RuntimeError("tool failed")
+        return "ok"
+
+    for _ in range(2):
+        with pytest.raises(RuntimeError):
+            tool()
+    assert tool() == "ok"
+    assert client.breaker("tool.test").state == "closed"
+
+
+def test_open_circuit_does_not_use_rate_budget(monkeypatch):
+    acquired = []
+    monkeypatch.setattr(http_client_module.scheduler, "acquire", lambda provider, *args, **kwargs: acquired.append(provider))
+    client = make_client([FakeResponse(503)])
+    client._breakers["provider.test"] = CircuitBreaker("provider.test", failure_threshold=1, reset_timeout=60)
+    guarded = client.guarded("provider.test")(lambda: "ok")
+
+    assert client.get(URL).status_code == 503
+    with pytest.raises(CircuitOpenError):
+        client.get(URL)
+    with pytest.raises(CircuitOpenError):
+        guarded()
+    assert acquired == ["provider.test"]
+
+
+def test_queue_timeout_gives_back_the_half_open_trial(monkeypatch):
+    waits = [None, TimeoutError("queue"), None]
+
+    def acquire(provider, *args, **kwargs):
+        outcome = waits.pop(0)
+        if outcome is not None:
+            raise outcome
+
+    monkeypatch.setattr(http_client_module.scheduler, "acquire", acquire)
+    client = make_client([requests.ConnectionError("down"), FakeResponse(200)])
+
+    with pytest.raises(requests.ConnectionError):
+        client.get(URL)
+    with pytest.raises(TimeoutError):
+        client.get(URL)
+    # The trial was never sent, so the next call may still make it
+    assert client.get(URL).status_code == 200
+    assert client.breaker("provider.test").state == "closed"
@@ -0,0 +1,28 @@
+import os
+import sys
+import subprocess
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+CHECK = """
+import sys, threading
+import core.planner
+print(threading.active_count())
+print(sorted(name for name in ("weasyprint", "markdown2", "PIL", "taskflowai") if name in sys.modules))
+"""
+
+
+def test_importing_the_planner_has_no_side_effects(tmp_path):
+    env = dict(os.environ,
+               GROQ_API_KEY="test",
+               LOG_DIR=str(tmp_path / "log"),
+               RESULT_CACHE_PATH=str(tmp_path / "results" / "results.sqlite3"),
+               PLAN_STORE_PATH=str(tmp_path / "plans" / "plans.sqlite3"),
+               THUMBNAIL_CACHE_DIR=str(tmp_path / "thumbnails"))
+    completed = subprocess.run([sys.executable, "-c", CHECK], cwd=ROOT, env=env,
+                               capture_output=True, text=True, check=True)
+
+    threads, loaded = completed.stdout.split("\n")[:2]
+    assert threads == "1"
+    assert loaded == "[]"
+    assert os.listdir(tmp_path) == []
@@ -0,0 +1,53 @@
+import json
+import pytest
+import utils.metrics as metrics
+from utils.metrics import MetricsRegistry, instrument_model, report_usage
+
+
+@pytest.fixture
+def events(tmp_path, monkeypatch):
+    path = tmp_path / "metrics.jsonl"
+    monkeypatch.setattr(metrics, "METRICS_JSONL_PATH", str(path))
+    MetricsRegistry.reset()
+    yield lambda: [json.loads(line) for line in path.read_text(encoding="utf-8").splitlines()]
+    MetricsRegistry.reset()
+
+
+def test_span_event_carries_estimated_tokens(events):
+    model = instrument_model(lambda system_prompt, user_prompt: ("x" * 40, None), "m")
+
+    model("s" * 40, "u" * 40)
+
+    [event] = events()
+    assert event["stage"] == "llm.m"
+    assert (event["prompt_tokens"], event["completion_tokens"], event["tokens_estimated"]) == (20, 10, True)
+    exported = MetricsRegistry.export_prometheus()
+    assert 'travel_llm_tokens_estimated_total{stage="llm.m",kind="prompt"} 20' in exported
+    assert 'travel_llm_tokens_total{stage="llm.m",kind="prompt"} 0' in exported
+
+
+def test_provider_usage_replaces_the_estimate(events):
+    def backend(system_prompt, user_prompt):
+        report_usage(123, 45)
+        return "response", None
+
+    instrument_model(backend, "m")("system", "user")
+
+    [event] = events()
+    assert (event["prompt_tokens"], event["completion_tokens"], event["tokens_estimated"]) == (123, 45, False)
+    stage = MetricsRegistry.snapshot()["llm.m"]
+    assert (stage["prompt_tokens"], stage["estimated_prompt_tokens"]) == (123, 0)
+
+
+def test_failed_calls_are_recorded_as_errors(events):
+    def failing(system_prompt, user_prompt):
+        raise RuntimeError("down")
+
+    with pytest.raises(RuntimeError):
+        instrument_model(failing, "m")("s", "u")
+    instrument_model(lambda system_prompt, user_prompt: ("", ValueError("bad")), "m")("s", "u")
+
+    assert [event["error"] is not None for event in events()] == [True, True]
+    assert MetricsRegistry.snapshot()["llm.m"]["errors"] == 2
+    # Usage reported outside an instrumented call is ignored
+    report_usage(1, 1)
@@ -0,0 +1,82 @@
+import pytest
+from utils.main_utils import LoadModel
+from utils.metrics import MetricsRegistry
+from utils.model_registry import INSTANT, MAVERICK, SCOUT, ModelRegistry, model_task
+
+
+@pytest.fixture
+def registry(monkeypatch):
+    """
+    Fresh registry configuration whose models are recorded instead of loaded.
+    Each fake model returns the outcome queued for it in `outcomes` (default: its name).
+    """
+    for name in ("MODEL_CONFIG_PATH", "MODEL_ROUTE_WEATHER", "MODEL_MAX_LATENCY_WEATHER"):
+        monkeypatch.delenv(name, raising=False)
+    ModelRegistry.reload()
+    calls, outcomes = [], {}
+
+    def load_groq_model(model_name):
+        def model(system_prompt="", user_prompt="", **kwargs):
+            calls.append(model_name)
+            queued = outcomes.get(model_name)
+            outcome = queued.pop(0) if queued else (model_name, None)
+            if isinstance(outcome, Exception):
+                raise outcome
+            return outcome
+        return model
+
+    monkeypatch.setattr(LoadModel, "load_groq_model", staticmethod(load_groq_model))
+    yield calls, outcomes
+    ModelRegistry.reload()
+
+
+def test_tasks_use_their_route_and_fall_back_to_the_agent_route(registry):
+    llm = ModelRegistry.model_for("travel_agent")
+
+    assert llm("s", "u") == (SCOUT, None)
+    with model_task("summary"):
+        assert llm("s", "u") == (INSTANT, None)
+    with model_task("unknown_stage"):
+        assert llm("s", "u") == (SCOUT, None)
+    # Weather and flights stay on the travel agent's model
+    assert ModelRegistry.candidates("weather")[0] == SCOUT
+    assert ModelRegistry.candidates("flights")[0] == SCOUT
+
+
+def test_routes_can_be_overridden_from_the_environment(registry, monkeypatch):
+    monkeypatch.setenv("MODEL_ROUTE_WEATHER", f"{INSTANT}, {MAVERICK}")
+    ModelRegistry.reload()
+
+    assert ModelRegistry.candidates("weather") == [INSTANT, MAVERICK]
+
+
+def test_slow_models_move_behind_faster_ones(registry, monkeypatch):
+    monkeypatch.setenv("MODEL_MAX_LATENCY_WEATHER", "3")
+    monkeypatch.setenv("MODEL_ROUTE_WEATHER", f"{SCOUT},{MAVERICK},{INSTANT}")
+    ModelRegistry.reload()
+    p50 = {f"llm.{SCOUT}": 9.0, f"llm.{MAVERICK}": 5.0, f"llm.{INSTANT}": None}
+    monkeypatch.setattr(MetricsRegistry, "percentile", classmethod(lambda cls, stage, q, min_samples=1: p50[stage]))
+
+    # The unmeasured model keeps its place ahead of the slow ones, which go fastest first
+    assert ModelRegistry.candidates("weather") == [INSTANT, MAVERICK, SCOUT]
+
+
+@pytest.mark.parametrize("failure", [
+    TimeoutError("Request timed out"),
+    ("", Exception("429 Too Many Requests: rate limit reached")),
+])
+def test_timeouts_and_rate_limits_fall_back_to_the_next_model(registry, failure):
+    calls, outcomes = registry
+    outcomes[SCOUT] = [failure]
+
+    assert ModelRegistry.model_for("travel_agent")("s", "u") == (MAVERICK, None)
+    assert calls == [SCOUT, MAVERICK]
+
+
+def test_other_errors_do_not_fall_back(registry):
+    calls, outcomes = registry
+    outcomes[SCOUT] = [ValueError("bad prompt")]
+
+    with pytest.raises(ValueError):
+        ModelRegistry.model_for("travel_agent")("s", "u")
+    assert calls == [SCOUT]
@@ -0,0 +1,52 @@
+import pytest
+from utils.image_pipeline import ImagePipeline
+from utils.pdf_utils import PDFRenderer
+
+try:
+    import weasyprint
+except (ImportError, OSError):  # Pango/Cairo system libraries missing
+    weasyprint = None
+
+pytestmark = pytest.mark.skipif(weasyprint is None, reason="WeasyPrint cannot load its system libraries")
+
+
+def jpeg_bytes():
+    from io import BytesIO
+    from PIL import Image
+
+    buffer = BytesIO()
+    Image.new("RGB", (8, 8), (30, 90, 160)).save(buffer, format="JPEG")
+    return buffer.getvalue()
+
+
+def test_prefetched_images_are_served_from_memory(monkeypatch):
+    url = "https://images.test/landmark.jpg"
+    requested = []
+
+    def prefetch_for_print(urls):
+        urls = list(urls)
+        requested.extend(urls)
+        return {url: jpeg_bytes(), "https://images.test/missing.jpg": None}
+
+    monkeypatch.setattr(ImagePipeline, "prefetch_for_print", prefetch_for_print)
+    html_content = f'<img src="{url}"><img src="https://images.test/missing.jpg">'
+    fetcher = PDFRenderer._image_url_fetcher(html_content)
+
+    # Nothing else is fetched over the network while rendering
+    monkeypatch.setattr(weasyprint.urls.URLFetcher, "open", lambda *args, **kwargs: pytest.fail("network fetch"))
+    pdf = weasyprint.HTML(string=f"<html><body>{html_content}</body></html>", url_fetcher=fetcher).write_pdf()
+
+    assert requested == [url, "https://images.test/missing.jpg"]
+    assert pdf.startswith(b"%PDF")
+    assert fetcher.fetch(url).content_type == "image/jpeg"
+    with pytest.raises(ValueError):
+        fetcher.fetch("https://images.test/missing.jpg")
+
+
+def test_other_urls_use_the_default_fetcher(monkeypatch):
+    monkeypatch.setattr(ImagePipeline, "prefetch_for_print", lambda urls: {})
+    fetcher = PDFRenderer._image_url_fetcher("")
+
+    response = fetcher.fetch("data:text/plain;base64,aGk=")
+
+    assert response.read() == b"hi"
@@ -0,0 +1,142 @@
+import time
+import threading
+import pytest
+import utils.scheduler as scheduler_module
+from utils.scheduler import (
+    ProviderQueue, QueueTimeoutError, Scheduler, TokenBucket, current_owner, scheduling,
+)
+
+
+def test_bucket_delays_until_a_request_and_its_tokens_fit():
+    bucket = TokenBucket(requests=2, per=1, tokens=100)
+    now = time.monotonic()
+
+    assert bucket.delay(50, now) == 0
+    bucket.consume(50)
+    bucket.consume(50)
+
+    # Out of requests (0.5s each) and tokens (0.01s each)
+    assert bucket.delay(40, now) == pytest.approx(0.5)
+    assert bucket.delay(80, now + 0.5) == pytest.approx(0.3)
+
+
+def test_queue_serves_interactive_callers_before_batch_callers():
+    queue = ProviderQueue("test", TokenBucket(requests=1, per=0.2))
+    queue.acquire()
+    order = []
+
+    def caller(priority):
+        queue.acquire(priority=priority)
+        order.append(priority)
+
+    batch = threading.Thread(target=caller, args=("batch",))
+    batch.start()
+    while queue.stats()["depth"] < 1:
+        time.sleep(0.005)
+    interactive = threading.Thread(target=caller, args=("interactive",))
+    interactive.start()
+    batch.join(timeout=5)
+    interactive.join(timeout=5)
+
+    assert order == ["interactive", "batch"]
+    assert queue.stats()["admitted"] == 3
+
+
+def test_queue_times_out_and_leaves_the_line():
+    queue = ProviderQueue("test", TokenBucket(requests=1, per=60))
+    queue.acquire()
+
+    with pytest.raises(QueueTimeoutError):
+        queue.acquire(max_wait=0.05)
+
+    stats = queue.stats()
+    assert stats["depth"] == 0
+    assert stats["timeouts"] == 1
+
+
+@pytest.fixture
+def groq_limits(monkeypatch):
+    monkeypatch.setenv("RATE_LIMIT_GROQ", "30/60")
+    monkeypatch.setenv("RATE_LIMIT_GROQ_TOKENS", "6000")
+    monkeypatch.setattr(scheduler_module, "SCHEDULER_COMPLETION_TOKENS", 1000)
+
+
+def test_scheduled_model_reserves_the_expected_completion_and_settles(groq_limits):
+    scheduler = Scheduler()
+    seen = {}
+
+    def model(system_prompt, user_prompt, max_tokens=4000):
+        seen["tokens"] = scheduler.queue("groq", "m").bucket.tokens
+        return "x" * 400, None
+
+    wrapped = scheduler.scheduled_model(model, "m")
+    assert wrapped("s" * 400, "u" * 400, max_tokens=4000) == ("x" * 400, None)
+
+    # 100 + 100 prompt tokens plus min(max_tokens, SCHEDULER_COMPLETION_TOKENS)
+    assert seen["tokens"] == pytest.approx(6000 - 1200, abs=1)
+    # Settled to the estimated usage: 100 + 100 + 100
+    assert scheduler.queue("groq", "m").bucket.tokens == pytest.approx(6000 - 300, abs=1)
+
+
+def test_scheduled_model_uses_a_smaller_max_tokens(groq_limits):
+    scheduler = Scheduler()
+    seen = {}
+
+    def model(system_prompt, user_prompt, max_tokens=4000):
+        seen["tokens"] = scheduler.queue("groq", "m").bucket.tokens
+        return "", None
+
+    scheduler.scheduled_model(model, "m")("", "", max_tokens=200)
+
+    assert seen["tokens"] == pytest.approx(6000 - 200, abs=1)
+
+
+def test_scheduled_model_retries_after_a_rate_limit_error(groq_limits, monkeypatch):
+    monkeypatch.setenv("RATE_LIMIT_GROQ", "1000/1")
+    monkeypatch.setattr(scheduler_module, "RATE_LIMIT_PAUSE", 0.01)
+    scheduler = Scheduler()
+    outcomes = [("", Exception("429 Too Many Requests")), ("done", None)]
+
+    def model(system_prompt, user_prompt):
+        return outcomes.pop(0)
+
+    assert scheduler.scheduled_model(model, "m")("s", "u") == ("done", None)
+    assert outcomes == []
+
+
+def test_unlimited_providers_are_not_queued():
+    scheduler = Scheduler()
+
+    assert scheduler.queue("wikipedia") is None
+    assert scheduler.acquire("wikipedia") == 0.0
+
+
+def test_scheduling_sets_and_restores_the_owner():
+    with scheduling(priority="batch", owner="plan-1"):
+        assert current_owner() == "plan-1"
+    assert current_owner() is None
+
+    with pytest.raises(ValueError):
+        with scheduling(priority="urgent"):
+            pass
+
+
+def test_image_pipeline_workers_inherit_the_callers_context(monkeypatch):
+    from utils.image_pipeline import ImagePipeline
+
+    monkeypatch.setattr(ImagePipeline, "_fetch_thumbnail", classmethod(lambda cls, url: current_owner()))
+    with scheduling(owner="plan-1"):
+        owners = ImagePipeline.prefetch(["https://a.test/1.png", "https://a.test/2.png"])
+
+    assert set(owners.values()) == {"plan-1"}
+
+
+def test_worker_processes_split_the_provider_limits(monkeypatch):
+    monkeypatch.setenv("SCHEDULER_PROCESSES", "4")
+
+    assert scheduler_module.provider_limits("groq") == {"requests": 7.5, "per": 60, "tokens": 1500}
+    # Under one request per process, the period is stretched instead
+    monkeypatch.setenv("SCHEDULER_PROCESSES", "16")
+    limits = scheduler_module.provider_limits("amadeus")
+    assert limits["requests"] == pytest.approx(1)
+    assert limits["per"] == pytest.approx(1.6)
@@ -0,0 +1,33 @@
+import time
+import threading
+from tools.search_flights import AmadeusFlightSearch
+
+
+class TokenResponse:
+    def raise_for_status(self):
+        pass
+
+    def json(self):
+        return {"access_token": "token", "expires_in": 1799}
+
+
+def test_concurrent_callers_share_one_token_request(monkeypatch):
+    calls = []
+
+    def post(*args, **kwargs):
+        calls.append(1)
+        time.sleep(0.05)
+        return TokenResponse()
+
+    monkeypatch.setattr("tools.search_flights.http_client.post", post)
+    AmadeusFlightSearch._token_cache.clear()
+    tokens = []
+    threads = [threading.Thread(target=lambda: tokens.append(AmadeusFlightSearch._token())) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join(timeout=5)
+    AmadeusFlightSearch._token_cache.clear()
+
+    assert tokens == ["token"] * 8
+    assert len(calls) == 1
@@ -0,0 +1,85 @@
+import time
+import threading
+import pytest
+from utils.single_flight import SingleFlight
+
+
+def wait_for_waiters(flight, count):
+    deadline = time.monotonic() + 5
+    while flight.stats()["coalesced"] < count and time.monotonic() < deadline:
+        time.sleep(0.01)
+
+
+def test_concurrent_calls_share_one_execution():
+    flight = SingleFlight(lock_dir=None, cross_process=False)
+    started, release = threading.Event(), threading.Event()
+    calls, results = [], []
+
+    def slow():
+        calls.append(1)
+        started.set()
+        release.wait(timeout=5)
+        return "value"
+
+    def caller():
+        results.append(flight.do("key", slow))
+
+    leader = threading.Thread(target=caller)
+    leader.start()
+    started.wait(timeout=5)
+    followers = [threading.Thread(target=caller) for _ in range(4)]
+    for thread in followers:
+        thread.start()
+    wait_for_waiters(flight, 4)
+    release.set()
+    leader.join(timeout=5)
+    for thread in followers:
+        thread.join(timeout=5)
+
+    assert len(calls) == 1
+    assert sorted(shared for _, shared in results) == [False, True, True, True, True]
+    assert all(result == "value" for result, _ in results)
+    assert flight.stats() == {"executions": 1, "coalesced": 4, "in_flight": 0}
+
+
+def test_leader_error_reaches_waiters_and_key_is_released():
+    flight = SingleFlight(lock_dir=None, cross_process=False)
+    started, release = threading.Event(), threading.Event()
+    errors = []
+
+    def failing():
+        started.set()
+        release.wait(timeout=5)
+        raise RuntimeError("boom")
+
+    def caller():
+        try:
+            flight.do("key", failing)
+        except RuntimeError as e:
+            errors.append(e)
+
+    leader = threading.Thread(target=caller)
+    leader.start()
+    started.wait(timeout=5)
+    follower = threading.Thread(target=caller)
+    follower.start()
+    wait_for_waiters(flight, 1)
+    release.set()
+    leader.join(timeout=5)
+    follower.join(timeout=5)
+
+    assert len(errors) == 2
+    assert flight.in_flight() == 0
+    # The key is free again, so the next call runs
+    assert flight.do("key", lambda: 1) == (1, False)
+
+
+def test_cross_process_leader_uses_stored_result(tmp_path):
+    flight = SingleFlight(lock_dir=str(tmp_path), cross_process=True)
+    if not flight.cross_process:
+        pytest.skip("file locks are unavailable on this platform")
+
+    result = flight.do("key", lambda: pytest.fail("should not run"), load=lambda: "stored")
+
+    assert result == ("stored", True)
+    assert flight.stats()["executions"] == 0
@@ -0,0 +1,64 @@
+import httpx
+import groq
+import pytest
+import utils.streaming as streaming
+from utils.streaming import StreamSink, stream_to, streaming_model
+
+
+def connection_error():
+    return groq.APIConnectionError(request=httpx.Request("POST", "https://api.groq.com"))
+
+
+@pytest.fixture
+def stream(monkeypatch):
+    monkeypatch.setattr(streaming, "STREAM_RETRIES", 2)
+    monkeypatch.setattr(streaming.HttpClient, "_backoff", staticmethod(lambda attempt: 0))
+    outcomes = []
+
+    def fake_stream(model_name, system_prompt, user_prompt, temperature, max_tokens, sink):
+        outcome = outcomes.pop(0)
+        sink.write("partial")
+        if isinstance(outcome, Exception):
+            raise outcome
+        return outcome, None
+
+    monkeypatch.setattr(streaming, "_stream_groq_completion", fake_stream)
+    return outcomes
+
+
+def base_model(*args, **kwargs):
+    return "fallback", None
+
+
+def call(model):
+    with stream_to(StreamSink()) as sink:
+        return model("system", "user"), sink.snapshot()[1]
+
+
+def test_transient_errors_are_retried(stream):
+    stream.extend([connection_error(), "streamed"])
+
+    result, text = call(streaming_model(base_model, "m"))
+
+    assert result == ("streamed", None)
+    assert text == "partial"
+
+
+def test_falls_back_after_the_retries(stream):
+    stream.extend([connection_error()] * 3)
+
+    assert call(streaming_model(base_model, "m"))[0] == ("fallback", None)
+    assert stream == []
+
+
+def test_rate_limits_are_left_to_the_scheduler(stream):
+    stream.append(Exception("Error code: 429 - rate limit reached"))
+
+    with pytest.raises(Exception, match="429"):
+        call(streaming_model(base_model, "m"))
+
+
+def test_the_groq_client_is_shared(monkeypatch):
+    monkeypatch.setitem(streaming._client, "groq", None)
+
+    assert streaming._groq_client() is streaming._groq_client()
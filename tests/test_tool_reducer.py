@@ -0,0 +1,100 @@
+from utils.tool_reducer import (
+    reduce_articles, reduce_image_urls, reduce_search_results, reduce_text, reduced, relevance_context,
+)
+
+
+def serper_output(*results):
+    """
+    Format results the way WebTools.serper_search does for one query.
+    """
+    blocks = [f"{i}. {title}\n   URL: {link}\n   Snippet: {snippet}\n"
+              for i, (title, link, snippet) in enumerate(results, 1)]
+    return ("Organic Results:\n" + "\n".join(blocks)).strip()
+
+
+def test_search_results_for_one_query_are_deduplicated_ranked_and_budgeted():
+    output = serper_output(("Weather", "https://a.test/weather", "Rain expected"),
+                           ("Louvre museum", "https://www.a.test/louvre/", "Paris museum guide"),
+                           ("Louvre copy", "http://a.test/louvre", "Same page"))
+
+    text = reduce_search_results(output, ["louvre", "museum"], budget=1000)
+
+    assert text == ("Search Results:\n"
+                    "1. Louvre museum\n   URL: https://www.a.test/louvre/\n   Snippet: Paris museum guide\n\n"
+                    "2. Weather\n   URL: https://a.test/weather\n   Snippet: Rain expected")
+    assert "Weather" not in reduce_search_results(output, ["louvre"], budget=30)
+
+
+def test_search_results_for_several_queries_are_merged_across_queries():
+    outputs = [serper_output(("Louvre museum", "https://a.test/louvre", "Paris museum guide"),
+                             ("Trains", "https://a.test/trains", "Rail pass")),
+               serper_output(("Louvre tickets", "https://a.test/louvre/", "Book the museum"),
+                             ("Cafes", "https://a.test/cafes", "Paris cafes")),
+               "Error making request to Serper API for query 'x': timeout"]
+
+    text = reduce_search_results(outputs, ["louvre"], budget=1000)
+
+    assert text.startswith("Search Results:\n1. Louvre museum\n")
+    assert text.count("a.test/louvre") == 1
+    assert "Cafes" in text and "Trains" in text
+    assert text.endswith("Error making request to Serper API for query 'x': timeout")
+
+
+def test_search_results_accept_serper_json():
+    payload = {
+        "answerBox": {"answer": "Louvre opens at 9", "title": "Louvre hours", "link": "https://louvre.fr"},
+        "organic": [
+            {"title": "Weather", "link": "https://a.test/weather", "snippet": "Rain expected"},
+            {"title": "Louvre museum", "link": "https://www.a.test/louvre/", "snippet": "Paris museum guide"},
+            {"title": "Louvre copy", "link": "http://a.test/louvre", "snippet": "Same page"},
+        ],
+    }
+
+    results = reduce_search_results(payload, ["louvre", "museum"], budget=1000)
+
+    assert [item["title"] for item in results] == ["Louvre museum", "Louvre hours", "Weather"]
+    assert len(reduce_search_results(payload, ["louvre"], budget=1)) == 1
+
+
+def test_articles_keep_relevant_passages_in_reading_order():
+    filler = "Unrelated history of the region. " * 10
+    text = "\n\n".join([filler, "The museum district has the Louvre museum. " * 6, filler])
+    article = {"title": "Paris", "fullurl": "https://en.wikipedia.org/wiki/Paris", "extract": text}
+
+    [reduced_article] = reduce_articles([article, dict(article)], ["louvre", "museum"], budget=80)
+
+    assert reduced_article["url"] == "https://en.wikipedia.org/wiki/Paris"
+    assert len(reduced_article["passages"]) == 1
+    assert "Louvre" in reduced_article["passages"][0]
+
+
+def test_plain_text_keeps_original_order():
+    parts = [f"Passage {i} " + ("about food " if i % 2 else "about trains ") * 20 for i in range(4)]
+
+    text = reduce_text("\n\n".join(parts), ["food"], budget=130)
+
+    assert text.index("Passage 1") < text.index("Passage 3")
+    assert "Passage 0" not in text
+
+
+def test_image_urls_are_deduplicated_and_capped():
+    urls = [f"https://images.test/{i}.jpg" for i in range(6)] + ["https://www.images.test/0.jpg/"]
+
+    kept = reduce_image_urls(urls, [], budget=1000)
+
+    assert kept == urls[:4]
+
+
+def test_decorator_uses_context_terms_and_passes_errors_through():
+    @reduced("serper")
+    def search(query):
+        return [serper_output(("Trains", "https://t.test", "rail pass")),
+                serper_output(("Food", "https://f.test", "Cairo street food"))]
+
+    with relevance_context("Cairo", "food"):
+        assert search(["things to do", "where to eat"]).startswith("Search Results:\n1. Food\n")
+
+    error = RuntimeError("down")
+    assert reduced("serper")(lambda query: error)("x") is error
+    message = "Error making request to Serper API for query 'x': timeout"
+    assert reduced("serper")(lambda query: message)("x") == message
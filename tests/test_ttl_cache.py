@@ -0,0 +1,53 @@
+import time
+import threading
+from utils.ttl_cache import TTLCache
+
+
+def test_entries_expire_after_their_ttl():
+    cache = TTLCache(ttl=60)
+    cache.set("default", 1)
+    cache.set("short", 2, ttl=0.01)
+    time.sleep(0.02)
+
+    assert cache.get("default") == 1
+    assert cache.get("short") is None
+    assert "short" not in cache
+    assert len(cache) == 1
+
+
+def test_falsy_values_are_cached():
+    cache = TTLCache(ttl=60)
+    cache.set("empty", "")
+
+    assert "empty" in cache
+    assert cache.get("empty", "missing") == ""
+
+
+def test_least_recently_used_entry_is_evicted():
+    cache = TTLCache(ttl=60, maxsize=2)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    cache.get("a")
+    cache.set("c", 3)
+
+    assert "b" not in cache
+    assert (cache.get("a"), cache.get("c")) == (1, 3)
+
+
+def test_clear_and_concurrent_writers():
+    cache = TTLCache(ttl=60, maxsize=50)
+
+    def writer(offset):
+        for i in range(200):
+            cache.set(offset + i, i)
+            cache.get(offset + i // 2)
+
+    threads = [threading.Thread(target=writer, args=(n * 1000,)) for n in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join(timeout=5)
+
+    assert len(cache) == 50
+    cache.clear()
+    assert len(cache) == 0
@@ -0,0 +1,51 @@
+from datetime import date
+from core import planner, warmup
+from core.planner import research_events
+
+
+def test_date_windows_are_start_end_pairs():
+    windows = warmup.date_windows(7, 2, 7, today=date(2030, 1, 1))
+    assert windows == [["2030-01-08", "2030-01-14"], ["2030-01-15", "2030-01-21"]]
+
+
+def test_events_jobs_share_the_planner_cache_key(monkeypatch):
+    config = dict(warmup.DEFAULT_CONFIG, destinations=["Paris"], interests=["المتاحف، الطعام"])
+    events = [args for section, _, args in warmup.build_jobs(config) if section == "events"]
+    assert events
+    calls = {}
+
+    def run_sections(section_calls, **kwargs):
+        calls.update(section_calls)
+        for key in section_calls:
+            yield key, "done", ""
+
+    monkeypatch.setattr(planner, "run_sections_concurrently", run_sections)
+    for destination, dates, interests in events:
+        # The date picker returns date objects that app.py formats before calling the planner
+        picked = [date.fromisoformat(day).strftime("%Y-%m-%d") for day in dates]
+        planner.TravelPlanner.plan("Cairo", destination, picked, interests, store=False)
+        func, args = calls["events"]
+        assert func is research_events
+        assert func.cache_key(*args) == research_events.cache_key(destination, dates, interests)
+
+
+def test_failing_job_does_not_stop_the_run(monkeypatch):
+    monkeypatch.setattr(warmup.AgentRegistry, "warm_up", lambda names=None: None)
+
+    def failing(destination):
+        raise TimeoutError("queue timeout")
+
+    def working(destination):
+        return "report"
+
+    for func in (failing, working):
+        func.cache_key = lambda *args, name=func.__name__: f"test:{name}:{args}"
+    monkeypatch.setattr(warmup, "build_jobs", lambda config: [
+        ("destination", failing, ("Paris",)),
+        ("destination", working, ("Rome",)),
+    ])
+
+    report = warmup.run_warmup(dict(warmup.DEFAULT_CONFIG, requests_per_minute=0))
+    assert report["failed"] == 1
+    assert report["generated"] == 1
+    assert [job["status"] for job in report["jobs"]] == ["failed", "generated"]
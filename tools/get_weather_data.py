@@ -1,18 +1,160 @@
 import sys
 import os
-sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
-from taskflowai import WebTools # type: ignore
+from datetime import date
 from logger.logger_config import logging
 from exception.custom_exception import CustomException
+from utils.metrics import traced
+from utils.http_client import http_client
+from utils.ttl_cache import TTLCache
+from utils.gazetteer import Gazetteer
+from utils.dates import expand_dates
 
 class GetWeatherData:
     @classmethod
     def fetch_weather_data(cls):
         try:
+            from taskflowai import WebTools # type: ignore
+
             logging.info("Fetching weather data using WebTools.")
-            weather_data = WebTools.get_weather_data
+            weather_data = traced("tool.weather.get_weather_data")(http_client.guarded("weather")(WebTools.get_weather_data))
             logging.info(f"Weather data fetched successfully. {weather_data}")
             return weather_data
         except Exception as e:
             logging.info("Failed to fetch weather data.")
             raise CustomException(sys, e)
+
+
+class WeatherForecast:
+    """
+    Structured forecast from WeatherAPI for the weather tab, without an LLM turn.
+    One request covers the whole date range; each city/day is cached separately
+    so overlapping trips reuse the days already fetched.
+    """
+    BASE_URL = "https://api.weatherapi.com/v1/forecast.json"
+    API_KEY = os.getenv("WEATHER_API_KEY")
+    MAX_FORECAST_DAYS = int(os.getenv("WEATHER_MAX_FORECAST_DAYS", "14"))
+    REQUEST_DEADLINE = 10
+
+    _day_cache = TTLCache(ttl=int(os.getenv("WEATHER_FORECAST_TTL", "1800")), maxsize=2048)
+
+    @classmethod
+    def available(cls):
+        return bool(cls.API_KEY)
+
+    @staticmethod
+    def _parse_day(forecast_day):
+        day = forecast_day["day"]
+        return {
+            "date": forecast_day["date"],
+            "min_c": day.get("mintemp_c"),
+            "max_c": day.get("maxtemp_c"),
+            "rain_chance": day.get("daily_chance_of_rain", 0),
+            "precip_mm": day.get("totalprecip_mm", 0.0),
+            "wind_kph": day.get("maxwind_kph", 0.0),
+            "humidity": day.get("avghumidity"),
+            "uv": day.get("uv"),
+            "condition": (day.get("condition") or {}).get("text", ""),
+        }
+
+    @classmethod
+    @traced("tool.weather.forecast")
+    def forecast(cls, city, dates, today=None):
+        """
+        Return (days, location_name, missing_dates) for the trip dates.
+        `missing_dates` are dates outside the forecast horizon.
+        """
+        try:
+            today = today or date.today()
+            trip_dates = expand_dates(dates, max_dates=cls.MAX_FORECAST_DAYS, today=today)
+            city_key = Gazetteer.canonical_key(city)
+            days = {d: cls._day_cache.get((city_key, d)) for d in trip_dates}
+            location_name = cls._day_cache.get((city_key, "location")) or city
+
+            uncached = [d for d, value in days.items() if value is None]
+            if uncached:
+                horizon = (date.fromisoformat(uncached[-1]) - today).days + 1
+                response = http_client.get(
+                    cls.BASE_URL,
+                    provider="weather",
+                    params={"key": cls.API_KEY, "q": Gazetteer.canonical_name(city), "days": min(max(horizon, 1), cls.MAX_FORECAST_DAYS),
+                            "aqi": "no", "alerts": "no", "lang": "ar"},
+                    deadline=cls.REQUEST_DEADLINE,
+                )
+                response.raise_for_status()
+                payload = response.json()
+                location_name = (payload.get("location") or {}).get("name") or city
+                cls._day_cache.set((city_key, "location"), location_name)
+                for forecast_day in (payload.get("forecast") or {}).get("forecastday", []):
+                    parsed = cls._parse_day(forecast_day)
+                    cls._day_cache.set((city_key, parsed["date"]), parsed)
+                    if parsed["date"] in days:
+                        days[parsed["date"]] = parsed
+
+            found = [days[d] for d in trip_dates if days[d] is not None]
+            missing = [d for d in trip_dates if days[d] is None]
+            logging.info(f"Weather forecast for {city}: {len(found)} day(s), {len(missing)} outside the forecast range.")
+            return found, location_name, missing
+        except Exception as e:
+            logging.info(f"Structured weather forecast failed: {e}")
+            raise CustomException(e, sys)
+
+
+def clothing_advice(days):
+    """
+    Rule-based Arabic packing advice from the temperature, rain, wind and UV of the trip days.
+    """
+    lowest = min(day["min_c"] for day in days)
+    highest = max(day["max_c"] for day in days)
+    advice = []
+    if highest >= 30:
+        advice.append("ملابس قطنية خفيفة وفاتحة اللون، مع الإكثار من شرب الماء.")
+    elif highest >= 20:
+        advice.append("ملابس خفيفة للنهار مع طبقة إضافية للمساء.")
+    if lowest < 5:
+        advice.append("معطف شتوي ثقيل وقفازات وغطاء للرأس.")
+    elif lowest < 12:
+        advice.append("سترة دافئة أو معطف خفيف.")
+    elif lowest < 18 and highest >= 20:
+        advice.append("سترة خفيفة لفترات الصباح والمساء.")
+    if highest - lowest >= 12:
+        advice.append("ارتداء الملابس على طبقات لتناسب الفرق الكبير بين الليل والنهار.")
+    if any(day["rain_chance"] >= 50 or day["precip_mm"] >= 5 for day in days):
+        advice.append("مظلة أو معطف واقٍ من المطر وحذاء مقاوم للماء.")
+    if any(day["wind_kph"] >= 40 for day in days):
+        advice.append("سترة واقية من الرياح.")
+    if any((day["uv"] or 0) >= 6 for day in days):
+        advice.append("واقي شمس ونظارة شمسية وقبعة.")
+    advice.append("حذاء مريح للمشي.")
+    return advice
+
+
+def render_weather_markdown(city, days, missing_dates=()):
+    """
+    Render the forecast days as an Arabic Markdown section.
+    """
+    lines = [f"### توقعات الطقس في {city}"]
+    if days:
+        lowest = min(day["min_c"] for day in days)
+        highest = max(day["max_c"] for day in days)
+        max_rain = max(day["rain_chance"] for day in days)
+        lines.append(
+            f"تتراوح درجات الحرارة خلال رحلتك بين **{lowest:.0f}°** و**{highest:.0f}°** مئوية، "
+            f"وأعلى احتمال لهطول الأمطار **{max_rain:.0f}%**."
+        )
+        table = [
+            "| التاريخ | الحالة | الصغرى | العظمى | احتمال المطر | الأمطار (مم) | الرياح (كم/س) |",
+            "|---|---|---|---|---|---|---|",
+        ]
+        for day in days:
+            table.append(
+                f"| {day['date']} | {day['condition']} | {day['min_c']:.0f}° | {day['max_c']:.0f}° "
+                f"| {day['rain_chance']:.0f}% | {day['precip_mm']:.1f} | {day['wind_kph']:.0f} |"
+            )
+        lines.append("\n".join(table))
+        lines.append("### الملابس والتجهيزات المقترحة\n\n" + "\n".join(f"- {item}" for item in clothing_advice(days)))
+    if missing_dates:
+        lines.append(
+            f"*لا تتوفر توقعات بعد للتواريخ: {'، '.join(missing_dates)}. "
+            f"يُنصح بمراجعة النشرة الجوية قبل السفر بأيام.*"
+        )
+    return "\n\n".join(lines)
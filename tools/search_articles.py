@@ -1,16 +1,18 @@
 import sys
-import os
-sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
-from taskflowai import WikipediaTools # type: ignore
 from logger.logger_config import logging
 from exception.custom_exception import CustomException
+from utils.metrics import traced
+from utils.http_client import http_client
+from utils.tool_reducer import reduced
 
 class WikiArticles:
     @classmethod
     def fetch_articles(cls):
         try:
+            from taskflowai import WikipediaTools # type: ignore
+
             logging.info("Fetching articles using WikipediaTools.")
-            articles = WikipediaTools.search_articles
+            articles = traced("tool.wikipedia.search_articles")(reduced("wikipedia")(http_client.guarded("wikipedia")(WikipediaTools.search_articles)))
             logging.info("Articles fetched successfully.")
             return articles
         except Exception as e:
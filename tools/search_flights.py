@@ -1,18 +1,323 @@
 import sys
 import os
-sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
-from taskflowai import AmadeusTools  # type: ignore
+import re
+import threading
+import contextvars
+from concurrent.futures import ThreadPoolExecutor
 from logger.logger_config import logging
 from exception.custom_exception import CustomException
+from utils.metrics import span, traced
+from utils.http_client import http_client
+from utils.ttl_cache import TTLCache
+from utils.gazetteer import Gazetteer
+from utils.dates import expand_dates
+
+DURATION_PATTERN = re.compile(r'^P(?:(\d+)D)?T?(?:(\d+)H)?(?:(\d+)M)?$')
+
+
+def parse_duration(value):
+    """
+    Convert an ISO 8601 duration such as 'PT5H30M' to minutes (None if unparseable).
+    """
+    match = DURATION_PATTERN.match(value or "")
+    if not match or not any(match.groups()):
+        return None
+    days, hours, minutes = (int(part or 0) for part in match.groups())
+    return days * 24 * 60 + hours * 60 + minutes
+
+
+def rank_offers(offers, limit=3):
+    """
+    Order offers by price, then total duration, then departure time and carrier,
+    so identical inputs always give the same top options.
+    """
+    def key(offer):
+        duration = offer["duration_minutes"] if offer["duration_minutes"] is not None else float("inf")
+        return (offer["price"], duration, offer["departure"], offer["carrier"], offer["stops"])
+    return sorted(offers, key=key)[:limit]
+
 
 class SearchFlights:
     @classmethod
     def search_flights_tool(cls):
         try:
+            from taskflowai import AmadeusTools  # type: ignore
+
             logging.info("Initiating flight search using AmadeusTools.")
-            search_flights = AmadeusTools.search_flights
+            search_flights = traced("tool.amadeus.search_flights")(http_client.guarded("amadeus")(AmadeusTools.search_flights))
             logging.info("Flight search initiated successfully.")
             return search_flights
         except Exception as e:
             logging.info("Failed to initiate flight search.")
             raise CustomException(sys, e)
+
+
+class AmadeusFlightSearch:
+    """
+    Structured flight search against the Amadeus REST API, used to build the flights
+    tab without an LLM tool loop. Every departure date is searched concurrently;
+    the OAuth token, location lookups and offers per route and date are cached.
+    """
+    BASE_URL = os.getenv("AMADEUS_BASE_URL", "https://test.api.amadeus.com")
+    API_KEY = os.getenv("AMADEUS_API_KEY")
+    API_SECRET = os.getenv("AMADEUS_API_SECRET")
+    CURRENCY = os.getenv("FLIGHT_CURRENCY", "USD")
+    MAX_DATES = int(os.getenv("FLIGHT_MAX_DATES", "7"))
+    OFFERS_PER_DATE = 10
+    REQUEST_DEADLINE = 15
+    MAX_WORKERS = 4
+
+    # Tokens are refreshed a minute before Amadeus expires them
+    _token_cache = TTLCache(ttl=1500, maxsize=1)
+    _token_lock = threading.Lock()
+    # Prices change quickly, so offers are only reused for a few minutes
+    _offers_cache = TTLCache(ttl=int(os.getenv("FLIGHT_OFFERS_TTL", "600")), maxsize=512)
+    _location_cache = TTLCache(ttl=7 * 24 * 3600, maxsize=1024)
+
+    @classmethod
+    def available(cls):
+        return bool(cls.API_KEY and cls.API_SECRET)
+
+    @classmethod
+    def _token(cls):
+        token = cls._token_cache.get("token")
+        if token is not None:
+            return token
+        with cls._token_lock:
+            # Concurrent date searches wait for one refresh instead of each requesting a token
+            token = cls._token_cache.get("token")
+            if token is not None:
+                return token
+            response = http_client.post(
+                f"{cls.BASE_URL}/v1/security/oauth2/token",
+                provider="amadeus",
+                data={"grant_type": "client_credentials", "client_id": cls.API_KEY, "client_secret": cls.API_SECRET},
+                deadline=cls.REQUEST_DEADLINE,
+            )
+            response.raise_for_status()
+            payload = response.json()
+            token = payload["access_token"]
+            cls._token_cache.set("token", token, ttl=max(60, int(payload.get("expires_in", 1799)) - 60))
+            return token
+
+    @classmethod
+    def _get(cls, path, params):
+        response = http_client.get(
+            f"{cls.BASE_URL}{path}",
+            provider="amadeus",
+            headers={"Authorization": f"Bearer {cls._token()}"},
+            params=params,
+            deadline=cls.REQUEST_DEADLINE,
+        )
+        if response.status_code == 401:
+            # Token revoked or expired early: fetch a new one once
+            cls._token_cache.clear()
+            response = http_client.get(
+                f"{cls.BASE_URL}{path}",
+                provider="amadeus",
+                headers={"Authorization": f"Bearer {cls._token()}"},
+                params=params,
+                deadline=cls.REQUEST_DEADLINE,
+            )
+        response.raise_for_status()
+        return response.json()
+
+    @classmethod
+    def resolve_location(cls, name):
+        """
+        Return the IATA code for a city or airport name: from the gazetteer when the place is known
+        (Arabic spellings included), the name itself if it already is an upper-case code, else an
+        Amadeus lookup. Names the gazetteer knows as several places raise ValueError with the candidates.
+        """
+        places = Gazetteer.candidates(name)
+        if len(places) > 1:
+            options = ", ".join(f"{place.name} ({place.country})" for place in places)
+            raise ValueError(f"'{name}' may refer to several places: {options}")
+        if places and places[0].iata:
+            return places[0].iata
+        name = (name or "").strip()
+        if re.fullmatch(r"[A-Z]{3}", name):
+            return name
+        key = name.lower()
+        cached = cls._location_cache.get(key)
+        if cached is not None:
+            return cached or None
+        data = cls._get("/v1/reference-data/locations", {"subType": "CITY,AIRPORT", "keyword": name, "page[limit]": 1})
+        locations = data.get("data") or []
+        code = locations[0].get("iataCode") if locations else None
+        cls._location_cache.set(key, code or "")
+        return code
+
+    @staticmethod
+    def _parse_offer(offer, dictionaries):
+        itinerary = offer["itineraries"][0]
+        segments = itinerary["segments"]
+        carriers = dictionaries.get("carriers", {})
+        carrier_code = segments[0].get("carrierCode", "")
+        return {
+            "price": float(offer["price"]["grandTotal"]),
+            "currency": offer["price"].get("currency", ""),
+            "carrier": carriers.get(carrier_code, carrier_code),
+            "flight_number": f"{carrier_code}{segments[0].get('number', '')}",
+            "departure": segments[0]["departure"]["at"],
+            "arrival": segments[-1]["arrival"]["at"],
+            "origin": segments[0]["departure"]["iataCode"],
+            "destination": segments[-1]["arrival"]["iataCode"],
+            "duration_minutes": parse_duration(itinerary.get("duration")),
+            "stops": len(segments) - 1,
+        }
+
+    @classmethod
+    def offers_for_date(cls, origin, destination, departure_date):
+        """
+        Return the parsed offers for one route and departure date, from cache when fresh.
+        """
+        key = (origin, destination, departure_date, cls.CURRENCY)
+        cached = cls._offers_cache.get(key)
+        if cached is not None:
+            return cached
+        with span("tool.amadeus.flight_offers"):
+            data = cls._get("/v2/shopping/flight-offers", {
+                "originLocationCode": origin,
+                "destinationLocationCode": destination,
+                "departureDate": departure_date,
+                "adults": 1,
+                "currencyCode": cls.CURRENCY,
+                "max": cls.OFFERS_PER_DATE,
+            })
+        dictionaries = data.get("dictionaries") or {}
+        offers = []
+        for offer in data.get("data") or []:
+            try:
+                offers.append(cls._parse_offer(offer, dictionaries))
+            except (KeyError, IndexError, TypeError, ValueError) as e:
+                logging.debug(f"Skipping malformed flight offer: {e}")
+        cls._offers_cache.set(key, offers)
+        return offers
+
+    @classmethod
+    def _prepare_route(cls, current_location, destination, dates):
+        """
+        Resolve a route to (origin code, destination code, departure dates), or raise ValueError.
+        """
+        origin_code = cls.resolve_location(current_location)
+        destination_code = cls.resolve_location(destination)
+        if not origin_code or not destination_code:
+            raise ValueError(f"Could not resolve airport codes for {current_location} -> {destination}")
+        departure_dates = expand_dates(dates, cls.MAX_DATES)
+        if not departure_dates:
+            raise ValueError("No upcoming departure dates to search")
+        return origin_code, destination_code, departure_dates
+
+    @classmethod
+    @traced("tool.amadeus.search_many")
+    def search_many(cls, routes, limit=3):
+        """
+        Search several (current_location, destination, dates) routes at once, e.g. the legs
+        of a multi-city trip. All routes and departure dates share one worker pool and one
+        OAuth token. Returns one result dict per route, in order, or the exception that
+        route failed with.
+        """
+        prepared = []
+        for route in routes:
+            try:
+                prepared.append(cls._prepare_route(*route))
+            except Exception as e:
+                logging.warning(f"Flight route {route[0]} -> {route[1]} skipped: {e}")
+                prepared.append(e)
+
+        jobs = [
+            (index, route[0], route[1], departure_date)
+            for index, route in enumerate(prepared) if not isinstance(route, Exception)
+            for departure_date in route[2]
+        ]
+
+        def fetch(job):
+            _, origin_code, destination_code, departure_date = job
+            try:
+                return cls.offers_for_date(origin_code, destination_code, departure_date)
+            except Exception as e:
+                logging.warning(f"Flight search {origin_code} -> {destination_code} for {departure_date} failed: {e}")
+                return e
+
+        fetched = {}
+        if jobs:
+            with ThreadPoolExecutor(max_workers=min(cls.MAX_WORKERS, len(jobs))) as executor:
+                # Each worker runs in a copy of the caller's context (plan ID, scheduler priority)
+                futures = [executor.submit(contextvars.copy_context().run, fetch, job) for job in jobs]
+                for job, future in zip(jobs, futures):
+                    fetched.setdefault(job[0], []).append(future.result())
+
+        results = []
+        for index, route in enumerate(prepared):
+            if isinstance(route, Exception):
+                results.append(route)
+                continue
+            origin_code, destination_code, departure_dates = route
+            outcomes = fetched.get(index, [])
+            failures = [outcome for outcome in outcomes if isinstance(outcome, Exception)]
+            if len(failures) == len(outcomes):
+                results.append(failures[0])
+                continue
+            offers = [offer for outcome in outcomes if not isinstance(outcome, Exception) for offer in outcome]
+            logging.info(f"Found {len(offers)} flight offers {origin_code} -> {destination_code} over {len(departure_dates)} date(s).")
+            results.append({
+                "origin": origin_code,
+                "destination": destination_code,
+                "dates": departure_dates,
+                "offers": rank_offers(offers, limit),
+            })
+        return results
+
+    @classmethod
+    @traced("tool.amadeus.search")
+    def search(cls, current_location, destination, dates, limit=3):
+        """
+        Search every departure date concurrently and return a dict with the resolved
+        route, the searched dates and the top `limit` offers.
+        Raises CustomException if the route cannot be resolved or every date fails.
+        """
+        try:
+            result = cls.search_many([(current_location, destination, dates)], limit)[0]
+            if isinstance(result, Exception):
+                raise result
+            return result
+        except Exception as e:
+            logging.info(f"Structured flight search failed: {e}")
+            raise CustomException(e, sys)
+
+
+def _format_minutes(minutes):
+    if minutes is None:
+        return "-"
+    hours, minutes = divmod(minutes, 60)
+    return f"{hours} س {minutes} د"
+
+
+def render_flights_markdown(result, intro=None):
+    """
+    Render the ranked offers as an Arabic Markdown section.
+    """
+    lines = []
+    if intro:
+        lines.append(intro.strip())
+    lines.append(f"**المسار:** {result['origin']} ← {result['destination']}  \n"
+                 f"**التواريخ التي تم البحث فيها:** {'، '.join(result['dates'])}")
+    if not result["offers"]:
+        lines.append("لم يتم العثور على رحلات متاحة لهذه التواريخ.")
+        return "\n\n".join(lines)
+
+    table = [
+        "| # | شركة الطيران | الرحلة | المغادرة | الوصول | المدة | التوقف | السعر |",
+        "|---|---|---|---|---|---|---|---|",
+    ]
+    for i, offer in enumerate(result["offers"], start=1):
+        stops = "مباشرة" if offer["stops"] == 0 else str(offer["stops"])
+        table.append(
+            f"| {i} | {offer['carrier']} | {offer['flight_number']} | {offer['departure'].replace('T', ' ')[:16]} "
+            f"| {offer['arrival'].replace('T', ' ')[:16]} | {_format_minutes(offer['duration_minutes'])} "
+            f"| {stops} | {offer['price']:.2f} {offer['currency']} |"
+        )
+    lines.append("\n".join(table))
+    lines.append("*الأسعار للبالغ الواحد وقد تتغير عند الحجز.*")
+    return "\n\n".join(lines)
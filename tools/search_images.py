@@ -1,57 +1,106 @@
 import sys
 import os
-import requests
-sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+import contextvars
+from concurrent.futures import ThreadPoolExecutor
 from logger.logger_config import logging
 from exception.custom_exception import CustomException
+from utils.ttl_cache import TTLCache
+from utils.metrics import span, traced
+from utils.http_client import http_client
+from utils.single_flight import SingleFlight
+from utils.gazetteer import normalize_name
 
 class PexelsImages:
     API_KEY = os.getenv("PEXELS_API_KEY")  # Use environment variable if available
     BASE_URL = "https://api.pexels.com/v1/search"
+    IMAGE_SIZE = os.getenv("PEXELS_IMAGE_SIZE", "large")  # Pexels 'src' variant: original, large2x, large, medium, ...
+    REQUEST_TIMEOUT = 10
+    VALIDATION_TIMEOUT = 5
+    VALIDATION_WORKERS = 6
+
+    # URL -> validity; Pexels CDN URLs are stable so results are kept for a day
+    _validity_cache = TTLCache(ttl=int(os.getenv("PEXELS_VALIDATION_TTL", "86400")), maxsize=4096)
+    # Query -> validated image URLs; sections running in parallel (and every stop of a
+    # multi-city trip) often ask for the same landmarks, so identical queries share one search
+    _search_cache = TTLCache(ttl=int(os.getenv("PEXELS_SEARCH_TTL", "3600")), maxsize=1024)
+    _search_flight = SingleFlight(lock_dir=None, cross_process=False)
+
     @classmethod
+    @traced("tool.pexels.search_images")
     def search_images(cls, query, per_page=6):
+        key = (normalize_name(query), per_page)
+        cached = cls._search_cache.get(key)
+        if cached is not None:
+            logging.info(f"Pexels search cache hit for query: {query}")
+            return list(cached)
+        image_urls, _ = cls._search_flight.do(key, lambda: cls._search_images(query, per_page))
+        if image_urls:
+            cls._search_cache.set(key, image_urls)
+        return list(image_urls) if image_urls else image_urls
+
+    @classmethod
+    def _search_images(cls, query, per_page):
         try:
             logging.info(f"Searching images on Pexels with query: {query}")
             headers = {"Authorization": cls.API_KEY}
             params = {"query": query, "per_page": per_page}
-            response = requests.get(cls.BASE_URL, headers=headers, params=params)
+            response = http_client.get(cls.BASE_URL, provider="pexels", headers=headers, params=params,
+                                       deadline=cls.REQUEST_TIMEOUT)
             response.raise_for_status()
             images = response.json().get("photos", [])
-            #return images
-            
+
+            image_urls = [cls._pick_src(image) for image in images]
+            image_urls = [url for url in image_urls if url]
+
+            # Validate all candidates at once instead of one HEAD request after another
+            with ThreadPoolExecutor(max_workers=min(cls.VALIDATION_WORKERS, max(1, len(image_urls)))) as executor:
+                futures = [executor.submit(contextvars.copy_context().run, cls.is_image_url_valid, url)
+                           for url in image_urls]
+                validity = [future.result() for future in futures]
+
             valid_images = []
-            
-            for image in images:
-                image_url = image.get("src", {}).get("original")  # Use 'original' for the highest quality image
-                if cls.is_image_url_valid(image_url):
+            for image_url, is_valid in zip(image_urls, validity):
+                if is_valid:
                     valid_images.append(image_url)
                 else:
                     logging.info(f"Image URL {image_url} is not valid. Searching for another valid image.")
-            
+
             if not valid_images:
                 logging.warning("No valid images found.")
                 return None
-            
+
             logging.info("Images searched successfully.")
             return valid_images
-        
+
         except Exception as e:
             logging.error("Failed to search images from Pexels.")
-            raise CustomException(sys, e)
+            raise CustomException(e, sys)
 
-    @staticmethod
-    def is_image_url_valid(url: str) -> bool:
+    @classmethod
+    def _pick_src(cls, image):
+        """
+        Return the configured 'src' variant of a Pexels photo, falling back to 'original'.
+        """
+        src = image.get("src", {})
+        return src.get(cls.IMAGE_SIZE) or src.get("original")
+
+    @classmethod
+    def is_image_url_valid(cls, url: str) -> bool:
         """
         Check if the image URL returns a valid image response (status code 200 and image content-type).
+        Results are cached so known-good URLs are not checked again.
         """
+        cached = cls._validity_cache.get(url)
+        if cached is not None:
+            return cached
         try:
-            response = requests.head(url, allow_redirects=True, timeout=5)
-            logging.info(f"Image URL: {url}")
-            logging.info(f"Response: {response.status_code}")
+            with span("tool.pexels.validate_image"):
+                response = http_client.head(url, allow_redirects=True, deadline=cls.VALIDATION_TIMEOUT, retries=0)
             content_type = response.headers.get('Content-Type', '')
-            logging.info(f"Content-Type: {content_type}")
-            return response.status_code == 200 and content_type.startswith('image/')
+            logging.debug(f"Image URL: {url} Response: {response.status_code} Content-Type: {content_type}")
+            is_valid = response.status_code == 200 and content_type.startswith('image/')
+            cls._validity_cache.set(url, is_valid)
+            return is_valid
         except Exception as e:
             logging.warning(f"Invalid image URL check failed: {url} → {e}")
             return False
-        
\ No newline at end of file
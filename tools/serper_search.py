@@ -1,16 +1,18 @@
 import sys
-import os
-sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
-from taskflowai import WebTools # type: ignore
 from logger.logger_config import logging
 from exception.custom_exception import CustomException
+from utils.metrics import traced
+from utils.http_client import http_client
+from utils.tool_reducer import reduced
 
 class SerperSearch:
     @classmethod
     def search_web(cls):
         try:
+            from taskflowai import WebTools # type: ignore
+
             logging.info("Performing web search using SerperSearch tool.")
-            search = WebTools.serper_search
+            search = traced("tool.serper.search")(reduced("serper")(http_client.guarded("serper")(WebTools.serper_search)))
             logging.info("Web search completed successfully.")
             return search
         except Exception as e:
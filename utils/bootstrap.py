@@ -0,0 +1,47 @@
+import os
+import threading
+from logger.logger_config import logging
+
+# API keys without which no plan can be generated
+REQUIRED_KEYS = [
+    "GROQ_API_KEY"
+]
+
+_initialized = {"environment": False, "taskflowai": False}
+_lock = threading.Lock()
+
+
+def init_environment():
+    """
+    Load the .env file and validate the required API keys, once per process.
+    Entry points call this before importing modules that read their settings at import time.
+    """
+    if _initialized["environment"]:
+        return
+    with _lock:
+        if _initialized["environment"]:
+            return
+        from dotenv import load_dotenv  # type: ignore
+
+        load_dotenv()
+        missing_keys = [key for key in REQUIRED_KEYS if not os.getenv(key)]
+        if missing_keys:
+            raise EnvironmentError("Missing required environment variables: " + ', '.join(missing_keys))
+        _initialized["environment"] = True
+        logging.info("Environment initialized.")
+
+
+def init_taskflowai():
+    """
+    Import and configure taskflowai; called right before the first agent or model is built.
+    """
+    if _initialized["taskflowai"]:
+        return
+    init_environment()
+    with _lock:
+        if _initialized["taskflowai"]:
+            return
+        from taskflowai import set_verbosity  # type: ignore
+
+        set_verbosity(os.getenv("TASKFLOWAI_VERBOSE", "1") == "1")
+        _initialized["taskflowai"] = True
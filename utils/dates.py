@@ -0,0 +1,15 @@
+from datetime import date, timedelta
+
+
+def expand_dates(dates, max_dates=7, today=None):
+    """
+    Turn the UI date selection (one date or a [start, end] range) into the list of
+    trip dates, skipping past dates and capping the range at `max_dates`.
+    """
+    parsed = sorted(date.fromisoformat(str(d)[:10]) for d in dates or [])
+    if not parsed:
+        return []
+    start = max(parsed[0], today or date.today())
+    end = parsed[-1]
+    days = (end - start).days + 1
+    return [(start + timedelta(days=i)).isoformat() for i in range(min(max(days, 0), max_dates))]
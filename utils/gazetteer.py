@@ -0,0 +1,232 @@
+import os
+import re
+import json
+import threading
+import unicodedata
+from collections import namedtuple
+from logger.logger_config import logging
+
+# `kind` is "city" or "country"; a country's `iata` is the code flights to it use
+Place = namedtuple("Place", ["name", "iata", "country", "kind"], defaults=("city",))
+
+# Harakat, tanween, shadda, sukun, superscript alef and tatweel
+_ARABIC_MARKS = re.compile(r"[\u0610-\u061A\u064B-\u065F\u0670\u06D6-\u06ED\u0640]")
+_ARABIC_LETTERS = str.maketrans({
+    "أ": "ا", "إ": "ا", "آ": "ا", "ٱ": "ا",
+    "ة": "ه",
+    "ى": "ي",
+    "ؤ": "و",
+    "ئ": "ي",
+})
+_PUNCTUATION = re.compile(r"[^\w\s]+|_")
+_WHITESPACE = re.compile(r"\s+")
+_IATA_CODE = re.compile(r"[A-Z]{3}")
+
+# Words that often precede or follow a city name without changing it
+_FILLER_WORDS = {"مدينه", "city", "of", "the", "الى", "الي", "في"}
+
+# Canonical name, IATA city/airport code, country, then extra Arabic and Latin spellings.
+# Alef/hamza variants, taa marbuta and diacritics are handled by normalize_name.
+BUILTIN_PLACES = [
+    ("Cairo", "CAI", "Egypt", ["القاهرة", "el cairo", "al qahira"]),
+    ("Alexandria", "HBE", "Egypt", ["الإسكندرية", "اسكندرية", "alex", "alexandrie"]),
+    ("Sharm El Sheikh", "SSH", "Egypt", ["شرم الشيخ", "شرم", "sharm"]),
+    ("Hurghada", "HRG", "Egypt", ["الغردقة", "ghardaqa"]),
+    ("Luxor", "LXR", "Egypt", ["الأقصر", "اقصر"]),
+    ("Aswan", "ASW", "Egypt", ["أسوان"]),
+    ("Dubai", "DXB", "United Arab Emirates", ["دبي", "dubay"]),
+    ("Abu Dhabi", "AUH", "United Arab Emirates", ["أبوظبي", "أبو ظبي", "abudhabi"]),
+    ("Riyadh", "RUH", "Saudi Arabia", ["الرياض", "riyad", "ar riyadh"]),
+    ("Jeddah", "JED", "Saudi Arabia", ["جدة", "jidda", "jedda", "jiddah"]),
+    ("Mecca", "JED", "Saudi Arabia", ["مكة", "مكة المكرمة", "makkah", "makka"]),
+    ("Medina", "MED", "Saudi Arabia", ["المدينة المنورة", "madinah", "al madinah"]),
+    ("Doha", "DOH", "Qatar", ["الدوحة"]),
+    ("Kuwait City", "KWI", "Kuwait", ["مدينة الكويت", "kuwait city"]),
+    ("Manama", "BAH", "Bahrain", ["المنامة"]),
+    ("Muscat", "MCT", "Oman", ["مسقط", "masqat"]),
+    ("Amman", "AMM", "Jordan", ["عمان", "عمّان"]),
+    ("Beirut", "BEY", "Lebanon", ["بيروت", "beyrouth"]),
+    ("Damascus", "DAM", "Syria", ["دمشق", "الشام", "dimashq"]),
+    ("Baghdad", "BGW", "Iraq", ["بغداد"]),
+    ("Tunis", "TUN", "Tunisia", ["تونس"]),
+    ("Algiers", "ALG", "Algeria", ["الجزائر", "alger"]),
+    ("Casablanca", "CMN", "Morocco", ["الدار البيضاء", "كازابلانكا", "casa"]),
+    ("Marrakesh", "RAK", "Morocco", ["مراكش", "marrakech"]),
+    ("Rabat", "RBA", "Morocco", ["الرباط"]),
+    ("Istanbul", "IST", "Turkey", ["إسطنبول", "اسطنبول", "استانبول", "stamboul"]),
+    ("Antalya", "AYT", "Turkey", ["أنطاليا", "انطاليا"]),
+    ("Trabzon", "TZX", "Turkey", ["طرابزون"]),
+    ("Baku", "GYD", "Azerbaijan", ["باكو"]),
+    ("Tbilisi", "TBS", "Georgia", ["تبليسي"]),
+    ("Paris", "PAR", "France", ["باريس"]),
+    ("London", "LON", "United Kingdom", ["لندن", "londres"]),
+    ("Rome", "ROM", "Italy", ["روما", "roma"]),
+    ("Milan", "MIL", "Italy", ["ميلانو", "ميلان", "milano"]),
+    ("Madrid", "MAD", "Spain", ["مدريد"]),
+    ("Barcelona", "BCN", "Spain", ["برشلونة"]),
+    ("Berlin", "BER", "Germany", ["برلين"]),
+    ("Munich", "MUC", "Germany", ["ميونخ", "ميونيخ", "munchen", "muenchen"]),
+    ("Vienna", "VIE", "Austria", ["فيينا", "wien"]),
+    ("Amsterdam", "AMS", "Netherlands", ["أمستردام", "امستردام"]),
+    ("Geneva", "GVA", "Switzerland", ["جنيف", "geneve", "genf"]),
+    ("Zurich", "ZRH", "Switzerland", ["زيورخ", "zuerich"]),
+    ("Prague", "PRG", "Czech Republic", ["براغ", "praha"]),
+    ("Athens", "ATH", "Greece", ["أثينا", "athina"]),
+    ("Moscow", "MOW", "Russia", ["موسكو", "moskva"]),
+    ("New York", "NYC", "United States", ["نيويورك", "nyc", "new york city"]),
+    ("Los Angeles", "LAX", "United States", ["لوس أنجلوس", "لوس انجلس"]),
+    ("Tokyo", "TYO", "Japan", ["طوكيو"]),
+    ("Seoul", "SEL", "South Korea", ["سيول", "سول"]),
+    ("Bangkok", "BKK", "Thailand", ["بانكوك"]),
+    ("Kuala Lumpur", "KUL", "Malaysia", ["كوالالمبور", "كوالا لمبور", "kl"]),
+    ("Singapore", "SIN", "Singapore", ["سنغافورة"]),
+    ("Jakarta", "JKT", "Indonesia", ["جاكرتا"]),
+    ("Bali", "DPS", "Indonesia", ["بالي", "denpasar"]),
+    ("Male", "MLE", "Maldives", ["ماليه", "malé"]),
+]
+
+# Countries users often type instead of a city, with the airport code used to fly there.
+# A name shared with a city (عمان: Oman or Amman) is ambiguous and resolves to neither.
+BUILTIN_COUNTRIES = [
+    ("Bahrain", "BAH", "Bahrain", ["البحرين"]),
+    ("Kuwait", "KWI", "Kuwait", ["الكويت", "دولة الكويت"]),
+    ("Maldives", "MLE", "Maldives", ["المالديف", "جزر المالديف"]),
+    ("Oman", "MCT", "Oman", ["عمان", "سلطنة عمان"]),
+]
+
+
+def normalize_name(text):
+    """
+    Fold Arabic and Latin spellings of a name to one form: diacritics and tatweel removed,
+    alef/hamza variants, taa marbuta and alef maksura unified, accents stripped,
+    punctuation dropped, lowercased and whitespace collapsed.
+    """
+    text = _ARABIC_MARKS.sub("", str(text or "")).translate(_ARABIC_LETTERS)
+    text = unicodedata.normalize("NFKD", text)
+    text = "".join(ch for ch in text if not unicodedata.combining(ch))
+    text = _PUNCTUATION.sub(" ", text)
+    return _WHITESPACE.sub(" ", text).strip().lower()
+
+
+def _variants(normalized):
+    """
+    Yield lookup forms of a normalized name: as is, without filler words,
+    and without the Arabic definite article on each word.
+    """
+    yield normalized
+    words = [word for word in normalized.split() if word not in _FILLER_WORDS]
+    yield " ".join(words)
+    yield " ".join(word[2:] if word.startswith("ال") and len(word) > 4 else word for word in words)
+
+
+class Gazetteer:
+    """
+    In-memory hash index from normalized Arabic/Latin place names to canonical places.
+    Built once per process from BUILTIN_PLACES, BUILTIN_COUNTRIES and the optional JSON
+    file in GAZETTEER_PATH ([{"name": ..., "iata": ..., "country": ..., "kind": ..., "aliases": [...]}]).
+
+    IATA codes only match as typed in upper case ("MAD", not "mad"), and a name that
+    belongs to several places returns all of them from `candidates` and None from `lookup`.
+    """
+    _index = None
+    _lock = threading.Lock()
+
+    @classmethod
+    def _build(cls):
+        entries = [
+            {"name": name, "iata": iata, "country": country, "aliases": aliases}
+            for name, iata, country, aliases in BUILTIN_PLACES
+        ] + [
+            {"name": name, "iata": iata, "country": country, "kind": "country", "aliases": aliases}
+            for name, iata, country, aliases in BUILTIN_COUNTRIES
+        ]
+        path = os.getenv("GAZETTEER_PATH")
+        if path:
+            try:
+                with open(path, encoding="utf-8") as f:
+                    entries.extend(json.load(f))
+            except (OSError, ValueError) as e:
+                logging.warning(f"Failed to load gazetteer from {path}: {e}")
+
+        # Later entries (the user's file) replace built-in ones with the same name and keep their aliases
+        places = {}
+        for entry in entries:
+            key = normalize_name(entry["name"])
+            aliases = places[key][1] if key in places else []
+            places[key] = (
+                Place(entry["name"], entry.get("iata"), entry.get("country"), entry.get("kind", "city")),
+                aliases + [entry["name"]] + list(entry.get("aliases", [])),
+            )
+
+        codes, names, derived = {}, {}, {}
+        for place, aliases in places.values():
+            if place.iata:
+                # Several places can share an airport (Mecca flies via Jeddah); the first one owns the code
+                codes.setdefault(place.iata.upper(), place)
+            for alias in aliases:
+                exact, *others = _variants(normalize_name(alias))
+                _add(names, exact, place)
+                for variant in others:
+                    _add(derived, variant, place)
+        index = {"codes": codes, "names": names, "derived": derived}
+        logging.info(f"Gazetteer index built with {len(names) + len(derived)} names and {len(codes)} codes.")
+        return index
+
+    @classmethod
+    def index(cls):
+        if cls._index is None:
+            with cls._lock:
+                if cls._index is None:
+                    cls._index = cls._build()
+        return cls._index
+
+    @classmethod
+    def candidates(cls, text):
+        """
+        Return every Place a user-typed name may refer to: one for a known name,
+        several for an ambiguous one (e.g. عمان), none for an unknown one.
+        """
+        index = cls.index()
+        raw = str(text or "").strip()
+        if _IATA_CODE.fullmatch(raw) and raw in index["codes"]:
+            return [index["codes"][raw]]
+        # A spelling given exactly wins over one that only matches without filler words or "ال"
+        for variant in _variants(normalize_name(raw)):
+            places = index["names"].get(variant) or index["derived"].get(variant)
+            if variant and places:
+                return list(places)
+        return []
+
+    @classmethod
+    def lookup(cls, text):
+        """
+        Return the Place for a user-typed name, or None if it is unknown or ambiguous.
+        """
+        places = cls.candidates(text)
+        return places[0] if len(places) == 1 else None
+
+    @classmethod
+    def canonical_name(cls, text):
+        """
+        The canonical English name for known places, the stripped input otherwise.
+        """
+        place = cls.lookup(text)
+        return place.name if place else str(text or "").strip()
+
+    @classmethod
+    def canonical_key(cls, text):
+        """
+        Cache key form of a place name: every spelling of a known place shares one key.
+        """
+        place = cls.lookup(text)
+        return normalize_name(place.name) if place else normalize_name(text)
+
+    @classmethod
+    def reload(cls):
+        with cls._lock:
+            cls._index = None
+
+
+def _add(index, name, place):
+    if name and place not in index.setdefault(name, []):
+        index[name].append(place)
@@ -0,0 +1,313 @@
+import os
+import time
+import random
+import asyncio
+import threading
+from functools import wraps, partial
+from urllib.parse import urlparse
+import requests
+from requests.adapters import HTTPAdapter
+from logger.logger_config import logging
+from utils.metrics import span
+from utils.scheduler import scheduler, is_rate_limit_error
+
+# Connect and read timeouts applied to every call that does not pass its own
+HTTP_CONNECT_TIMEOUT = float(os.getenv("HTTP_CONNECT_TIMEOUT", "3.05"))
+HTTP_READ_TIMEOUT = float(os.getenv("HTTP_READ_TIMEOUT", "10"))
+# Retries after the first attempt for connection errors, timeouts, 429 and 5xx responses
+HTTP_RETRIES = int(os.getenv("HTTP_RETRIES", "2"))
+HTTP_BACKOFF_BASE = float(os.getenv("HTTP_BACKOFF_BASE", "0.25"))
+HTTP_BACKOFF_MAX = float(os.getenv("HTTP_BACKOFF_MAX", "4"))
+# Number of hosts with a cached keep-alive pool, and connections kept per host
+HTTP_POOL_HOSTS = int(os.getenv("HTTP_POOL_HOSTS", "16"))
+HTTP_POOL_MAXSIZE = int(os.getenv("HTTP_POOL_MAXSIZE", "10"))
+# Consecutive failures that open a provider's circuit, and seconds before a trial call
+CIRCUIT_FAILURE_THRESHOLD = int(os.getenv("CIRCUIT_FAILURE_THRESHOLD", "5"))
+CIRCUIT_RESET_TIMEOUT = float(os.getenv("CIRCUIT_RESET_TIMEOUT", "30"))
+
+PROVIDER_HOSTS = {
+    "api.groq.com": "groq",
+    "google.serper.dev": "serper",
+    "test.api.amadeus.com": "amadeus",
+    "api.amadeus.com": "amadeus",
+    "api.weatherapi.com": "weather",
+    "en.wikipedia.org": "wikipedia",
+    "api.pexels.com": "pexels",
+    "images.pexels.com": "pexels_images",
+}
+
+RETRY_STATUSES = frozenset({429, 500, 502, 503, 504})
+IDEMPOTENT_METHODS = frozenset({"GET", "HEAD", "OPTIONS", "PUT", "DELETE"})
+
+
+def provider_for(url):
+    """
+    Map a URL to its provider name; unknown hosts are their own provider.
+    """
+    host = urlparse(url).hostname or ""
+    return PROVIDER_HOSTS.get(host, host or "unknown")
+
+
+class CircuitOpenError(Exception):
+    """
+    Raised without touching the network while a provider's circuit is open.
+    """
+
+    def __init__(self, provider, retry_in):
+        super().__init__(f"Circuit for {provider} is open; retry in {retry_in:.1f}s")
+        self.provider = provider
+        self.retry_in = retry_in
+
+
+class CircuitBreaker:
+    """
+    Per-provider circuit breaker.
+    After `failure_threshold` consecutive failures the circuit opens and calls fail
+    immediately; after `reset_timeout` seconds one trial call is let through
+    (half-open) and its outcome closes or re-opens the circuit.
+    """
+
+    def __init__(self, provider, failure_threshold=CIRCUIT_FAILURE_THRESHOLD, reset_timeout=CIRCUIT_RESET_TIMEOUT):
+        self.provider = provider
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self._failures = 0
+        self._opened_at = None
+        self._trial_in_flight = False
+        self._lock = threading.Lock()
+
+    @property
+    def state(self):
+        with self._lock:
+            return self._state()
+
+    def _state(self):
+        if self._opened_at is None:
+            return "closed"
+        if time.monotonic() - self._opened_at >= self.reset_timeout:
+            return "half_open"
+        return "open"
+
+    def before_call(self):
+        """
+        Raise CircuitOpenError if the call must not go out.
+        """
+        with self._lock:
+            state = self._state()
+            if state == "closed":
+                return
+            if state == "half_open" and not self._trial_in_flight:
+                self._trial_in_flight = True
+                return
+            retry_in = max(0.0, self.reset_timeout - (time.monotonic() - self._opened_at))
+        raise CircuitOpenError(self.provider, retry_in)
+
+    def release(self):
+        """
+        Give back a half-open trial that was admitted but never sent.
+        """
+        with self._lock:
+            self._trial_in_flight = False
+
+    def record_success(self):
+        with self._lock:
+            if self._opened_at is not None:
+                logging.info(f"Circuit for {self.provider} closed.")
+            self._failures = 0
+            self._opened_at = None
+            self._trial_in_flight = False
+
+    def record_failure(self):
+        with self._lock:
+            self._failures += 1
+            was_trial = self._trial_in_flight
+            self._trial_in_flight = False
+            if was_trial or self._failures >= self.failure_threshold:
+                if self._opened_at is None or was_trial:
+                    logging.warning(f"Circuit for {self.provider} opened after {self._failures} failure(s).")
+                self._opened_at = time.monotonic()
+
+    def stats(self):
+        with self._lock:
+            return {"state": self._state(), "failures": self._failures}
+
+
+class HttpClient:
+    """
+    Shared HTTP client for the tools and the app.
+    One keep-alive session pools connections per host; every call gets a timeout,
+    an optional overall deadline, retries with jittered exponential backoff and the
+    circuit breaker of its provider. Calls to rate-limited providers first wait for
+    their turn in the scheduler (utils/scheduler.py), once the circuit lets them through.
+    """
+
+    def __init__(self, timeout=(HTTP_CONNECT_TIMEOUT, HTTP_READ_TIMEOUT), retries=HTTP_RETRIES,
+                 pool_hosts=HTTP_POOL_HOSTS, pool_maxsize=HTTP_POOL_MAXSIZE):
+        self.timeout = timeout
+        self.retries = retries
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=pool_hosts, pool_maxsize=pool_maxsize)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+        self._breakers = {}
+        self._lock = threading.Lock()
+
+    def breaker(self, provider):
+        breaker = self._breakers.get(provider)
+        if breaker is not None:
+            return breaker
+        with self._lock:
+            return self._breakers.setdefault(provider, CircuitBreaker(provider))
+
+    @staticmethod
+    def _backoff(attempt):
+        # Full jitter keeps retrying workers from hitting a provider in lockstep
+        return random.uniform(0, min(HTTP_BACKOFF_MAX, HTTP_BACKOFF_BASE * (2 ** attempt)))
+
+    def _attempt_timeout(self, timeout, deadline):
+        if deadline is None:
+            return timeout
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            raise requests.Timeout("Deadline exceeded before the request was sent")
+        if isinstance(timeout, tuple):
+            return tuple(min(value, remaining) for value in timeout)
+        return min(timeout, remaining)
+
+    def request(self, method, url, provider=None, timeout=None, deadline=None, retries=None, **kwargs):
+        """
+        Send a request and return the `requests.Response`.
+        `deadline` is a total time budget in seconds across all attempts.
+        Responses with a retryable status are returned once retries are exhausted;
+        connection errors and timeouts are raised.
+        """
+        method = method.upper()
+        provider = provider or provider_for(url)
+        breaker = self.breaker(provider)
+        timeout = self.timeout if timeout is None else timeout
+        retries = self.retries if retries is None else retries
+        if method not in IDEMPOTENT_METHODS:
+            retries = 0
+        deadline_at = None if deadline is None else time.monotonic() + deadline
+
+        attempt = 0
+        while True:
+            # An open circuit fails fast without using up the provider's rate budget
+            breaker.before_call()
+            try:
+                scheduler.acquire(provider)
+            except BaseException:
+                breaker.release()
+                raise
+            try:
+                with span(f"http.{provider}", method=method):
+                    response = self.session.request(
+                        method, url, timeout=self._attempt_timeout(timeout, deadline_at), **kwargs
+                    )
+            except (requests.ConnectionError, requests.Timeout) as e:
+                breaker.record_failure()
+                if not self._sleep_before_retry(attempt, retries, deadline_at):
+                    raise
+                logging.info(f"Retrying {method} {url} after {type(e).__name__}.")
+                attempt += 1
+                continue
+            except BaseException:
+                # Any other error (SSL, redirects, invalid URL, ...) still ends a half-open trial
+                breaker.record_failure()
+                raise
+
+            if response.status_code in RETRY_STATUSES:
+                breaker.record_failure()
+                if response.status_code == 429:
+                    scheduler.rate_limited(provider, _retry_after(response))
+                if self._sleep_before_retry(attempt, retries, deadline_at, response):
+                    logging.info(f"Retrying {method} {url} after HTTP {response.status_code}.")
+                    response.close()
+                    attempt += 1
+                    continue
+            else:
+                breaker.record_success()
+            return response
+
+    def _sleep_before_retry(self, attempt, retries, deadline_at, response=None):
+        """
+        Sleep before the next attempt; return False when no attempt is left.
+        """
+        if attempt >= retries:
+            return False
+        delay = self._backoff(attempt)
+        retry_after = _retry_after(response) if response is not None else None
+        if retry_after is not None:
+            delay = max(delay, retry_after)
+        if deadline_at is not None and time.monotonic() + delay >= deadline_at:
+            return False
+        time.sleep(delay)
+        return True
+
+    def get(self, url, **kwargs):
+        return self.request("GET", url, **kwargs)
+
+    def head(self, url, **kwargs):
+        return self.request("HEAD", url, **kwargs)
+
+    def post(self, url, **kwargs):
+        return self.request("POST", url, **kwargs)
+
+    async def arequest(self, method, url, **kwargs):
+        """
+        Async form of `request`; the blocking call runs in the default executor.
+        """
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(None, partial(self.request, method, url, **kwargs))
+
+    async def aget(self, url, **kwargs):
+        return await self.arequest("GET", url, **kwargs)
+
+    def guarded(self, provider):
+        """
+        Decorator that puts a call made outside this client (e.g. a taskflowai tool
+        with its own connections) behind the circuit breaker and the scheduler queue
+        of `provider`.
+        """
+        breaker = self.breaker(provider)
+
+        def decorator(func):
+            @wraps(func)
+            def wrapper(*args, **kwargs):
+                breaker.before_call()
+                try:
+                    scheduler.acquire(provider)
+                except BaseException:
+                    breaker.release()
+                    raise
+                try:
+                    result = func(*args, **kwargs)
+                except BaseException as e:
+                    breaker.record_failure()
+                    if isinstance(e, Exception) and is_rate_limit_error(e):
+                        scheduler.rate_limited(provider)
+                    raise
+                breaker.record_success()
+                return result
+            return wrapper
+        return decorator
+
+    def stats(self):
+        """
+        Return the circuit state and consecutive failures per provider.
+        """
+        with self._lock:
+            breakers = dict(self._breakers)
+        return {provider: breaker.stats() for provider, breaker in sorted(breakers.items())}
+
+
+def _retry_after(response):
+    """
+    Seconds from a numeric Retry-After header, or None.
+    """
+    value = response.headers.get("Retry-After")
+    return float(value) if value and value.isdigit() else None
+
+
+# Process-wide client shared by every tool and the app
+http_client = HttpClient()
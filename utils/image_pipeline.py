@@ -0,0 +1,239 @@
+import sys
+import os
+import re
+import time
+import hashlib
+import threading
+import contextvars
+from io import BytesIO
+from concurrent.futures import ThreadPoolExecutor
+from logger.logger_config import logging
+from exception.custom_exception import CustomException
+from utils.http_client import http_client
+
+# Markdown image tag: ![alt](url)
+IMAGE_PATTERN = re.compile(r'!\[(.*?)\]\((.*?)\)')
+
+IMAGE_EXTENSIONS = ('.jpg', '.jpeg', '.png', '.gif', '.bmp', '.webp')
+
+
+def normalize_image_url(url):
+    """
+    Strip the URL and make sure it has an http(s) scheme.
+    """
+    url = url.strip()
+    if not url.startswith(("http://", "https://")):
+        if url.startswith("//"):
+            url = "https:" + url
+        else:
+            url = "https://" + url
+    return url
+
+
+def has_image_extension(url):
+    return url.lower().endswith(IMAGE_EXTENSIONS)
+
+
+def extract_image_urls(markdown_text):
+    """
+    Return the (alt_text, url) pairs of every Markdown image in the text, in order.
+    """
+    return [(alt, normalize_image_url(url)) for alt, url in IMAGE_PATTERN.findall(markdown_text or "")]
+
+
+def _map_in_context(executor, func, urls):
+    """
+    Run func(url) for every url on the executor, each in a copy of the caller's context
+    (plan ID, scheduler priority); returns a dict of url -> result.
+    """
+    futures = [executor.submit(contextvars.copy_context().run, func, url) for url in urls]
+    return {url: future.result() for url, future in zip(urls, futures)}
+
+
+class ThumbnailCache:
+    """
+    Disk-backed LRU cache of image files keyed by image URL (PNG thumbnails by default).
+    Recency is tracked with file modification times; the oldest files are
+    removed once the total size exceeds `max_bytes`.
+    """
+
+    def __init__(self, directory=None, max_bytes=None, extension=".png"):
+        self.directory = directory or os.getenv(
+            "THUMBNAIL_CACHE_DIR",
+            os.path.join(os.path.dirname(os.path.dirname(__file__)), "cache", "thumbnails")
+        )
+        self.max_bytes = max_bytes or int(os.getenv("THUMBNAIL_CACHE_MAX_BYTES", str(50 * 1024 * 1024)))
+        self.extension = extension
+        self._lock = threading.Lock()
+
+    def _path(self, url):
+        return os.path.join(self.directory, hashlib.sha256(url.encode("utf-8")).hexdigest() + self.extension)
+
+    def get(self, url):
+        path = self._path(url)
+        try:
+            with open(path, "rb") as f:
+                data = f.read()
+            os.utime(path, None)
+            return data
+        except FileNotFoundError:
+            return None
+
+    def set(self, url, data):
+        path = self._path(url)
+        tmp_path = f"{path}.{threading.get_ident()}.tmp"
+        # Created on first write so importing the module has no filesystem side effects
+        os.makedirs(self.directory, exist_ok=True)
+        with open(tmp_path, "wb") as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+        self._evict()
+
+    def clear(self):
+        """
+        Delete every cached file (used by the benchmarks to measure cold runs).
+        """
+        with self._lock:
+            if not os.path.isdir(self.directory):
+                return
+            for entry in os.scandir(self.directory):
+                if entry.name.endswith(self.extension):
+                    try:
+                        os.remove(entry.path)
+                    except FileNotFoundError:
+                        pass
+
+    def _evict(self):
+        with self._lock:
+            entries = []
+            for entry in os.scandir(self.directory):
+                if entry.name.endswith(self.extension):
+                    stat = entry.stat()
+                    entries.append((stat.st_mtime, stat.st_size, entry.path))
+            total = sum(size for _, size, _ in entries)
+            for _, size, path in sorted(entries):
+                if total <= self.max_bytes:
+                    break
+                try:
+                    os.remove(path)
+                    total -= size
+                except FileNotFoundError:
+                    pass
+
+
+class ImagePipeline:
+    """
+    Fetches report images concurrently and keeps their thumbnails in a disk cache,
+    so tabs and reruns draw images without going back to the network.
+    """
+    THUMBNAIL_SIZE = (100, 50)
+    FETCH_TIMEOUT = 5
+    MAX_WORKERS = int(os.getenv("IMAGE_FETCH_WORKERS", "6"))
+
+    # Print-resolution copies used by the PDF export
+    PRINT_MAX_SIZE = (int(os.getenv("PDF_IMAGE_MAX_PX", "1200")),) * 2
+    PRINT_JPEG_QUALITY = int(os.getenv("PDF_IMAGE_QUALITY", "80"))
+    PRINT_FETCH_TIMEOUT = 10
+
+    _cache = ThumbnailCache()
+    _print_cache = ThumbnailCache(
+        directory=os.getenv(
+            "PRINT_IMAGE_CACHE_DIR",
+            os.path.join(os.path.dirname(os.path.dirname(__file__)), "cache", "print_images")
+        ),
+        max_bytes=int(os.getenv("PRINT_IMAGE_CACHE_MAX_BYTES", str(200 * 1024 * 1024))),
+        extension=".jpg"
+    )
+
+    @classmethod
+    def _fetch_thumbnail(cls, url):
+        from PIL import Image
+
+        cached = cls._cache.get(url)
+        if cached is not None:
+            return cached
+        try:
+            start = time.perf_counter()
+            response = http_client.get(url, deadline=cls.FETCH_TIMEOUT)
+            response.raise_for_status()
+            image = Image.open(BytesIO(response.content))
+            image.thumbnail(cls.THUMBNAIL_SIZE)
+            buffer = BytesIO()
+            image.save(buffer, format="PNG")
+            data = buffer.getvalue()
+            cls._cache.set(url, data)
+            logging.debug(f"Thumbnail for {url} built in {time.perf_counter() - start:.2f}s")
+            return data
+        except Exception as e:
+            logging.warning(f"Failed to fetch thumbnail for {url}: {e}")
+            return None
+
+    @classmethod
+    def prefetch(cls, urls):
+        """
+        Fetch and thumbnail all `urls` with a bounded thread pool.
+        Returns a dict of url -> PNG bytes (None for images that failed).
+        """
+        try:
+            unique_urls = list(dict.fromkeys(urls))
+            if not unique_urls:
+                return {}
+            with ThreadPoolExecutor(max_workers=min(cls.MAX_WORKERS, len(unique_urls))) as executor:
+                return _map_in_context(executor, cls._fetch_thumbnail, unique_urls)
+        except Exception as e:
+            logging.error("Failed to prefetch report images.")
+            raise CustomException(e, sys)
+
+    @classmethod
+    def thumbnails_for(cls, markdown_text):
+        """
+        Prefetch thumbnails for every image in the report that cannot be embedded directly.
+        """
+        urls = [url for _, url in extract_image_urls(markdown_text) if not has_image_extension(url)]
+        return cls.prefetch(urls)
+
+    @classmethod
+    def _fetch_print_image(cls, url):
+        from PIL import Image
+
+        cached = cls._print_cache.get(url)
+        if cached is not None:
+            return cached
+        try:
+            start = time.perf_counter()
+            response = http_client.get(url, deadline=cls.PRINT_FETCH_TIMEOUT)
+            response.raise_for_status()
+            image = Image.open(BytesIO(response.content))
+            image.draft("RGB", cls.PRINT_MAX_SIZE)
+            image.thumbnail(cls.PRINT_MAX_SIZE)
+            if image.mode != "RGB":
+                # JPEG has no alpha channel: flatten transparent images onto white
+                rgba = image.convert("RGBA")
+                image = Image.new("RGB", rgba.size, (255, 255, 255))
+                image.paste(rgba, mask=rgba.split()[-1])
+            buffer = BytesIO()
+            image.save(buffer, format="JPEG", quality=cls.PRINT_JPEG_QUALITY, optimize=True, progressive=True)
+            data = buffer.getvalue()
+            cls._print_cache.set(url, data)
+            logging.debug(f"Print image for {url} built in {time.perf_counter() - start:.2f}s "
+                          f"({len(response.content)} -> {len(data)} bytes)")
+            return data
+        except Exception as e:
+            logging.warning(f"Failed to fetch print image for {url}: {e}")
+            return None
+
+    @classmethod
+    def prefetch_for_print(cls, urls):
+        """
+        Fetch, downscale and recompress all `urls` for the PDF with a bounded thread pool.
+        Returns a dict of url -> JPEG bytes (None for images that failed).
+        """
+        try:
+            unique_urls = list(dict.fromkeys(urls))
+            if not unique_urls:
+                return {}
+            with ThreadPoolExecutor(max_workers=min(cls.MAX_WORKERS, len(unique_urls))) as executor:
+                return _map_in_context(executor, cls._fetch_print_image, unique_urls)
+        except Exception as e:
+            logging.error("Failed to prefetch images for the PDF.")
+            raise CustomException(e, sys)
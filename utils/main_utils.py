@@ -1,37 +1,41 @@
 import sys
-import os
-from taskflowai import GroqModels, set_verbosity # type: ignore
-from dotenv import load_dotenv # type: ignore
+import threading
 from logger.logger_config import logging
 from exception.custom_exception import CustomException
-
-# Load environment variables
-load_dotenv()
-
-# Validate required API keys
-required_keys = [
-    "GROQ_API_KEY"
-]
-
-# Check for missing keys
-missing_keys = [key for key in required_keys if not os.getenv(key)]
-if missing_keys:
-    raise CustomException(sys, "Missing required environment variables: " + ', '.join(missing_keys))
-
-# Set verbosity for taskflowai
-set_verbosity(True)
+from utils.bootstrap import init_taskflowai
+from utils.streaming import streaming_model
+from utils.metrics import instrument_model
+from utils.scheduler import scheduler
 
 class LoadModel:
+    # Model callables are stateless, so one instance per model name is shared process-wide
+    _models = {}
+    _lock = threading.Lock()
+
     @classmethod
     def load_groq_model(cls, model_name):
         """
         Load and return the Groq  model.
         """
-        try:
-            logging.info(f"Loading Groq {model_name} model.")
-            model = GroqModels.custom_model(model_name=model_name)
-            logging.info(f"Groq {model_name} model loaded successfully.")
+        model = cls._models.get(model_name)
+        if model is not None:
             return model
-        except Exception as e:
-            logging.info(f"Failed to load Groq {model_name} model")
-            raise CustomException(sys, e)
\ No newline at end of file
+        with cls._lock:
+            model = cls._models.get(model_name)
+            if model is not None:
+                return model
+            try:
+                init_taskflowai()
+                from taskflowai import GroqModels  # type: ignore
+
+                logging.info(f"Loading Groq {model_name} model.")
+                model = streaming_model(GroqModels.custom_model(model_name=model_name), model_name)
+                model = instrument_model(model, model_name)
+                # Queue calls for the model's request and token budget; waiting is not counted as model latency
+                model = scheduler.scheduled_model(model, model_name)
+                cls._models[model_name] = model
+                logging.info(f"Groq {model_name} model loaded successfully.")
+                return model
+            except Exception as e:
+                logging.info(f"Failed to load Groq {model_name} model")
+                raise CustomException(e, sys)
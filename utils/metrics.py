@@ -0,0 +1,245 @@
+import os
+import json
+import time
+import threading
+import contextvars
+from collections import deque
+from contextlib import contextmanager
+from functools import wraps
+from logger.logger_config import logging
+
+# Append every finished span as one JSON line to this file (disabled when empty)
+METRICS_JSONL_PATH = os.getenv("METRICS_JSONL_PATH", "")
+# Number of most recent durations kept per stage for percentile estimates
+METRICS_WINDOW = int(os.getenv("METRICS_WINDOW", "2048"))
+
+
+# Token usage reported by the provider for the LLM call in progress (see report_usage)
+_usage = contextvars.ContextVar("llm_usage", default=None)
+
+
+def estimate_tokens(text):
+    """
+    Rough token count (about four characters per token) for providers that
+    do not report usage back through taskflowai.
+    """
+    return (len(text) + 3) // 4 if text else 0
+
+
+def report_usage(prompt_tokens, completion_tokens):
+    """
+    Called by a model backend that received token usage from the provider; the
+    enclosing `instrument_model` call records it instead of an estimate.
+    """
+    slot = _usage.get()
+    if slot is not None:
+        slot.update(prompt=int(prompt_tokens or 0), completion=int(completion_tokens or 0))
+
+
+def _percentile(sorted_values, q):
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, max(0, int(round(q * (len(sorted_values) - 1)))))
+    return sorted_values[index]
+
+
+class MetricsRegistry:
+    """
+    Process-wide latency and token metrics per pipeline stage.
+    """
+    _durations = {}
+    _counts = {}
+    _errors = {}
+    _tokens = {}
+    _lock = threading.Lock()
+    _sink_lock = threading.Lock()
+
+    @classmethod
+    def record(cls, stage, seconds, error=None, **attributes):
+        with cls._lock:
+            cls._durations.setdefault(stage, deque(maxlen=METRICS_WINDOW)).append(seconds)
+            cls._counts[stage] = cls._counts.get(stage, 0) + 1
+            if error is not None:
+                cls._errors[stage] = cls._errors.get(stage, 0) + 1
+        if METRICS_JSONL_PATH:
+            cls._write_event({
+                "ts": time.time(),
+                "stage": stage,
+                "seconds": round(seconds, 6),
+                "error": None if error is None else repr(error),
+                **attributes,
+            })
+
+    @classmethod
+    def record_tokens(cls, stage, prompt_tokens, completion_tokens, estimated=False):
+        """
+        Add token counts to `stage`; `estimated` counts are kept apart from provider-reported usage.
+        """
+        with cls._lock:
+            counters = cls._tokens.setdefault(stage, {"prompt": 0, "completion": 0,
+                                                      "estimated_prompt": 0, "estimated_completion": 0})
+            counters["prompt"] += prompt_tokens
+            counters["completion"] += completion_tokens
+            if estimated:
+                counters["estimated_prompt"] += prompt_tokens
+                counters["estimated_completion"] += completion_tokens
+
+    @classmethod
+    def _write_event(cls, event):
+        try:
+            with cls._sink_lock, open(METRICS_JSONL_PATH, "a", encoding="utf-8") as f:
+                f.write(json.dumps(event, ensure_ascii=False, default=str) + "\n")
+        except OSError as e:
+            logging.warning(f"Failed to write metrics event: {e}")
+
+    @classmethod
+    def snapshot(cls):
+        """
+        Return count, errors, p50/p95/p99/max latency and token totals per stage.
+        Token totals include the estimated share, which is also reported on its own.
+        """
+        with cls._lock:
+            durations = {stage: sorted(values) for stage, values in cls._durations.items()}
+            counts = dict(cls._counts)
+            errors = dict(cls._errors)
+            tokens = {stage: dict(values) for stage, values in cls._tokens.items()}
+        stages = {}
+        for stage, values in durations.items():
+            stages[stage] = {
+                "count": counts.get(stage, 0),
+                "errors": errors.get(stage, 0),
+                "p50": round(_percentile(values, 0.50), 4),
+                "p95": round(_percentile(values, 0.95), 4),
+                "p99": round(_percentile(values, 0.99), 4),
+                "max": round(values[-1], 4) if values else 0.0,
+            }
+            if stage in tokens:
+                stages[stage]["prompt_tokens"] = tokens[stage]["prompt"]
+                stages[stage]["completion_tokens"] = tokens[stage]["completion"]
+                stages[stage]["estimated_prompt_tokens"] = tokens[stage]["estimated_prompt"]
+                stages[stage]["estimated_completion_tokens"] = tokens[stage]["estimated_completion"]
+        return stages
+
+    @classmethod
+    def percentile(cls, stage, q, min_samples=1):
+        """
+        Return the q-th latency percentile of `stage`, or None with fewer than `min_samples` samples.
+        """
+        with cls._lock:
+            values = sorted(cls._durations.get(stage, ()))
+        if len(values) < max(1, min_samples):
+            return None
+        return _percentile(values, q)
+
+    @classmethod
+    def export_prometheus(cls):
+        """
+        Render the snapshot in the Prometheus text exposition format.
+        """
+        lines = [
+            "# TYPE travel_stage_latency_seconds summary",
+        ]
+        snapshot = cls.snapshot()
+        for stage, values in sorted(snapshot.items()):
+            for quantile in ("p50", "p95", "p99"):
+                q = "0." + quantile[1:]
+                lines.append(f'travel_stage_latency_seconds{{stage="{stage}",quantile="{q}"}} {values[quantile]}')
+            lines.append(f'travel_stage_latency_seconds_count{{stage="{stage}"}} {values["count"]}')
+        lines.append("# TYPE travel_stage_errors_total counter")
+        for stage, values in sorted(snapshot.items()):
+            lines.append(f'travel_stage_errors_total{{stage="{stage}"}} {values["errors"]}')
+        lines.append("# HELP travel_llm_tokens_total LLM tokens as reported by the provider")
+        lines.append("# TYPE travel_llm_tokens_total counter")
+        for stage, values in sorted(snapshot.items()):
+            if "prompt_tokens" in values:
+                for kind in ("prompt", "completion"):
+                    reported = values[f"{kind}_tokens"] - values[f"estimated_{kind}_tokens"]
+                    lines.append(f'travel_llm_tokens_total{{stage="{stage}",kind="{kind}"}} {reported}')
+        lines.append("# HELP travel_llm_tokens_estimated_total LLM tokens estimated at ~4 characters per token "
+                     "for calls without provider usage")
+        lines.append("# TYPE travel_llm_tokens_estimated_total counter")
+        for stage, values in sorted(snapshot.items()):
+            if "prompt_tokens" in values:
+                for kind in ("prompt", "completion"):
+                    lines.append(f'travel_llm_tokens_estimated_total{{stage="{stage}",kind="{kind}"}} '
+                                 f'{values[f"estimated_{kind}_tokens"]}')
+        return "\n".join(lines) + "\n"
+
+    @classmethod
+    def reset(cls):
+        with cls._lock:
+            cls._durations.clear()
+            cls._counts.clear()
+            cls._errors.clear()
+            cls._tokens.clear()
+
+
+@contextmanager
+def span(stage, **attributes):
+    """
+    Time the enclosed block and record it under `stage`.
+    """
+    start = time.perf_counter()
+    error = None
+    try:
+        yield
+    except Exception as e:
+        error = e
+        raise
+    finally:
+        MetricsRegistry.record(stage, time.perf_counter() - start, error=error, **attributes)
+
+
+def traced(stage):
+    """
+    Decorator form of `span`. The wrapped function keeps its name, docstring and
+    signature, so it can still be registered as a taskflowai tool.
+    """
+    def decorator(func):
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            with span(stage):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def instrument_model(model, model_name):
+    """
+    Wrap an LLM callable with a latency span that carries the call's token counts.
+    Counts come from the provider when the backend reports them (`report_usage`)
+    and are estimated from the prompt and response text otherwise.
+    """
+    stage = f"llm.{model_name}"
+
+    @wraps(model)
+    def wrapper(system_prompt="", user_prompt="", *args, **kwargs):
+        slot = {}
+        token = _usage.set(slot)
+        start = time.perf_counter()
+        try:
+            result = model(system_prompt, user_prompt, *args, **kwargs)
+        except Exception as e:
+            MetricsRegistry.record(stage, time.perf_counter() - start, error=e,
+                                   json=bool(kwargs.get("require_json_output")))
+            raise
+        finally:
+            _usage.reset(token)
+        seconds = time.perf_counter() - start
+
+        response = result[0] if isinstance(result, tuple) else result
+        # taskflowai models report failures as (text, error) instead of raising
+        error = result[1] if isinstance(result, tuple) and len(result) > 1 else None
+        if slot:
+            prompt_tokens, completion_tokens, estimated = slot["prompt"], slot["completion"], False
+        else:
+            prompt_tokens = estimate_tokens(system_prompt) + estimate_tokens(user_prompt)
+            completion_tokens = estimate_tokens(response if isinstance(response, str) else "")
+            estimated = True
+        MetricsRegistry.record_tokens(stage, prompt_tokens, completion_tokens, estimated=estimated)
+        MetricsRegistry.record(stage, seconds, error=error, json=bool(kwargs.get("require_json_output")),
+                               prompt_tokens=prompt_tokens, completion_tokens=completion_tokens,
+                               tokens_estimated=estimated)
+        return result
+
+    return wrapper
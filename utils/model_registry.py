@@ -0,0 +1,165 @@
+import os
+import json
+import copy
+import threading
+import contextvars
+from contextlib import contextmanager
+from functools import wraps
+from logger.logger_config import logging
+from utils.main_utils import LoadModel
+from utils.metrics import MetricsRegistry
+
+SCOUT = "meta-llama/llama-4-scout-17b-16e-instruct"
+MAVERICK = "meta-llama/llama-4-maverick-17b-128e-instruct"
+INSTANT = "llama-3.1-8b-instant"
+
+# Routes are keyed by agent name (used when no task route matches) or by task stage
+# (the `stage` passed to run_task). Each route lists models in order of preference;
+# `max_latency` (seconds, p50) lets a slower preferred model give way to a faster one.
+DEFAULT_MODEL_CONFIG = {
+    "latency_routing": True,
+    "min_samples": 5,
+    "routes": {
+        "travel_agent": {"models": [SCOUT, MAVERICK]},
+        "web_research_agent": {"models": [SCOUT, MAVERICK]},
+        "reporter_agent": {"models": [MAVERICK, SCOUT]},
+        # Run by the travel agent, so they stay on its model
+        "weather": {"models": [SCOUT, MAVERICK]},
+        "flights": {"models": [SCOUT, MAVERICK]},
+        "flights_intro": {"models": [INSTANT, SCOUT]},
+        "summary": {"models": [INSTANT, MAVERICK]},
+    },
+}
+
+# Error text that marks a call worth retrying on the next model of the route
+FALLBACK_ERROR_MARKERS = ("rate limit", "rate_limit", "429", "timeout", "timed out", "503", "overloaded", "capacity")
+
+_current_task = contextvars.ContextVar("model_task", default=None)
+
+
+@contextmanager
+def model_task(task_type):
+    """
+    Route LLM calls made in the enclosed block by `task_type` when it has a route.
+    """
+    token = _current_task.set(task_type)
+    try:
+        yield
+    finally:
+        _current_task.reset(token)
+
+
+def should_fall_back(error):
+    text = f"{type(error).__name__} {error}".lower()
+    return any(marker in text for marker in FALLBACK_ERROR_MARKERS)
+
+
+class ModelRegistry:
+    """
+    Chooses the Groq model for each agent and task from configuration.
+
+    Configuration is DEFAULT_MODEL_CONFIG, updated from the JSON file in MODEL_CONFIG_PATH
+    and then from MODEL_ROUTE_<ROUTE>="model_a,model_b" and MODEL_MAX_LATENCY_<ROUTE>=seconds.
+    """
+    _config = None
+    _lock = threading.Lock()
+
+    @classmethod
+    def config(cls):
+        if cls._config is not None:
+            return cls._config
+        with cls._lock:
+            if cls._config is None:
+                cls._config = cls._load_config()
+            return cls._config
+
+    @staticmethod
+    def _load_config():
+        config = copy.deepcopy(DEFAULT_MODEL_CONFIG)
+        path = os.getenv("MODEL_CONFIG_PATH")
+        if path:
+            with open(path, encoding="utf-8") as f:
+                overrides = json.load(f)
+            for route, settings in overrides.pop("routes", {}).items():
+                config["routes"].setdefault(route, {}).update(settings)
+            config.update(overrides)
+            logging.info(f"Loaded model configuration from {path}.")
+        for name, value in os.environ.items():
+            if name.startswith("MODEL_ROUTE_") and value.strip():
+                route = name[len("MODEL_ROUTE_"):].lower()
+                config["routes"].setdefault(route, {})["models"] = [m.strip() for m in value.split(",") if m.strip()]
+            elif name.startswith("MODEL_MAX_LATENCY_") and value.strip():
+                route = name[len("MODEL_MAX_LATENCY_"):].lower()
+                config["routes"].setdefault(route, {})["max_latency"] = float(value)
+        return config
+
+    @classmethod
+    def reload(cls):
+        with cls._lock:
+            cls._config = None
+
+    @classmethod
+    def route_for(cls, agent_name):
+        """
+        The active task's route if it has one, otherwise the agent's route.
+        """
+        task_type = _current_task.get()
+        routes = cls.config()["routes"]
+        if task_type in routes and routes[task_type].get("models"):
+            return task_type
+        return agent_name
+
+    @classmethod
+    def candidates(cls, route):
+        """
+        Models to try for `route`, in order.
+        With latency routing, models whose observed p50 exceeds the route's `max_latency`
+        move behind the ones that meet it (fastest first); unmeasured models keep their place.
+        """
+        config = cls.config()
+        settings = config["routes"].get(route) or {}
+        models = list(settings.get("models") or [])
+        if not models:
+            raise ValueError(f"No models configured for route: {route}")
+        max_latency = settings.get("max_latency")
+        if not (config.get("latency_routing") and max_latency):
+            return models
+
+        within, over = [], []
+        for model_name in models:
+            p50 = MetricsRegistry.percentile(f"llm.{model_name}", 0.5, config.get("min_samples", 1))
+            if p50 is None or p50 <= max_latency:
+                within.append(model_name)
+            else:
+                over.append((p50, model_name))
+        return within + [model_name for _, model_name in sorted(over)]
+
+    @classmethod
+    def model_for(cls, agent_name):
+        """
+        Return an LLM callable for `agent_name` that picks its model per call and
+        falls back to the next model of the route on timeouts and rate limits.
+        """
+        primary = LoadModel.load_groq_model(cls.candidates(agent_name)[0])
+
+        @wraps(primary)
+        def routed(system_prompt="", user_prompt="", *args, **kwargs):
+            route = cls.route_for(agent_name)
+            models = cls.candidates(route)
+            for i, model_name in enumerate(models):
+                is_last = i == len(models) - 1
+                try:
+                    result = LoadModel.load_groq_model(model_name)(system_prompt, user_prompt, *args, **kwargs)
+                except Exception as e:
+                    if is_last or not should_fall_back(e):
+                        raise
+                    logging.warning(f"Model {model_name} failed for {route} ({e}); trying {models[i + 1]}.")
+                    continue
+                # taskflowai models report failures as (text, error) instead of raising
+                error = result[1] if isinstance(result, tuple) and len(result) > 1 else None
+                if error is not None and not is_last and should_fall_back(error):
+                    logging.warning(f"Model {model_name} failed for {route} ({error}); trying {models[i + 1]}.")
+                    continue
+                return result
+
+        return routed
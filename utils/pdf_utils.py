@@ -0,0 +1,167 @@
+import sys
+import os
+import re
+import html
+import hashlib
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from logger.logger_config import logging
+from exception.custom_exception import CustomException
+from utils.ttl_cache import TTLCache
+from utils.image_pipeline import ImagePipeline
+
+IMG_SRC_PATTERN = re.compile(r'<img[^>]*?\ssrc="([^"]+)"', re.IGNORECASE)
+
+PDF_STYLESHEET = """
+body {
+    direction: rtl;
+    text-align: right;
+    font-family: 'Amiri', 'Cairo', 'Tahoma', sans-serif;
+    font-size: 14px;
+    line-height: 1.6;
+    margin: 2rem;
+}
+h1, h2, h3, h4 {
+    color: #1e3a8a;
+}
+img {
+    max-width: 100%;
+    height: auto;
+    display: block;
+    margin: 1rem auto;
+}
+"""
+
+PDF_TEMPLATE = """
+<html lang="ar" dir="rtl">
+<head>
+    <meta charset="utf-8">
+</head>
+<body>
+    {html_content}
+</body>
+</html>
+"""
+
+
+class PDFRenderer:
+    """
+    Renders Markdown travel plans to RTL PDF bytes entirely in memory.
+    The stylesheet and font configuration are parsed once per process and
+    rendered PDFs are cached by a hash of the Markdown content.
+    """
+    CACHE_TTL = int(os.getenv("PDF_CACHE_TTL", "3600"))
+    CACHE_SIZE = int(os.getenv("PDF_CACHE_SIZE", "32"))
+    # Render in a separate worker process so the Streamlit script thread is not blocked
+    USE_WORKER = os.getenv("PDF_RENDER_IN_WORKER", "0") == "1"
+
+    _cache = TTLCache(ttl=CACHE_TTL, maxsize=CACHE_SIZE)
+    _font_config = None
+    _stylesheet = None
+    _fetcher_class = None
+    _executor = None
+    _lock = threading.Lock()
+
+    @staticmethod
+    def content_hash(markdown_text):
+        return hashlib.sha256(markdown_text.encode("utf-8")).hexdigest()
+
+    @classmethod
+    def _get_stylesheet(cls):
+        if cls._stylesheet is None:
+            with cls._lock:
+                if cls._stylesheet is None:
+                    from weasyprint import CSS
+                    from weasyprint.text.fonts import FontConfiguration
+
+                    font_config = FontConfiguration()
+                    cls._stylesheet = CSS(string=PDF_STYLESHEET, font_config=font_config)
+                    cls._font_config = font_config
+        return cls._stylesheet, cls._font_config
+
+    @classmethod
+    def _get_executor(cls):
+        if cls._executor is None:
+            with cls._lock:
+                if cls._executor is None:
+                    cls._executor = ProcessPoolExecutor(max_workers=1)
+        return cls._executor
+
+    @classmethod
+    def render_bytes(cls, markdown_text):
+        """
+        Convert Markdown to HTML and render it to PDF bytes without touching the disk.
+        """
+        import markdown2
+        from weasyprint import HTML
+
+        stylesheet, font_config = cls._get_stylesheet()
+        html_content = markdown2.markdown(markdown_text)
+        rtl_html = PDF_TEMPLATE.format(html_content=html_content)
+        url_fetcher = cls._image_url_fetcher(html_content)
+        return HTML(string=rtl_html, url_fetcher=url_fetcher).write_pdf(stylesheets=[stylesheet], font_config=font_config)
+
+    @classmethod
+    def _get_fetcher_class(cls):
+        """
+        WeasyPrint URLFetcher subclass that serves prefetched images from memory.
+        Defined on first use so importing this module does not load WeasyPrint.
+        """
+        if cls._fetcher_class is None:
+            with cls._lock:
+                if cls._fetcher_class is None:
+                    from weasyprint.urls import URLFetcher, URLFetcherResponse
+
+                    class PrefetchedURLFetcher(URLFetcher):
+                        def __init__(self, images, **kwargs):
+                            super().__init__(**kwargs)
+                            self.images = images
+
+                        def fetch(self, url, headers=None):
+                            if url in self.images:
+                                data = self.images[url]
+                                if data is None:
+                                    raise ValueError(f"Image unavailable: {url}")
+                                return URLFetcherResponse(url, data, {"Content-Type": "image/jpeg"})
+                            return super().fetch(url, headers)
+
+                    cls._fetcher_class = PrefetchedURLFetcher
+        return cls._fetcher_class
+
+    @classmethod
+    def _image_url_fetcher(cls, html_content):
+        """
+        Prefetch every remote image of the report concurrently at print resolution and
+        return a WeasyPrint URL fetcher that serves them from memory.
+        Images that could not be fetched are skipped instead of being downloaded again.
+        """
+        urls = [html.unescape(url) for url in IMG_SRC_PATTERN.findall(html_content)]
+        images = ImagePipeline.prefetch_for_print(url for url in urls if url.startswith(("http://", "https://")))
+        return cls._get_fetcher_class()(images)
+
+    @classmethod
+    def render(cls, markdown_text):
+        """
+        Return the PDF for `markdown_text`, rendering it only if it is not cached.
+        """
+        key = cls.content_hash(markdown_text)
+        pdf_data = cls._cache.get(key)
+        if pdf_data is not None:
+            logging.info("PDF served from cache.")
+            return pdf_data
+        try:
+            if cls.USE_WORKER:
+                pdf_data = cls._get_executor().submit(_render_in_worker, markdown_text).result()
+            else:
+                pdf_data = cls.render_bytes(markdown_text)
+            cls._cache.set(key, pdf_data)
+            logging.info("PDF rendered successfully.")
+            return pdf_data
+        except Exception as e:
+            logging.error(f"❌ Failed to generate PDF: {e}")
+            raise CustomException(e, sys)
+
+
+def _render_in_worker(markdown_text):
+    # Module-level so it can be pickled for the worker process
+    return PDFRenderer.render_bytes(markdown_text)
@@ -0,0 +1,238 @@
+import sys
+import os
+import re
+import json
+import time
+import hashlib
+import sqlite3
+import threading
+from logger.logger_config import logging
+from exception.custom_exception import CustomException
+
+# Plans not opened for this many seconds are deleted by garbage collection
+PLAN_STORE_MAX_AGE = int(os.getenv("PLAN_STORE_MAX_AGE", str(30 * 24 * 3600)))
+# Total size of stored content above which the least recently opened plans are deleted
+PLAN_STORE_MAX_BYTES = int(os.getenv("PLAN_STORE_MAX_BYTES", str(500 * 1024 * 1024)))
+# Run garbage collection after this many saves
+GC_EVERY_SAVES = 50
+
+PLAN_ID_PATTERN = re.compile(r"^[0-9a-f]{8,64}$")
+
+
+class PlanStore:
+    """
+    Disk-backed (SQLite) store of generated plans, addressed by plan ID.
+    Section reports, the final report and the PDF are kept as content-addressed
+    blobs, so identical content shared by several plans is stored once.
+    """
+
+    def __init__(self, path=None, max_age=PLAN_STORE_MAX_AGE, max_bytes=PLAN_STORE_MAX_BYTES):
+        self.path = path or os.getenv(
+            "PLAN_STORE_PATH",
+            os.path.join(os.path.dirname(os.path.dirname(__file__)), "cache", "plans.sqlite3")
+        )
+        self.max_age = max_age
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._saves = 0
+        self._open_lock = threading.Lock()
+        self._connection = None
+
+    @property
+    def _conn(self):
+        """
+        SQLite connection, opened on first use so importing the module does not touch the disk.
+        """
+        if self._connection is None:
+            with self._open_lock:
+                if self._connection is None:
+                    self._connection = self._open()
+        return self._connection
+
+    def _open(self):
+        try:
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            conn = sqlite3.connect(self.path, check_same_thread=False, timeout=30)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS blobs ("
+                " digest TEXT PRIMARY KEY,"
+                " data BLOB NOT NULL,"
+                " size INTEGER NOT NULL)"
+            )
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS plans ("
+                " plan_id TEXT PRIMARY KEY,"
+                " manifest TEXT NOT NULL,"
+                " created_at REAL NOT NULL,"
+                " accessed_at REAL NOT NULL)"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_plans_accessed ON plans (accessed_at)")
+            conn.commit()
+            return conn
+        except Exception as e:
+            logging.error(f"Failed to open plan store at {self.path}")
+            raise CustomException(e, sys)
+
+    @staticmethod
+    def is_valid_id(plan_id):
+        return isinstance(plan_id, str) and PLAN_ID_PATTERN.match(plan_id) is not None
+
+    def _put_blob(self, data):
+        """
+        Store `data` (str or bytes) under its SHA-256 digest and return the digest.
+        Must be called with the lock held.
+        """
+        if isinstance(data, str):
+            data = data.encode("utf-8")
+        digest = hashlib.sha256(data).hexdigest()
+        self._conn.execute(
+            "INSERT OR IGNORE INTO blobs (digest, data, size) VALUES (?, ?, ?)",
+            (digest, sqlite3.Binary(data), len(data))
+        )
+        return digest
+
+    def _get_blob(self, digest):
+        row = self._conn.execute("SELECT data FROM blobs WHERE digest = ?", (digest,)).fetchone()
+        return bytes(row[0]) if row else None
+
+    def save(self, plan):
+        """
+        Store a plan returned by TravelPlanner.plan under its plan ID.
+        """
+        plan_id = plan["plan_id"]
+        now = time.time()
+        with self._lock:
+            manifest = {
+                "request": plan.get("request", {}),
+                "errors": plan.get("errors", {}),
+                "timings": plan.get("timings", {}),
+                "sections": {key: self._put_blob(text) for key, text in (plan.get("sections") or {}).items()
+                             if isinstance(text, str)},
+                "final_report": self._put_blob(plan["final_report"]) if plan.get("final_report") else None,
+                "pdf": None,
+            }
+            self._conn.execute(
+                "INSERT OR REPLACE INTO plans (plan_id, manifest, created_at, accessed_at) VALUES (?, ?, ?, ?)",
+                (plan_id, json.dumps(manifest, ensure_ascii=False), now, now)
+            )
+            self._conn.commit()
+            self._saves += 1
+            run_gc = self._saves % GC_EVERY_SAVES == 1
+        logging.info(f"Stored plan {plan_id}.")
+        if run_gc:
+            self.collect_garbage()
+        return plan_id
+
+    def _manifest(self, plan_id):
+        row = self._conn.execute("SELECT manifest FROM plans WHERE plan_id = ?", (plan_id,)).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def load(self, plan_id):
+        """
+        Return the stored plan in the shape TravelPlanner.plan produces, or None.
+        """
+        if not self.is_valid_id(plan_id):
+            return None
+        with self._lock:
+            manifest = self._manifest(plan_id)
+            if manifest is None:
+                return None
+            sections = {}
+            for key, digest in manifest["sections"].items():
+                blob = self._get_blob(digest)
+                sections[key] = blob.decode("utf-8") if blob is not None else ""
+            final_blob = self._get_blob(manifest["final_report"]) if manifest["final_report"] else None
+            self._conn.execute("UPDATE plans SET accessed_at = ? WHERE plan_id = ?", (time.time(), plan_id))
+            self._conn.commit()
+        return {
+            "plan_id": plan_id,
+            "request": manifest["request"],
+            "sections": sections,
+            "errors": manifest["errors"],
+            "final_report": final_blob.decode("utf-8") if final_blob is not None else None,
+            "timings": manifest["timings"],
+            "stored": True,
+        }
+
+    def save_pdf(self, plan_id, pdf_bytes):
+        with self._lock:
+            manifest = self._manifest(plan_id)
+            if manifest is None:
+                return False
+            manifest["pdf"] = self._put_blob(pdf_bytes)
+            self._conn.execute(
+                "UPDATE plans SET manifest = ? WHERE plan_id = ?",
+                (json.dumps(manifest, ensure_ascii=False), plan_id)
+            )
+            self._conn.commit()
+        return True
+
+    def load_pdf(self, plan_id):
+        if not self.is_valid_id(plan_id):
+            return None
+        with self._lock:
+            manifest = self._manifest(plan_id)
+            if manifest is None or not manifest.get("pdf"):
+                return None
+            return self._get_blob(manifest["pdf"])
+
+    def collect_garbage(self):
+        """
+        Delete plans older than `max_age`, then the least recently opened plans until
+        the stored content fits in `max_bytes`, then blobs no plan refers to.
+        Returns the number of deleted plans.
+        """
+        with self._lock:
+            cursor = self._conn.execute("DELETE FROM plans WHERE accessed_at < ?", (time.time() - self.max_age,))
+            deleted = cursor.rowcount
+
+            total = self._conn.execute("SELECT COALESCE(SUM(size), 0) FROM blobs").fetchone()[0]
+            if total > self.max_bytes:
+                sizes = dict(self._conn.execute("SELECT digest, size FROM blobs").fetchall())
+                rows = self._conn.execute("SELECT plan_id, manifest FROM plans ORDER BY accessed_at").fetchall()
+                manifests = [(plan_id, json.loads(manifest)) for plan_id, manifest in rows]
+                references = {}
+                for _, manifest in manifests:
+                    for digest in _digests(manifest):
+                        references[digest] = references.get(digest, 0) + 1
+                for plan_id, manifest in manifests:
+                    if total <= self.max_bytes:
+                        break
+                    self._conn.execute("DELETE FROM plans WHERE plan_id = ?", (plan_id,))
+                    deleted += 1
+                    for digest in _digests(manifest):
+                        references[digest] -= 1
+                        if references[digest] == 0:
+                            total -= sizes.get(digest, 0)
+
+            live = set()
+            for (manifest,) in self._conn.execute("SELECT manifest FROM plans").fetchall():
+                live.update(_digests(json.loads(manifest)))
+            orphans = [(digest,) for (digest,) in self._conn.execute("SELECT digest FROM blobs").fetchall()
+                       if digest not in live]
+            self._conn.executemany("DELETE FROM blobs WHERE digest = ?", orphans)
+            self._conn.commit()
+        if deleted or orphans:
+            logging.info(f"Plan store garbage collection removed {deleted} plan(s) and {len(orphans)} blob(s).")
+        return deleted
+
+    def stats(self):
+        with self._lock:
+            plans = self._conn.execute("SELECT COUNT(*) FROM plans").fetchone()[0]
+            blobs, size = self._conn.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM blobs").fetchone()
+        return {"plans": plans, "blobs": blobs, "bytes": size}
+
+
+def _digests(manifest):
+    """
+    Distinct blob digests referenced by a plan manifest.
+    """
+    digests = set(manifest.get("sections", {}).values())
+    for key in ("final_report", "pdf"):
+        if manifest.get(key):
+            digests.add(manifest[key])
+    return digests
+
+
+plan_store = PlanStore()
@@ -0,0 +1,125 @@
+import re
+from utils.image_pipeline import IMAGE_PATTERN, normalize_image_url
+
+HEADING_PATTERN = re.compile(r'^(#{1,6})\s+(.*?)\s*#*\s*$', re.MULTILINE)
+
+# Order and titles of the sections in the final plan
+REPORT_SECTIONS = [
+    ("destination", "📍 معلومات الوجهة"),
+    ("events", "🎯 الفعاليات والأنشطة"),
+    ("weather", "☀️ توقعات الطقس"),
+    ("flights", "✈️ خيارات الرحلات الجوية"),
+]
+
+
+class ReportAssembler:
+    """
+    Builds the final travel plan deterministically from the section reports:
+    consistent heading levels, a table of contents and de-duplicated images.
+    """
+
+    SECTION_LEVEL = 2
+
+    @classmethod
+    def _normalize_headings(cls, markdown_text, section_title, level=None):
+        """
+        Shift the section's headings so its top level sits just below the section heading
+        (at `level`, SECTION_LEVEL by default). A leading heading that only repeats the
+        section name is dropped.
+        """
+        level = level or cls.SECTION_LEVEL
+        text = markdown_text.strip()
+        plain_title = re.sub(r'^\W+\s*', '', section_title)
+        first = HEADING_PATTERN.match(text)
+        if first and plain_title and plain_title in first.group(2):
+            text = text[first.end():].lstrip()
+
+        headings = HEADING_PATTERN.findall(text)
+        if not headings:
+            return text
+
+        top_level = min(len(hashes) for hashes, _ in headings)
+        shift = level + 1 - top_level
+
+        def replace(match):
+            level = min(6, len(match.group(1)) + shift)
+            return f"{'#' * level} {match.group(2)}"
+
+        return HEADING_PATTERN.sub(replace, text)
+
+    @staticmethod
+    def _dedupe_images(markdown_text, seen_urls):
+        """
+        Remove image tags whose URL already appeared earlier in the plan.
+        """
+        def replace(match):
+            url = normalize_image_url(match.group(2))
+            if url in seen_urls:
+                return ""
+            seen_urls.add(url)
+            return f"![{match.group(1)}]({url})"
+
+        return IMAGE_PATTERN.sub(replace, markdown_text)
+
+    @classmethod
+    def assemble(cls, reports, title="📋 خطة السفر الكاملة", summary=None):
+        """
+        Stitch the section reports (a dict keyed like REPORT_SECTIONS) into one Markdown plan.
+        Empty or missing sections are skipped.
+        """
+        seen_urls = set()
+        toc = []
+        body = []
+        for key, section_title in REPORT_SECTIONS:
+            content = reports.get(key)
+            if not isinstance(content, str) or not content.strip():
+                continue
+            content = cls._normalize_headings(content, section_title)
+            content = cls._dedupe_images(content, seen_urls)
+            anchor = f"section-{key}"
+            toc.append(f"{len(toc) + 1}. [{section_title}](#{anchor})")
+            body.append(f'<a id="{anchor}"></a>\n\n{"#" * cls.SECTION_LEVEL} {section_title}\n\n{content}')
+
+        header = [f"# {title}"]
+        if summary:
+            header.append(summary.strip())
+        if toc:
+            header.append("**المحتويات**\n\n" + "\n".join(toc))
+        return "\n\n---\n\n".join(["\n\n".join(header)] + body)
+
+    @classmethod
+    def assemble_trip(cls, legs, flights=None, title="📋 خطة السفر الكاملة", summary=None):
+        """
+        Stitch a multi-city plan: `legs` is a list of (leg title, reports) pairs where each
+        reports dict is keyed like REPORT_SECTIONS; `flights` is the combined flights section.
+        Every leg becomes a chapter with its sections one level below; images are
+        de-duplicated across the whole trip.
+        """
+        seen_urls = set()
+        toc = []
+        body = []
+        for number, (leg_title, reports) in enumerate(legs, start=1):
+            leg_anchor = f"leg-{number}"
+            parts = [f'<a id="{leg_anchor}"></a>\n\n{"#" * cls.SECTION_LEVEL} {leg_title}']
+            toc.append(f"{len(toc) + 1}. [{leg_title}](#{leg_anchor})")
+            for key, section_title in REPORT_SECTIONS:
+                content = reports.get(key)
+                if not isinstance(content, str) or not content.strip():
+                    continue
+                content = cls._normalize_headings(content, section_title, cls.SECTION_LEVEL + 1)
+                content = cls._dedupe_images(content, seen_urls)
+                parts.append(f"{'#' * (cls.SECTION_LEVEL + 1)} {section_title}\n\n{content}")
+            body.append("\n\n".join(parts))
+
+        if isinstance(flights, str) and flights.strip():
+            flights_title = dict(REPORT_SECTIONS)["flights"]
+            content = cls._normalize_headings(flights, flights_title)
+            toc.append(f"{len(toc) + 1}. [{flights_title}](#section-flights)")
+            body.append(f'<a id="section-flights"></a>\n\n{"#" * cls.SECTION_LEVEL} {flights_title}\n\n{content}')
+
+        header = [f"# {title}"]
+        if summary:
+            header.append(summary.strip())
+        if toc:
+            header.append("**المحتويات**\n\n" + "\n".join(toc))
+        return "\n\n---\n\n".join(["\n\n".join(header)] + body)
@@ -0,0 +1,235 @@
+import sys
+import os
+import re
+import json
+import time
+import hashlib
+import sqlite3
+import inspect
+import threading
+from functools import wraps
+from logger.logger_config import logging
+from exception.custom_exception import CustomException
+from utils.single_flight import SingleFlight
+from utils.gazetteer import Gazetteer
+
+# Default time-to-live per section, in seconds. Override with RESULT_CACHE_TTL_<SECTION>.
+DEFAULT_SECTION_TTLS = {
+    "destination": 3 * 24 * 3600,
+    "events": 6 * 3600,
+    "weather": 30 * 60,
+    "flights": 15 * 60,
+    "report": 6 * 3600,
+}
+
+_SEPARATORS = re.compile(r"[,،;؛/|]+")
+_WHITESPACE = re.compile(r"\s+")
+
+# Task arguments that name a place; every spelling of a known place shares one key
+LOCATION_ARGUMENTS = {"destination", "current_location"}
+
+
+def normalize_text(value):
+    """
+    Lowercase, trim and collapse whitespace so equivalent inputs share a key.
+    """
+    return _WHITESPACE.sub(" ", str(value or "")).strip().lower()
+
+
+def normalize_value(name, value):
+    """
+    Normalize one task argument for use in a cache key.
+    Date lists are sorted, interests are split into a sorted set of terms and
+    place names are mapped to their canonical gazetteer name.
+    """
+    if isinstance(value, (list, tuple)):
+        return sorted(normalize_text(v) for v in value)
+    if name in LOCATION_ARGUMENTS:
+        return Gazetteer.canonical_key(value)
+    if name == "interests":
+        terms = {normalize_text(term) for term in _SEPARATORS.split(str(value or ""))}
+        return sorted(term for term in terms if term)
+    return normalize_text(value)
+
+
+class ResultCache:
+    """
+    Disk-backed (SQLite) cache for section results with a TTL per section.
+    """
+
+    def __init__(self, path=None, ttls=None):
+        self.path = path or os.getenv(
+            "RESULT_CACHE_PATH",
+            os.path.join(os.path.dirname(os.path.dirname(__file__)), "cache", "results.sqlite3")
+        )
+        self.ttls = dict(DEFAULT_SECTION_TTLS)
+        self.ttls.update(ttls or {})
+        for section in list(self.ttls):
+            env_ttl = os.getenv(f"RESULT_CACHE_TTL_{section.upper()}")
+            if env_ttl:
+                self.ttls[section] = int(env_ttl)
+
+        self._lock = threading.Lock()
+        self._open_lock = threading.Lock()
+        self._connection = None
+        self._stats = {}
+        # Identical in-flight calls share one execution; lock files sit next to the database
+        self.single_flight = SingleFlight(os.path.join(os.path.dirname(self.path), "locks"))
+
+    @property
+    def _conn(self):
+        """
+        SQLite connection, opened on first use so importing the module does not touch the disk.
+        """
+        if self._connection is None:
+            with self._open_lock:
+                if self._connection is None:
+                    self._connection = self._open()
+        return self._connection
+
+    def _open(self):
+        try:
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            conn = sqlite3.connect(self.path, check_same_thread=False, timeout=30)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS results ("
+                " key TEXT PRIMARY KEY,"
+                " section TEXT NOT NULL,"
+                " value TEXT NOT NULL,"
+                " created_at REAL NOT NULL,"
+                " expires_at REAL NOT NULL)"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_results_expires ON results (expires_at)")
+            conn.commit()
+            return conn
+        except Exception as e:
+            logging.error(f"Failed to open result cache at {self.path}")
+            raise CustomException(e, sys)
+
+    @staticmethod
+    def make_key(section, **inputs):
+        """
+        Build a stable cache key from the section name and its normalized inputs.
+        """
+        normalized = {name: normalize_value(name, value) for name, value in sorted(inputs.items())}
+        payload = json.dumps([section, normalized], ensure_ascii=False, sort_keys=True)
+        return f"{section}:{hashlib.sha256(payload.encode('utf-8')).hexdigest()}"
+
+    def _record(self, section, outcome):
+        with self._lock:
+            counters = self._stats.setdefault(section, {"hits": 0, "misses": 0})
+            counters[outcome] += 1
+
+    def get(self, section, key):
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT value, expires_at FROM results WHERE key = ?", (key,)
+            ).fetchone()
+        if row is None or row[1] < time.time():
+            self._record(section, "misses")
+            return None
+        self._record(section, "hits")
+        return json.loads(row[0])
+
+    def set(self, section, key, value, ttl=None):
+        ttl = self.ttls.get(section, 3600) if ttl is None else ttl
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO results (key, section, value, created_at, expires_at) VALUES (?, ?, ?, ?, ?)",
+                (key, section, json.dumps(value, ensure_ascii=False), now, now + ttl)
+            )
+            self._conn.commit()
+
+    def peek(self, key):
+        """
+        Return the non-expired value for `key` without touching the stats, or None.
+        """
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT value FROM results WHERE key = ? AND expires_at >= ?", (key, time.time())
+            ).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def is_fresh(self, key):
+        """
+        Return True if a non-expired entry exists for `key`, without touching the stats.
+        """
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT 1 FROM results WHERE key = ? AND expires_at >= ?", (key, time.time())
+            ).fetchone()
+        return row is not None
+
+    def purge_expired(self):
+        with self._lock:
+            cursor = self._conn.execute("DELETE FROM results WHERE expires_at < ?", (time.time(),))
+            self._conn.commit()
+        return cursor.rowcount
+
+    def stats(self):
+        """
+        Return hit/miss counters per section plus totals and the overall hit rate.
+        """
+        with self._lock:
+            sections = {name: dict(counters) for name, counters in self._stats.items()}
+        for name, counters in sections.items():
+            counters.setdefault("coalesced", 0)
+        hits = sum(c["hits"] for c in sections.values())
+        misses = sum(c["misses"] for c in sections.values())
+        total = hits + misses
+        return {
+            "sections": sections,
+            "hits": hits,
+            "misses": misses,
+            "hit_rate": round(hits / total, 3) if total else 0.0,
+            "coalesced": sum(c["coalesced"] for c in sections.values()),
+            "single_flight": self.single_flight.stats(),
+        }
+
+    def cached(self, section):
+        """
+        Decorator that serves a section function from the cache when possible.
+        On a miss, identical concurrent calls (from any session or worker process)
+        are coalesced so only one of them runs the function.
+        Failed results (exceptions returned by Task.create) and empty output are not stored.
+        """
+        def decorator(func):
+            signature = inspect.signature(func)
+
+            @wraps(func)
+            def wrapper(*args, **kwargs):
+                key = self.make_key(section, **_bound_arguments(signature, args, kwargs))
+
+                cached_value = self.get(section, key)
+                if cached_value is not None:
+                    logging.info(f"Result cache hit for section '{section}'.")
+                    return cached_value
+
+                def run():
+                    result = func(*args, **kwargs)
+                    if isinstance(result, str) and result.strip():
+                        self.set(section, key, result)
+                    return result
+
+                result, shared = self.single_flight.do(key, run, load=lambda: self.peek(key))
+                if shared:
+                    with self._lock:
+                        self._stats[section]["coalesced"] = self._stats[section].get("coalesced", 0) + 1
+                return result
+
+            wrapper.cache_key = lambda *args, **kwargs: self.make_key(
+                section, **_bound_arguments(signature, args, kwargs)
+            )
+            return wrapper
+        return decorator
+
+
+def _bound_arguments(signature, args, kwargs):
+    bound = signature.bind(*args, **kwargs)
+    bound.apply_defaults()
+    return bound.arguments
+
+
+result_cache = ResultCache()
@@ -0,0 +1,370 @@
+import os
+import time
+import heapq
+import itertools
+import threading
+import contextvars
+from contextlib import contextmanager
+from functools import wraps
+from logger.logger_config import logging
+from utils.metrics import MetricsRegistry, estimate_tokens
+
+# Token-bucket limits per provider: `requests` (and LLM `tokens`) per `per` seconds.
+# Override with RATE_LIMIT_<PROVIDER>=<requests>/<seconds> and RATE_LIMIT_<PROVIDER>_TOKENS=<tokens>.
+# Groq limits apply to each model separately, as Groq counts them per model.
+# Buckets live in each process: SCHEDULER_PROCESSES=<n> gives every one of n worker
+# processes 1/n of each limit, so together they stay within the provider's quota.
+DEFAULT_PROVIDER_LIMITS = {
+    "groq": {"requests": 30, "per": 60, "tokens": 6000},
+    "serper": {"requests": 100, "per": 60},
+    "amadeus": {"requests": 10, "per": 1},
+    "weather": {"requests": 100, "per": 60},
+    "pexels": {"requests": 200, "per": 3600},
+}
+
+# Lower values are served first when several callers wait for the same provider
+PRIORITIES = {"interactive": 0, "background": 1, "batch": 2}
+# Longest a call waits for its turn before it fails with QueueTimeoutError
+SCHEDULER_MAX_WAIT = float(os.getenv("SCHEDULER_MAX_WAIT", "180"))
+# Completion tokens reserved for an LLM call (less if it passes a smaller max_tokens)
+SCHEDULER_COMPLETION_TOKENS = int(os.getenv("SCHEDULER_COMPLETION_TOKENS", "1000"))
+# Extra attempts for an LLM call that still hits the provider's rate limit
+SCHEDULER_RATE_LIMIT_RETRIES = int(os.getenv("SCHEDULER_RATE_LIMIT_RETRIES", "2"))
+# Seconds a provider is paused after a 429 without a Retry-After header
+RATE_LIMIT_PAUSE = float(os.getenv("RATE_LIMIT_PAUSE", "10"))
+# Processes sharing the provider quotas (set by core/batch_cli.py for --executor process)
+PROCESSES_ENV = "SCHEDULER_PROCESSES"
+
+RATE_LIMIT_MARKERS = ("rate limit", "rate_limit", "429", "too many requests", "quota")
+
+_priority = contextvars.ContextVar("scheduler_priority", default="interactive")
+_owner = contextvars.ContextVar("scheduler_owner", default=None)
+
+
+@contextmanager
+def scheduling(priority=None, owner=None):
+    """
+    Queue provider calls made in the enclosed block with `priority` ("interactive",
+    "background" or "batch") on behalf of `owner` (a plan ID), whose queue position
+    can then be read with Scheduler.queue_status.
+    """
+    tokens = []
+    if priority is not None:
+        if priority not in PRIORITIES:
+            raise ValueError(f"Unknown priority: {priority}")
+        tokens.append((_priority, _priority.set(priority)))
+    if owner is not None:
+        tokens.append((_owner, _owner.set(owner)))
+    try:
+        yield
+    finally:
+        for var, token in reversed(tokens):
+            var.reset(token)
+
+
+def current_owner():
+    return _owner.get()
+
+
+def is_rate_limit_error(error):
+    text = f"{type(error).__name__} {error}".lower()
+    return any(marker in text for marker in RATE_LIMIT_MARKERS)
+
+
+def provider_limits(provider):
+    """
+    Return the {"requests", "per", "tokens"} limits of a provider, or None if it is not limited.
+    The limits are this process's share when SCHEDULER_PROCESSES is set.
+    """
+    limits = dict(DEFAULT_PROVIDER_LIMITS.get(provider) or {})
+    name = provider.upper().replace("-", "_").replace(".", "_")
+    override = os.getenv(f"RATE_LIMIT_{name}")
+    if override:
+        requests, _, per = override.partition("/")
+        limits["requests"] = float(requests)
+        limits["per"] = float(per or 60)
+    tokens = os.getenv(f"RATE_LIMIT_{name}_TOKENS")
+    if tokens:
+        limits["tokens"] = float(tokens)
+    if not limits.get("requests"):
+        return None
+    processes = max(1, int(os.getenv(PROCESSES_ENV) or 1))
+    if processes > 1:
+        # Same rate per process; a share under one request stretches the period instead,
+        # since a bucket needs room for at least one whole request
+        stretch = max(1.0, processes / limits["requests"])
+        limits["requests"] = limits["requests"] * stretch / processes
+        limits["per"] = limits["per"] * stretch
+        if limits.get("tokens"):
+            limits["tokens"] = limits["tokens"] * stretch / processes
+    return limits
+
+
+class QueueTimeoutError(Exception):
+    """
+    Raised when a call waited SCHEDULER_MAX_WAIT seconds without getting its turn.
+    """
+
+    def __init__(self, bucket, position, waited):
+        super().__init__(f"Gave up waiting for {bucket} after {waited:.1f}s at queue position {position}")
+        self.bucket = bucket
+        self.position = position
+        self.waited = waited
+
+
+class TokenBucket:
+    """
+    Request and (optionally) token budget of one provider, refilled continuously.
+    """
+
+    def __init__(self, requests, per, tokens=None):
+        self.request_capacity = float(requests)
+        self.request_rate = float(requests) / float(per)
+        self.token_capacity = float(tokens) if tokens else None
+        self.token_rate = float(tokens) / float(per) if tokens else None
+        self.requests = self.request_capacity
+        self.tokens = self.token_capacity
+        self.paused_until = 0.0
+        self._updated = time.monotonic()
+
+    def _refill(self, now):
+        elapsed = max(0.0, now - self._updated)
+        self._updated = now
+        self.requests = min(self.request_capacity, self.requests + elapsed * self.request_rate)
+        if self.token_capacity is not None:
+            self.tokens = min(self.token_capacity, self.tokens + elapsed * self.token_rate)
+
+    def delay(self, tokens, now):
+        """
+        Seconds until one request with `tokens` tokens fits in the bucket.
+        """
+        self._refill(now)
+        delay = max(0.0, self.paused_until - now)
+        if self.requests < 1:
+            delay = max(delay, (1 - self.requests) / self.request_rate)
+        if self.token_capacity is not None and tokens:
+            needed = min(tokens, self.token_capacity)
+            if self.tokens < needed:
+                delay = max(delay, (needed - self.tokens) / self.token_rate)
+        return delay
+
+    def consume(self, tokens):
+        self.requests -= 1
+        if self.token_capacity is not None and tokens:
+            self.tokens -= min(tokens, self.token_capacity)
+
+    def adjust_tokens(self, delta):
+        """
+        Correct the token level once the real usage of a call is known (may go negative).
+        """
+        if self.token_capacity is not None:
+            self.tokens = min(self.token_capacity, self.tokens - delta)
+
+
+class ProviderQueue:
+    """
+    Waiting line in front of one token bucket.
+    Callers get their turn by priority, then arrival order; the head of the line
+    waits for the bucket to refill while later callers wait for the head.
+    """
+
+    def __init__(self, name, bucket):
+        self.name = name
+        self.bucket = bucket
+        self._waiting = []
+        self._owners = {}
+        self._condition = threading.Condition()
+        self._sequence = itertools.count()
+        self._stats = {"admitted": 0, "timeouts": 0, "max_depth": 0, "waited_seconds": 0.0}
+
+    def acquire(self, tokens=0, priority="interactive", owner=None, max_wait=SCHEDULER_MAX_WAIT):
+        """
+        Block until one request (and `tokens` tokens) may go out; return the seconds waited.
+        """
+        start = time.monotonic()
+        ticket = (PRIORITIES.get(priority, 0), next(self._sequence))
+        with self._condition:
+            heapq.heappush(self._waiting, ticket)
+            self._owners[ticket] = owner
+            self._stats["max_depth"] = max(self._stats["max_depth"], len(self._waiting))
+            try:
+                while True:
+                    now = time.monotonic()
+                    if self._waiting[0] == ticket:
+                        delay = self.bucket.delay(tokens, now)
+                        if delay <= 0:
+                            heapq.heappop(self._waiting)
+                            self.bucket.consume(tokens)
+                            break
+                    else:
+                        delay = None
+                    remaining = max_wait - (now - start)
+                    if remaining <= 0:
+                        self._stats["timeouts"] += 1
+                        raise QueueTimeoutError(self.name, self._position(ticket), now - start)
+                    self._condition.wait(remaining if delay is None else min(delay, remaining))
+            except BaseException:
+                if ticket in self._waiting:
+                    self._waiting.remove(ticket)
+                    heapq.heapify(self._waiting)
+                raise
+            finally:
+                self._owners.pop(ticket, None)
+                # The next caller in line becomes the head and starts its own wait
+                self._condition.notify_all()
+            waited = time.monotonic() - start
+            self._stats["admitted"] += 1
+            self._stats["waited_seconds"] += waited
+        MetricsRegistry.record(f"queue.{self.name}", waited, priority=priority)
+        if waited >= 1:
+            logging.info(f"Waited {waited:.1f}s for a {self.name} slot ({priority}).")
+        return waited
+
+    def _position(self, ticket):
+        return 1 + sum(1 for other in self._waiting if other < ticket)
+
+    def positions(self, owner):
+        """
+        Queue positions (1 = next in line) of the calls currently waiting for `owner`.
+        """
+        with self._condition:
+            return [self._position(ticket) for ticket, ticket_owner in self._owners.items()
+                    if ticket_owner == owner and ticket in self._waiting]
+
+    def pause(self, seconds):
+        """
+        Hold every caller for `seconds`, e.g. after the provider answered 429.
+        """
+        with self._condition:
+            self.bucket.paused_until = max(self.bucket.paused_until, time.monotonic() + seconds)
+            self.bucket.requests = min(self.bucket.requests, 0.0)
+            self._condition.notify_all()
+
+    def settle(self, reserved_tokens, used_tokens):
+        with self._condition:
+            self.bucket.adjust_tokens(used_tokens - reserved_tokens)
+            self._condition.notify_all()
+
+    def stats(self):
+        with self._condition:
+            self.bucket._refill(time.monotonic())
+            stats = dict(self._stats)
+            stats["depth"] = len(self._waiting)
+            stats["waited_seconds"] = round(stats["waited_seconds"], 3)
+            stats["requests_available"] = round(self.bucket.requests, 2)
+            if self.bucket.token_capacity is not None:
+                stats["tokens_available"] = round(self.bucket.tokens, 1)
+            return stats
+
+
+class Scheduler:
+    """
+    Process-wide gate for calls to rate-limited providers (Groq, Serper, Amadeus,
+    WeatherAPI, Pexels). Every provider has a token bucket sized from its limits and
+    a priority queue in front of it, so interactive plans go ahead of batch work and
+    bursts wait for capacity instead of failing with 429.
+    """
+
+    def __init__(self):
+        self._queues = {}
+        self._lock = threading.Lock()
+
+    def queue(self, provider, qualifier=None):
+        """
+        Return the queue of `provider` (one per `qualifier`, e.g. a Groq model), or None if unlimited.
+        """
+        name = f"{provider}/{qualifier}" if qualifier else provider
+        queue = self._queues.get(name)
+        if queue is not None or name in self._queues:
+            return queue
+        with self._lock:
+            if name not in self._queues:
+                limits = provider_limits(provider)
+                self._queues[name] = ProviderQueue(name, TokenBucket(**limits)) if limits else None
+            return self._queues[name]
+
+    def acquire(self, provider, tokens=0, qualifier=None):
+        """
+        Wait for a slot with the caller's priority; returns the seconds waited.
+        """
+        queue = self.queue(provider, qualifier)
+        if queue is None:
+            return 0.0
+        return queue.acquire(tokens, priority=_priority.get(), owner=_owner.get())
+
+    def rate_limited(self, provider, retry_after=None, qualifier=None):
+        """
+        Record that the provider rejected a call; later callers wait before trying again.
+        """
+        queue = self.queue(provider, qualifier)
+        if queue is None:
+            return
+        seconds = retry_after if retry_after is not None else RATE_LIMIT_PAUSE
+        logging.warning(f"{queue.name} is rate limiting; pausing its queue for {seconds:.1f}s.")
+        queue.pause(seconds)
+
+    def settle(self, provider, reserved_tokens, used_tokens, qualifier=None):
+        queue = self.queue(provider, qualifier)
+        if queue is not None:
+            queue.settle(reserved_tokens, used_tokens)
+
+    def queue_status(self, owner):
+        """
+        Return {"provider", "position"} for the first call of `owner` still waiting, or None.
+        """
+        if owner is None:
+            return None
+        with self._lock:
+            queues = [queue for queue in self._queues.values() if queue is not None]
+        best = None
+        for queue in queues:
+            for position in queue.positions(owner):
+                if best is None or position < best["position"]:
+                    best = {"provider": queue.name, "position": position}
+        return best
+
+    def stats(self):
+        """
+        Return queue depth, admissions, timeouts, total wait and remaining budget per provider.
+        """
+        with self._lock:
+            queues = {name: queue for name, queue in self._queues.items() if queue is not None}
+        return {name: queue.stats() for name, queue in sorted(queues.items())}
+
+    def scheduled_model(self, model, model_name):
+        """
+        Wrap a Groq model callable so each call waits for a request and token slot of
+        its model, and is retried after the queue pause when Groq still answers 429.
+        """
+        @wraps(model)
+        def wrapper(system_prompt="", user_prompt="", *args, **kwargs):
+            # Reserve the expected completion, not the max_tokens ceiling (taskflowai passes 4000
+            # against Groq's 6000 TPM); settle() corrects the bucket with the real usage afterwards
+            completion = min(int(kwargs.get("max_tokens") or SCHEDULER_COMPLETION_TOKENS), SCHEDULER_COMPLETION_TOKENS)
+            reserved = estimate_tokens(system_prompt) + estimate_tokens(user_prompt) + completion
+            for attempt in range(SCHEDULER_RATE_LIMIT_RETRIES + 1):
+                self.acquire("groq", reserved, qualifier=model_name)
+                try:
+                    result = model(system_prompt, user_prompt, *args, **kwargs)
+                except Exception as e:
+                    self.settle("groq", reserved, 0, qualifier=model_name)
+                    if attempt < SCHEDULER_RATE_LIMIT_RETRIES and is_rate_limit_error(e):
+                        self.rate_limited("groq", qualifier=model_name)
+                        continue
+                    raise
+                # taskflowai models report failures as (text, error) instead of raising
+                error = result[1] if isinstance(result, tuple) and len(result) > 1 else None
+                if error is not None and attempt < SCHEDULER_RATE_LIMIT_RETRIES and is_rate_limit_error(error):
+                    self.settle("groq", reserved, 0, qualifier=model_name)
+                    self.rate_limited("groq", qualifier=model_name)
+                    continue
+                response = result[0] if isinstance(result, tuple) else result
+                used = estimate_tokens(system_prompt) + estimate_tokens(user_prompt) \
+                    + estimate_tokens(response if isinstance(response, str) else "")
+                self.settle("groq", reserved, used, qualifier=model_name)
+                return result
+        return wrapper
+
+
+# Process-wide scheduler shared by the HTTP client, the tools and the models
+scheduler = Scheduler()
@@ -0,0 +1,133 @@
+import os
+import time
+import hashlib
+import threading
+from contextlib import contextmanager
+from logger.logger_config import logging
+
+try:
+    import fcntl
+except ImportError:  # Windows: fall back to in-process coalescing only
+    fcntl = None
+
+# Coalesce identical calls across worker processes through a lock file per key
+SINGLE_FLIGHT_CROSS_PROCESS = os.getenv("SINGLE_FLIGHT_CROSS_PROCESS", "1") == "1"
+# Seconds a process waits for another process's lock before running the call itself
+SINGLE_FLIGHT_LOCK_TIMEOUT = float(os.getenv("SINGLE_FLIGHT_LOCK_TIMEOUT", "300"))
+LOCK_POLL_INTERVAL = 0.1
+
+
+class _Call:
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+        self.waiters = 0
+
+
+class SingleFlight:
+    """
+    Request coalescing: concurrent calls with the same key share one execution.
+
+    Within a process the first caller (the leader) runs the function and later
+    callers block on its result. Across processes the leader also holds an
+    exclusive lock file for the key, so leaders in other processes wait for it
+    and then re-check the shared store (`load`) before running the function.
+    """
+
+    def __init__(self, lock_dir, cross_process=SINGLE_FLIGHT_CROSS_PROCESS, lock_timeout=SINGLE_FLIGHT_LOCK_TIMEOUT):
+        self.lock_dir = lock_dir
+        self.cross_process = cross_process and fcntl is not None
+        self.lock_timeout = lock_timeout
+        self._calls = {}
+        self._lock = threading.Lock()
+        self._stats = {"executions": 0, "coalesced": 0}
+        # The lock directory is created by the first cross-process call, not at import
+        self._lock_dir_ready = False
+
+    def do(self, key, func, load=None):
+        """
+        Return func() for `key`, sharing one execution with concurrent callers.
+        `load()` reads a result another process may already have stored (None if absent).
+        Returns (result, shared) where `shared` is True when this caller did not run func.
+        """
+        with self._lock:
+            call = self._calls.get(key)
+            if call is not None:
+                call.waiters += 1
+                self._stats["coalesced"] += 1
+                leader = False
+            else:
+                call = self._calls[key] = _Call()
+                leader = True
+
+        if not leader:
+            logging.info(f"Waiting for in-flight call {key}.")
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result, True
+
+        shared = False
+        try:
+            with self._process_lock(key):
+                # Another process may have finished the same call since our cache lookup
+                stored = load() if (self.cross_process and load is not None) else None
+                if stored is not None:
+                    logging.info(f"Using result stored by another process for {key}.")
+                    call.result, shared = stored, True
+                else:
+                    with self._lock:
+                        self._stats["executions"] += 1
+                    call.result = func()
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                self._calls.pop(key, None)
+            call.done.set()
+            if call.waiters:
+                logging.info(f"Shared call {key} with {call.waiters} waiting caller(s).")
+        return call.result, shared
+
+    @contextmanager
+    def _process_lock(self, key):
+        """
+        Hold an exclusive lock file for `key` while the leader runs.
+        """
+        if not self.cross_process:
+            yield
+            return
+
+        if not self._lock_dir_ready:
+            os.makedirs(self.lock_dir, exist_ok=True)
+            self._lock_dir_ready = True
+        digest = hashlib.sha256(key.encode("utf-8")).hexdigest()[:32]
+        path = os.path.join(self.lock_dir, f"{digest}.lock")
+        locked = False
+        with open(path, "a+") as handle:
+            deadline = time.monotonic() + self.lock_timeout
+            while True:
+                try:
+                    fcntl.flock(handle, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                    locked = True
+                    break
+                except BlockingIOError:
+                    if time.monotonic() >= deadline:
+                        logging.warning(f"Timed out waiting for lock on {key}; running without it.")
+                        break
+                    time.sleep(LOCK_POLL_INTERVAL)
+            try:
+                yield
+            finally:
+                if locked:
+                    fcntl.flock(handle, fcntl.LOCK_UN)
+
+    def in_flight(self):
+        with self._lock:
+            return len(self._calls)
+
+    def stats(self):
+        with self._lock:
+            return dict(self._stats, in_flight=len(self._calls))
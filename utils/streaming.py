@@ -0,0 +1,153 @@
+import os
+import time
+import threading
+import contextvars
+from contextlib import contextmanager
+from functools import wraps
+from logger.logger_config import logging
+from utils.image_pipeline import IMAGE_PATTERN
+from utils.metrics import report_usage
+from utils.http_client import HttpClient, HTTP_RETRIES
+from utils.scheduler import is_rate_limit_error
+
+# Stream partial LLM output into the UI while tasks run (set to 0 to disable)
+STREAMING_ENABLED = os.getenv("STREAM_SECTIONS", "1") == "1"
+
+# Retries of a failed streaming call, with the HTTP client's backoff, before falling back to a regular call
+STREAM_RETRIES = int(os.getenv("STREAM_RETRIES", str(HTTP_RETRIES)))
+
+_current_sink = contextvars.ContextVar("stream_sink", default=None)
+_client = {"groq": None}
+_client_lock = threading.Lock()
+
+
+class StreamSink:
+    """
+    Thread-safe buffer that collects streamed text from a worker thread
+    so the Streamlit script thread can render it incrementally.
+    """
+
+    def __init__(self):
+        self._chunks = []
+        self._version = 0
+        self._lock = threading.Lock()
+
+    def write(self, text):
+        with self._lock:
+            self._chunks.append(text)
+            self._version += 1
+
+    def reset(self):
+        with self._lock:
+            self._chunks = []
+            self._version += 1
+
+    def snapshot(self):
+        """
+        Return (version, text); the version changes whenever new text arrives.
+        """
+        with self._lock:
+            return self._version, "".join(self._chunks)
+
+
+@contextmanager
+def stream_to(sink):
+    """
+    Route streamed LLM output produced in the current thread to `sink`.
+    """
+    token = _current_sink.set(sink)
+    try:
+        yield sink
+    finally:
+        _current_sink.reset(token)
+
+
+def current_sink():
+    return _current_sink.get()
+
+
+def stable_markdown(text):
+    """
+    Return the part of partially streamed Markdown that is safe to render:
+    a trailing image tag that is still being generated is held back until it completes.
+    """
+    index = text.rfind("![")
+    if index != -1 and IMAGE_PATTERN.match(text, index) is None:
+        return text[:index]
+    return text
+
+
+def _groq_client():
+    """
+    One Groq client per process, so streamed calls reuse its connection pool.
+    """
+    if _client["groq"] is None:
+        with _client_lock:
+            if _client["groq"] is None:
+                from groq import Groq  # type: ignore
+
+                # Retries are handled by streaming_model and the scheduler, not inside the SDK
+                _client["groq"] = Groq(api_key=os.getenv("GROQ_API_KEY"), max_retries=0)
+    return _client["groq"]
+
+
+def _is_transient(error):
+    """
+    Connection errors, timeouts and 5xx answers are worth retrying; other API errors are not.
+    """
+    import groq  # type: ignore
+
+    return isinstance(error, (groq.APIConnectionError, groq.InternalServerError))
+
+
+def _stream_groq_completion(model_name, system_prompt, user_prompt, temperature, max_tokens, sink):
+    stream = _groq_client().chat.completions.create(
+        model=model_name,
+        messages=[
+            {"role": "system", "content": system_prompt},
+            {"role": "user", "content": user_prompt}
+        ],
+        temperature=temperature,
+        max_tokens=max_tokens,
+        stream=True
+    )
+    chunks = []
+    for chunk in stream:
+        delta = chunk.choices[0].delta.content if chunk.choices else None
+        if delta:
+            chunks.append(delta)
+            sink.write(delta)
+        # Groq sends the token usage with the last chunk
+        usage = getattr(getattr(chunk, "x_groq", None), "usage", None)
+        if usage is not None:
+            report_usage(usage.prompt_tokens, usage.completion_tokens)
+    return "".join(chunks).strip(), None
+
+
+def streaming_model(base_model, model_name):
+    """
+    Wrap a taskflowai Groq model so free-text calls stream into the active sink.
+    JSON calls (the tool loop) and calls without a sink use `base_model` unchanged.
+    """
+    @wraps(base_model)
+    def wrapper(system_prompt="", user_prompt="", image_data=None, temperature=0.7, max_tokens=4000, require_json_output=False):
+        sink = current_sink()
+        if sink is None or require_json_output or image_data:
+            return base_model(system_prompt, user_prompt, image_data=image_data, temperature=temperature,
+                              max_tokens=max_tokens, require_json_output=require_json_output)
+        for attempt in range(STREAM_RETRIES + 1):
+            try:
+                return _stream_groq_completion(model_name, system_prompt, user_prompt, temperature, max_tokens, sink)
+            except Exception as e:
+                sink.reset()
+                if is_rate_limit_error(e):
+                    # The scheduler pauses the model's queue and retries the call
+                    raise
+                if attempt < STREAM_RETRIES and _is_transient(e):
+                    logging.warning(f"Streaming from {model_name} failed, retrying: {e}")
+                    time.sleep(HttpClient._backoff(attempt))
+                    continue
+                logging.warning(f"Streaming from {model_name} failed, retrying without streaming: {e}")
+                return base_model(system_prompt, user_prompt, temperature=temperature, max_tokens=max_tokens)
+
+    return wrapper
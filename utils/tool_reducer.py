@@ -0,0 +1,324 @@
+import os
+import re
+import json
+import contextvars
+from contextlib import contextmanager
+from functools import wraps
+from logger.logger_config import logging
+from utils.metrics import estimate_tokens
+from utils.gazetteer import normalize_name
+
+# Default token budget per tool output. Override with TOOL_TOKEN_BUDGET_<TOOL>.
+DEFAULT_TOOL_BUDGETS = {
+    "serper": 800,
+    "wikipedia": 1200,
+    "pexels": 150,
+}
+MAX_IMAGES = int(os.getenv("TOOL_MAX_IMAGES", "4"))
+# Passages shorter than this are merged into the next one when article text is split;
+# longer ones are cut so a single passage cannot use up a whole budget
+MIN_PASSAGE_CHARS = 200
+MAX_PASSAGE_CHARS = 1500
+
+_STOPWORDS = {
+    "the", "and", "for", "with", "from", "that", "this", "are", "was", "what", "best", "top", "in", "of", "to",
+    "في", "من", "على", "الى", "عن", "مع", "هذه", "هذا", "التي", "الذي", "او", "و",
+}
+_TEXT_FIELDS = ("content", "extract", "summary", "snippet", "text", "description")
+_URL_FIELDS = ("url", "link", "fullurl")
+_PARAGRAPHS = re.compile(r"\n\s*\n|\n(?=\s*=+)")
+
+# Blocks of taskflowai's formatted Serper output: "Organic Results:", "1. <title>", "   URL: <link>"
+_SEARCH_SECTION = re.compile(r"^\w+ Results:$")
+_SEARCH_TITLE = re.compile(r"^\d+\.\s+(.*)$")
+_SEARCH_FIELD = re.compile(r"^\s+(URL|Snippet|Date|Source|Price|Image URL):\s*(.*)$")
+_SEARCH_FIELDS = {"URL": "link", "Snippet": "snippet", "Date": "date", "Source": "source", "Price": "price"}
+_SEARCH_PLACEHOLDERS = {"No Title", "No Link", "No Snippet", "No Date", "No Source", "No Price", "No Image URL"}
+
+_context_terms = contextvars.ContextVar("reducer_terms", default=())
+
+
+@contextmanager
+def relevance_context(*texts):
+    """
+    Rank tool output called in the enclosed block by these texts (destination, interests, ...)
+    in addition to the tool's own query.
+    """
+    token = _context_terms.set(tuple(_terms(" ".join(str(t or "") for t in texts))))
+    try:
+        yield
+    finally:
+        _context_terms.reset(token)
+
+
+def tool_budget(tool):
+    return int(os.getenv(f"TOOL_TOKEN_BUDGET_{tool.upper()}", DEFAULT_TOOL_BUDGETS.get(tool, 1000)))
+
+
+def _terms(text):
+    return [word for word in normalize_name(text).split() if len(word) > 1 and word not in _STOPWORDS]
+
+
+def relevance(text, terms):
+    """
+    Score a passage by how many distinct terms it contains, then by how often they occur.
+    """
+    if not terms:
+        return 0.0
+    words = normalize_name(text).split()
+    counts = {}
+    for word in words:
+        counts[word] = counts.get(word, 0) + 1
+    hits = [counts.get(term, 0) for term in set(terms)]
+    return sum(1 for h in hits if h) + 0.1 * min(sum(hits), 20)
+
+
+def _normalize_url(url):
+    return re.sub(r"^https?://(www\.)?", "", str(url or "").strip()).rstrip("/").lower()
+
+
+def _first(item, fields):
+    for field in fields:
+        value = item.get(field)
+        if value:
+            return value
+    return None
+
+
+def _rank(items, terms, text_of):
+    """
+    Order items by relevance, keeping the original order among equal scores.
+    """
+    scored = [(-relevance(text_of(item), terms), i, item) for i, item in enumerate(items)]
+    return [item for _, _, item in sorted(scored, key=lambda entry: (entry[0], entry[1]))]
+
+
+def _take_within_budget(items, budget, size_of):
+    kept, used = [], 0
+    for item in items:
+        size = size_of(item)
+        if kept and used + size > budget:
+            continue
+        kept.append(item)
+        used += size
+    return kept
+
+
+def _split_passages(text):
+    passages, current = [], ""
+    for part in _PARAGRAPHS.split(text or ""):
+        part = part.strip()
+        if not part:
+            continue
+        current = f"{current}\n{part}" if current else part
+        if len(current) >= MIN_PASSAGE_CHARS:
+            passages.append(current[:MAX_PASSAGE_CHARS])
+            current = ""
+    if current:
+        passages.append(current[:MAX_PASSAGE_CHARS])
+    return passages
+
+
+def parse_search_text(text):
+    """
+    Split taskflowai's formatted Serper output into result dicts (title, link, snippet
+    and date/source/price when present). Lines outside a result, such as request
+    errors, are returned separately so they can be passed on unchanged.
+    """
+    results, other = [], []
+    current = None
+    for line in (text or "").splitlines():
+        if not line.strip() or _SEARCH_SECTION.match(line.strip()):
+            continue
+        title = _SEARCH_TITLE.match(line)
+        field = _SEARCH_FIELD.match(line)
+        if title and not line[0].isspace():
+            current = {"title": title.group(1).strip(), "link": "", "snippet": ""}
+            results.append(current)
+        elif field and current is not None:
+            key = _SEARCH_FIELDS.get(field.group(1))
+            value = field.group(2).strip()
+            if key and value not in _SEARCH_PLACEHOLDERS:
+                current[key] = value
+        elif current is not None:
+            current["snippet"] = f"{current['snippet']} {line.strip()}".strip()
+        else:
+            other.append(line.strip())
+    for result in results:
+        if result["title"] in _SEARCH_PLACEHOLDERS:
+            result["title"] = ""
+    return results, other
+
+
+def format_search_results(results):
+    """
+    Render result dicts in the same layout taskflowai uses for Serper output.
+    """
+    lines = ["Search Results:"]
+    for i, result in enumerate(results, 1):
+        lines.append(f"{i}. {result['title']}")
+        for key, label in (("link", "URL"), ("date", "Date"), ("source", "Source"),
+                           ("price", "Price"), ("snippet", "Snippet")):
+            if result.get(key):
+                lines.append(f"   {label}: {result[key]}")
+        lines.append("")
+    return "\n".join(lines).strip()
+
+
+def _select_results(results, terms, budget, size_of):
+    """
+    De-duplicate result dicts by URL (or title), rank them by relevance and keep them within `budget`.
+    """
+    seen, unique = set(), []
+    for result in results:
+        key = _normalize_url(result["link"]) or result["title"]
+        if key in seen:
+            continue
+        seen.add(key)
+        unique.append(result)
+    ranked = _rank(unique, terms, lambda item: f"{item['title']} {item['snippet']}")
+    return _take_within_budget(ranked, budget, size_of)
+
+
+def reduce_search_results(payload, terms, budget):
+    """
+    Keep title, link and snippet of search results, de-duplicated by URL and ranked
+    by relevance, within `budget` tokens.
+
+    Accepts Serper's JSON (organic results plus a direct answer, if any), a list of
+    result dicts, or the formatted text WebTools.serper_search returns: one string for
+    a single query, a list of strings for several. Text is returned as one formatted
+    string covering every query, with results shared by several queries listed once.
+    """
+    if isinstance(payload, str) or (isinstance(payload, list) and payload
+                                    and all(isinstance(text, str) for text in payload)):
+        results, other = [], []
+        for text in [payload] if isinstance(payload, str) else payload:
+            parsed, unparsed = parse_search_text(text)
+            results.extend(parsed)
+            other.extend(unparsed)
+        kept = _select_results(results, terms, budget,
+                               lambda item: estimate_tokens(format_search_results([item])))
+        blocks = [format_search_results(kept)] if kept else []
+        return "\n\n".join(blocks + other)
+
+    if isinstance(payload, dict):
+        results = list(payload.get("organic") or [])
+        answer = payload.get("answerBox") or {}
+        answer_text = answer.get("answer") or answer.get("snippet")
+        if answer_text:
+            results.insert(0, {"title": answer.get("title", ""), "link": answer.get("link", ""), "snippet": answer_text})
+    else:
+        results = list(payload or [])
+
+    items = [
+        {
+            "title": result.get("title", ""),
+            "link": _first(result, _URL_FIELDS) or "",
+            "snippet": _first(result, _TEXT_FIELDS) or "",
+        }
+        for result in results if isinstance(result, dict)
+    ]
+    return _select_results(items, terms, budget,
+                           lambda item: estimate_tokens(json.dumps(item, ensure_ascii=False)))
+
+
+def reduce_articles(payload, terms, budget):
+    """
+    Keep the title, URL and the most relevant passages of each article within `budget` tokens.
+    """
+    if isinstance(payload, str):
+        return reduce_text(payload, terms, budget)
+    articles = payload if isinstance(payload, list) else [payload]
+
+    seen, passages = set(), []
+    for index, article in enumerate(articles):
+        if not isinstance(article, dict):
+            continue
+        url = _first(article, _URL_FIELDS) or ""
+        key = _normalize_url(url) or article.get("title", "")
+        if key in seen:
+            continue
+        seen.add(key)
+        for position, passage in enumerate(_split_passages(_first(article, _TEXT_FIELDS) or "")):
+            passages.append((index, position, article.get("title", ""), url, passage))
+
+    ranked = _rank(passages, terms, lambda entry: f"{entry[2]} {entry[4]}")
+    kept = _take_within_budget(ranked, budget, lambda entry: estimate_tokens(entry[4]) + 10)
+
+    # Put the kept passages back in article and reading order
+    reduced = {}
+    for index, _, title, url, passage in sorted(kept, key=lambda entry: entry[:2]):
+        article = reduced.setdefault(index, {"title": title, "url": url, "passages": []})
+        article["passages"].append(passage)
+    return list(reduced.values())
+
+
+def reduce_text(payload, terms, budget):
+    """
+    Keep the most relevant passages of a plain-text tool result, in their original order.
+    """
+    passages = _split_passages(payload)
+    ranked = _rank(list(enumerate(passages)), terms, lambda entry: entry[1])
+    kept = _take_within_budget(ranked, budget, lambda entry: estimate_tokens(entry[1]))
+    return "\n\n".join(passage for _, passage in sorted(kept))
+
+
+def reduce_image_urls(payload, terms, budget):
+    """
+    De-duplicate image URLs and keep at most MAX_IMAGES of them within `budget` tokens.
+    """
+    if not payload:
+        return payload
+    if isinstance(payload, str):
+        return reduce_text(payload, terms, budget)
+    seen, unique = set(), []
+    for url in payload:
+        key = _normalize_url(url)
+        if key and key not in seen:
+            seen.add(key)
+            unique.append(url)
+    return _take_within_budget(unique[:MAX_IMAGES], budget, estimate_tokens)
+
+
+REDUCERS = {
+    "serper": reduce_search_results,
+    "wikipedia": reduce_articles,
+    "pexels": reduce_image_urls,
+}
+
+
+def _size(payload):
+    if payload is None:
+        return 0
+    text = payload if isinstance(payload, str) else json.dumps(payload, ensure_ascii=False, default=str)
+    return estimate_tokens(text)
+
+
+def reduced(tool):
+    """
+    Decorator that trims a tool's output before it reaches the LLM.
+    Relevance terms come from the call's string arguments (the query) and the active
+    relevance_context. The wrapped function keeps its signature, so it can still be
+    registered as a taskflowai tool.
+    """
+    reducer = REDUCERS[tool]
+
+    def decorator(func):
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            payload = func(*args, **kwargs)
+            if payload is None or isinstance(payload, Exception):
+                return payload
+            query = " ".join(str(value) for value in list(args) + list(kwargs.values()) if isinstance(value, str))
+            terms = list(_context_terms.get()) + _terms(query)
+            budget = tool_budget(tool)
+            try:
+                result = reducer(payload, terms, budget)
+            except Exception as e:
+                logging.warning(f"Failed to reduce {tool} output, passing it through: {e}")
+                return payload
+            logging.info(f"Reduced {tool} output from {_size(payload)} to {_size(result)} tokens (budget {budget}).")
+            return result
+        return wrapper
+    return decorator